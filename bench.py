@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QPoint, QT_VERSION_STR, PYQT_VERSION_STR
+
+from window import DecisionWindow
+from sliders import MultiSlider, PaintedMultiSlider
+from reorderable import ReorderTray
+
+
+QUICK = {"options": [10, 100], "criteria": [2, 8], "depth": [1, 3]}
+FULL = {"options": [10, 100, 1000], "criteria": [2, 8, 32], "depth": [1, 3, 7]}
+
+
+def measure(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times), "repeat": repeat}
+
+
+def buildWindow(options, criteria, depth, painted, lazy):
+    # lazy leaves sliders holding placeholders, as they are until first shown or hovered
+    window = DecisionWindow(painted=painted)
+    window.scheduler.setBudget(None)
+    window.options.setNames([f"o{i}" for i in range(options)])
+    window.model.addOptions(window.options.getNames())
+    for j in range(criteria):
+        window.criteria.creator.setText(f"c{j}")
+        window.criteria.createNew()
+
+    crits = window.criteria.getItems()
+    layers = [crits[l::depth + 1] for l in range(depth + 1)]
+    for prev, layer in zip(layers, layers[1:]):
+        for crit in layer:
+            crit.updateInfluences(set(prev), recalc=False)
+    if not lazy:
+        for crit in crits:
+            crit.mslider.materialize()
+    return window, layers
+
+
+def benchCascade(options, criteria, depth, painted, lazy, repeat):
+    window, layers = buildWindow(options, criteria, depth, painted, lazy)
+    root = layers[0][0]
+    names = window.options.getNames()
+    values = iter(random.Random(0).choices(range(-50, 51), k=repeat))
+    window.propagator.recalcs = 0
+
+    result = measure(lambda: root.setValues({names[0]: next(values)}), repeat)
+    result["recalcs"] = window.propagator.recalcs / repeat
+    window.deleteLater()
+    return result
+
+
+def benchOptionsChanged(options, criteria, painted, lazy, repeat):
+    window, layers = buildWindow(options, criteria, 0, painted, lazy)
+    counter = iter(range(repeat))
+
+    def add():
+        window.options.creator.setText(f"new{next(counter)}")
+        window.options.createNew()
+    result = measure(add, repeat)
+    window.deleteLater()
+    return result
+
+
+def makeSlider(options, painted):
+    slider = (PaintedMultiSlider if painted else MultiSlider)(150, 500)
+    slider.addHandles([f"o{i}" for i in range(options)])
+    rng = random.Random(1)
+    slider.setValues({f"o{i}": rng.randint(-50, 50) for i in range(options)})
+    return slider
+
+
+def benchValuesChanged(options, painted, repeat):
+    slider = makeSlider(options, painted)
+    rows = slider.model.rows().tolist()
+    rng = random.Random(2)
+    return measure(lambda: slider.valuesChanged({rng.choice(rows): 0}), repeat)
+
+
+def benchSetValues(options, painted, repeat):
+    slider = makeSlider(options, painted)
+    rng = random.Random(3)
+    return measure(lambda: slider.setValues({f"o{i}": rng.randint(-50, 50) for i in range(options)}), repeat)
+
+
+def benchMouseAt(options, painted, repeat):
+    slider = makeSlider(options, painted)
+    rng = random.Random(4)
+    points = [slider.mapToGlobal(QPoint(slider.wid // 2 + rng.randint(-10, 10), rng.randrange(slider.hei))) for _ in range(repeat)]
+    points = iter(points)
+    return measure(lambda: slider.mouseAt(next(points)), repeat)
+
+
+def benchAddHandles(options, painted, repeat):
+    names = [f"o{i}" for i in range(options)]
+    holder = {}
+
+    def setup():
+        holder["slider"] = (PaintedMultiSlider if painted else MultiSlider)(150, 500)
+    return measure(lambda: holder["slider"].addHandles(names), repeat, setup)
+
+
+def benchMaterialize(options, painted, repeat):
+    slider = makeSlider(options, painted)
+    return measure(slider.materialize, repeat, slider.release)
+
+
+def benchUpdateRange(options, painted, repeat):
+    slider = makeSlider(options, painted)
+    spans = iter([(-1 - i % 2, 1 + i % 2) for i in range(repeat)])
+    return measure(lambda: slider.updateRange(*next(spans)), repeat)
+
+
+def benchTray(options, repeat):
+    tray = ReorderTray(2, True, None, "")
+    tray.setNames([f"o{i}" for i in range(options)])
+    rng = random.Random(5)
+    results = {
+        "refillGrid": measure(tray.refillGrid, repeat),
+        "insertAt": measure(lambda: tray.insertAt(tray.blankPanel(), 0), repeat),
+        "removeAt": measure(lambda: tray.removeAt(0).deleteLater(), repeat),
+        "moveTo": measure(lambda: tray.moveTo(rng.randrange(options), rng.randrange(options)), repeat)
+    }
+    tray.deleteLater()
+    return results
+
+
+def run(grid, repeat):
+    results = []
+
+    def record(bench, params, result):
+        results.append(dict(bench=bench, params=params, **result))
+        print(f"{bench:<26} {json.dumps(params):<60} {result['median'] * 1000:9.3f} ms", file=sys.stderr)
+
+    for painted in (False, True):
+        for n in grid["options"]:
+            params = {"options": n, "painted": painted}
+            record("MultiSlider.valuesChanged", params, benchValuesChanged(n, painted, repeat))
+            record("MultiSlider.setValues", params, benchSetValues(n, painted, repeat))
+            record("MultiSlider.mouseAt", params, benchMouseAt(n, painted, repeat))
+            record("MultiSlider.addHandles", params, benchAddHandles(n, painted, max(1, repeat // 10)))
+            record("MultiSlider.updateRange", params, benchUpdateRange(n, painted, repeat))
+            record("MultiSlider.materialize", params, benchMaterialize(n, painted, max(1, repeat // 10)))
+
+            # painted sliders have nothing to materialize
+            for lazy in (False,) if painted else (False, True):
+                for m in grid["criteria"]:
+                    params = {"options": n, "criteria": m, "painted": painted, "lazy": lazy}
+                    record("optionsChanged", params, benchOptionsChanged(n, m, painted, lazy, max(1, repeat // 10)))
+                    for d in grid["depth"]:
+                        if d < m:
+                            record("Criterion.recalc", dict(params, depth=d),
+                                   benchCascade(n, m, d, painted, lazy, repeat))
+            QApplication.processEvents()
+
+    for n in grid["options"]:
+        for name, result in benchTray(n, repeat).items():
+            record(f"ReorderTray.{name}", {"options": n}, result)
+
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="bench.py")
+    parser.add_argument("--out", metavar="FILE", help="write results as JSON to FILE instead of stdout")
+    parser.add_argument("--full", action="store_true", help="run the large size grid")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv[:1])
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "pyqt": PYQT_VERSION_STR,
+            "platform": platform.platform(),
+            "qpa": os.environ["QT_QPA_PLATFORM"],
+            "grid": FULL if args.full else QUICK,
+            # window benches materialize every slider as a shown window has them; lazy=true
+            # results keep the placeholders and are not comparable with runs from before
+            "sliders": "materialized unless lazy"
+        },
+        "results": run(FULL if args.full else QUICK, args.repeat)
+    }
+
+    text = json.dumps(report, indent=1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
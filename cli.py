@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from evaluate import propagate, totals, ranks
+from importer import loadImport, checkBatch
+from session import readSession
+
+
+DECISION_EXTENSIONS = (".dsess", ".csv", ".jsonl", ".ndjson")
+DEFAULT_SPAN = [-50, 50]
+DEFAULT_UNIT = 50
+
+
+def positiveInt(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive number, got {text}")
+    return value
+
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(prog="main.py", epilog="Decisions with more than 1000 options always use "
+                                     "painted sliders and the virtualized list.")
+    parser.add_argument("session", nargs="?", help="session file to open in the window")
+    parser.add_argument("--eval", nargs="+", metavar="PATH",
+                        help="evaluate decision files or directories without starting the GUI")
+    parser.add_argument("--out", metavar="DIR", help="write one result file per decision into DIR instead of stdout")
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--workers", type=positiveInt, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--top", type=int, default=0, help="only report the top K options")
+    parser.add_argument("--painted", action="store_true", help="draw slider handles instead of using one widget per handle")
+    parser.add_argument("--virtual", action="store_true", help="show options in a virtualized list that only builds visible panels")
+    parser.add_argument("--threaded", action="store_true", help="recompute derived criteria on a worker thread while dragging")
+    parser.add_argument("--serve", metavar="NAME", help="host a shared decision on local socket NAME and join it")
+    parser.add_argument("--join", metavar="NAME", help="join the shared decision hosted on local socket NAME")
+    parser.add_argument("--profile", metavar="TRACE", help="time signal handlers and write a Chrome trace to TRACE on exit")
+    parser.add_argument("--record", metavar="TRACE", help="record input events to TRACE on exit for replay.py")
+    return parser.parse_args(argv)
+
+
+def decisionFiles(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for entry in sorted(os.listdir(path)):
+                if entry.lower().endswith(DECISION_EXTENSIONS):
+                    yield os.path.join(path, entry)
+        else:
+            yield path
+
+
+def loadDecision(path):
+    if path.lower().endswith(".dsess"):
+        header, matrix = readSession(path)
+        criteria = header["criteria"]
+    else:
+        batch = loadImport(path)
+        checkBatch(batch)
+        header = {"options": batch.options}
+        criteria = [{
+            "name": name,
+            "influences": [batch.criterionIndex[i] for i in batch.influences.get(name, [])],
+            "rmin": DEFAULT_SPAN[0],
+            "rmax": DEFAULT_SPAN[1],
+            "modes": batch.modes.get(name, ["zero", "one", "default"])
+        } for name in batch.criteria]
+        matrix = np.nan_to_num(batch.matrix())
+
+    for crit in criteria:
+        crit.setdefault("span", DEFAULT_SPAN)
+        crit.setdefault("unit", DEFAULT_UNIT)
+    return header["options"], criteria, np.asarray(matrix, dtype=float)
+
+
+def evaluateFile(path, top=0):
+    names, criteria, matrix = loadDecision(path)
+
+    base = matrix.copy()
+    for j, crit in enumerate(criteria):
+        base[:, j] = np.clip(np.trunc(base[:, j]), *crit["span"])
+    scores = propagate(base, criteria)
+    total = totals(scores, criteria)
+    order = np.argsort(ranks(total))
+    if top > 0:
+        order = order[:top]
+
+    return {
+        "file": path,
+        "criteria": [c["name"] for c in criteria],
+        "ranking": [{
+            "rank": r + 1,
+            "option": names[i],
+            "total": float(total[i]),
+            "scores": scores[i].astype(int).tolist()
+        } for r, i in enumerate(order.tolist())]
+    }
+
+
+def formatResult(result, fmt):
+    if fmt == "json":
+        return json.dumps(result)
+
+    lines = [",".join(["rank", "option", "total"] + [csvField(c) for c in result["criteria"]])]
+    for row in result["ranking"]:
+        lines.append(",".join([str(row["rank"]), csvField(row["option"]), f"{row['total']:g}"] + [str(v) for v in row["scores"]]))
+    return "\n".join(lines)
+
+
+def csvField(text):
+    if any(c in text for c in ",\"\n"):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def evaluateTask(task):
+    path, top = task
+    try:
+        return evaluateFile(path, top), None
+    except (OSError, ValueError, KeyError, IndexError, struct.error) as e:
+        return {"file": path}, f"{path}: {e}"
+
+
+def runHeadless(args):
+    files = list(decisionFiles(args.eval))
+    tasks = [(path, args.top) for path in files]
+    try:
+        names = outputNames(files, args.format) if args.out else {}
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if len(tasks) > 1 and args.workers != 1:
+        with ProcessPoolExecutor(args.workers) as executor:
+            results = executor.map(evaluateTask, tasks, chunksize=max(1, len(tasks) // 64))
+            return writeResults(results, names, args)
+    return writeResults(map(evaluateTask, tasks), names, args)
+
+
+def outputNames(files, fmt):
+    # x.csv and x.jsonl give x.csv.json and x.jsonl.json; the same name from two directories is refused
+    names = {}
+    sources = {}
+    for path in files:
+        name = os.path.basename(path) + "." + fmt
+        if name in sources and sources[name] != path:
+            raise ValueError(f"{sources[name]} and {path} would both be written to {name}")
+        sources[name] = path
+        names[path] = name
+    return names
+
+
+def writeResults(results, names, args):
+    status = 0
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    for result, error in results:
+        if error:
+            print(error, file=sys.stderr)
+            status = 1
+            continue
+
+        text = formatResult(result, args.format)
+        if args.out:
+            with open(os.path.join(args.out, names[result["file"]]), "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+    return status
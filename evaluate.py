@@ -0,0 +1,128 @@
+import numpy as np
+
+from formula import compileFormula
+from propagation import orderIndices
+
+
+def bounds(sums, crit, possible, scale=1):
+    center, range, invert = crit["modes"]
+    rmin, rmax = crit["rmin"], crit["rmax"]
+    unit = crit["unit"]
+
+    if center in ("manual", "lock"):
+        mid = (rmin + rmax) / 2
+    elif center == "zero":
+        mid = 0.0
+    elif center == "mean":
+        mid = sums.mean(axis=-1, keepdims=True)
+    else:
+        mid = (sums.min(axis=-1, keepdims=True) + sums.max(axis=-1, keepdims=True)) / 2
+
+    if range in ("manual", "lock"):
+        half = (rmax - rmin) / 2
+    elif range == "one":
+        half = unit
+    elif range == "stdev":
+        half = sums.std(axis=-1, keepdims=True)
+    elif range == "minmax":
+        half = np.maximum(sums.max(axis=-1, keepdims=True) - mid, mid - sums.min(axis=-1, keepdims=True))
+    else:
+        half = possible
+
+    half = np.where(half <= 0, unit, half) * scale
+    return mid - half, mid + half
+
+
+def normalizeBatch(sums, crit, possible, scale=1):
+    lo, hi = crit["span"]
+    rlo, rhi = bounds(sums, crit, possible, scale)
+    scaled = (sums - rlo) / (rhi - rlo)
+    if crit["modes"][2] == "invert":
+        scaled = 1 - scaled
+    return np.clip(np.trunc(scaled * (hi - lo) + lo), lo, hi)
+
+
+def formulaIndices(crit, criteria):
+    index = {criteria[i]["name"]: i for i in crit["influences"]}
+    return [index[n] for n in compileFormula(crit["formula"]).names]
+
+
+def combine(values, crit, criteria):
+    # influences are summed, weighted when the criterion has weights, or fed to its formula
+    if crit.get("formula"):
+        return compileFormula(crit["formula"])(values[..., formulaIndices(crit, criteria)])
+    columns = values[..., crit["influences"]]
+    if crit.get("weights") is None:
+        return columns.sum(axis=-1)
+    return columns @ np.asarray(crit["weights"], dtype=float)
+
+
+def possibleRange(crit, criteria):
+    if crit.get("formula"):
+        possible = compileFormula(crit["formula"]).possible(
+            [tuple(criteria[i]["span"]) for i in formulaIndices(crit, criteria)])
+        if possible is not None:
+            return possible
+    weights = crit.get("weights") or [1.0] * len(crit["influences"])
+    return sum(abs(w) * max(-criteria[i]["span"][0], criteria[i]["span"][1])
+               for i, w in zip(crit["influences"], weights))
+
+
+def propagate(values, criteria, scales=None):
+    values = np.array(values, dtype=float)
+    for j in orderIndices([c["influences"] for c in criteria]):
+        crit = criteria[j]
+        if len(crit["influences"]) == 0:
+            continue
+        sums = combine(values, crit, criteria)
+        scale = scales[j] if scales is not None else 1
+        values[..., j] = normalizeBatch(sums, crit, possibleRange(crit, criteria), scale)
+    return values
+
+
+def cascade(values, criteria, sources):
+    # recompute everything downstream of sources, returning {j: (column, rmin, rmax)}
+    receives = [[] for _ in criteria]
+    for j, crit in enumerate(criteria):
+        for i in crit["influences"]:
+            receives[i].append(j)
+
+    dirty = set()
+    stack = list(sources)
+    while stack:
+        for r in receives[stack.pop()]:
+            if r not in dirty:
+                dirty.add(r)
+                stack.append(r)
+
+    values = np.array(values, dtype=float)
+    results = {}
+    if values.shape[0] == 0:
+        return results
+    for j in orderIndices([c["influences"] for c in criteria]):
+        if j not in dirty:
+            continue
+        crit = criteria[j]
+        sums = combine(values, crit, criteria)
+        possible = possibleRange(crit, criteria)
+        lo, hi = bounds(sums, crit, possible)
+        values[:, j] = normalizeBatch(sums, crit, possible)
+        results[j] = (values[:, j].copy(), np.asarray(lo).item(), np.asarray(hi).item())
+    return results
+
+
+def weights(criteria):
+    return np.array([c.get("weight", 1.0) if c.get("included", True) else 0.0 for c in criteria])
+
+
+def totals(values, criteria):
+    if len(criteria) == 0:
+        return np.zeros(values.shape[:-1])
+    return values @ weights(criteria)
+
+
+def ranks(totals):
+    order = np.argsort(-totals, axis=-1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(totals.shape[-1]), axis=-1)
+    return ranks
@@ -0,0 +1,271 @@
+import functools
+import math
+import re
+
+import numpy as np
+
+
+# Formulas combine a derived criterion's influences, e.g.
+#   2 * [cost] + [time]        max([a], [b]) * step([c], 10)        if([a] > 0, [a], -[b])
+# Names are criterion names, bare when they are identifiers and bracketed otherwise,
+# with any ] inside the brackets doubled: [a]]b] names "a]b".
+# Comparisons give 0 or 1, and x / 0 is 0 so a kernel never produces inf or nan.
+
+TOKEN = re.compile(r"\s*(?:(?P<num>\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)"
+                   r"|(?P<name>[A-Za-z_]\w*)|\[(?P<bracketed>(?:[^\]]|\]\])*)\]"
+                   r"|(?P<op><=|>=|[-+*/^(),<>]))")
+
+FUNCTIONS = {
+    "min": (1, None),
+    "max": (1, None),
+    "abs": (1, 1),
+    "clip": (3, 3),
+    "step": (2, 2),
+    "if": (3, 3)
+}
+
+
+class FormulaError(ValueError):
+    pass
+
+
+def div(a, b):
+    b = np.asarray(b, dtype=float)
+    safe = np.where(b != 0, b, 1.0)
+    return np.where(b != 0, a / safe, 0.0)
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN.match(text, pos)
+        if match is None:
+            raise FormulaError(f"unexpected {text[pos:].strip()[:10]!r} at {pos}")
+        kind = match.lastgroup
+        value = match.group(kind).replace("]]", "]") if kind == "bracketed" else match.group(kind)
+        tokens.append((kind, value, match.start(kind), match.end()))
+        pos = match.end()
+    return tokens
+
+
+class Parser:
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.names = []
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None, None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            where = f"at {token[2]}" if token[0] is not None else "at end"
+            raise FormulaError(f"expected {value or 'a term'} {where}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.comparison()
+        if self.peek()[0] is not None:
+            raise FormulaError(f"unexpected {self.peek()[1]!r} at {self.peek()[2]}")
+        return node
+
+    def comparison(self):
+        node = self.sum()
+        while self.peek()[1] in ("<", ">", "<=", ">="):
+            op = self.take()[1]
+            node = ("cmp", op, node, self.sum())
+        return node
+
+    def sum(self):
+        node = self.product()
+        while self.peek()[1] in ("+", "-"):
+            op = self.take()[1]
+            node = ("bin", op, node, self.product())
+        return node
+
+    def product(self):
+        node = self.unary()
+        while self.peek()[1] in ("*", "/"):
+            op = self.take()[1]
+            node = ("bin", op, node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek()[1] == "-":
+            self.take()
+            return ("neg", self.unary())
+        if self.peek()[1] == "+":
+            self.take()
+            return self.unary()
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        if self.peek()[1] == "^":
+            self.take()
+            node = ("bin", "^", node, self.unary())
+        return node
+
+    def atom(self):
+        kind, value, start, end = self.take()
+        if kind == "num":
+            return ("num", float(value))
+        if value == "(":
+            node = self.comparison()
+            self.take(")")
+            return node
+        if kind == "name" and self.peek()[1] == "(":
+            if value not in FUNCTIONS:
+                raise FormulaError(f"unknown function {value!r} at {start}")
+            self.take("(")
+            args = [self.comparison()]
+            while self.peek()[1] == ",":
+                self.take()
+                args.append(self.comparison())
+            self.take(")")
+            least, most = FUNCTIONS[value]
+            if len(args) < least or (most is not None and len(args) > most):
+                raise FormulaError(f"{value}() takes {least if least == most else f'{least} or more'} arguments")
+            return ("call", value, args)
+        if kind in ("name", "bracketed"):
+            if value not in self.names:
+                self.names.append(value)
+            return ("ref", self.names.index(value))
+        raise FormulaError(f"unexpected {value!r} at {start}")
+
+
+def generate(node):
+    kind = node[0]
+    if kind == "num":
+        return repr(node[1])
+    if kind == "ref":
+        return f"v[..., {node[1]}]"
+    if kind == "neg":
+        return f"(-{generate(node[1])})"
+    if kind == "bin":
+        a, b = generate(node[2]), generate(node[3])
+        if node[1] == "/":
+            return f"div({a}, {b})"
+        if node[1] == "^":
+            return f"np.power({a}, {b})"
+        return f"({a} {node[1]} {b})"
+    if kind == "cmp":
+        return f"(({generate(node[2])} {node[1]} {generate(node[3])}) * 1.0)"
+
+    name, args = node[1], [generate(a) for a in node[2]]
+    if name in ("min", "max"):
+        fn = "np.minimum" if name == "min" else "np.maximum"
+        code = args[0]
+        for arg in args[1:]:
+            code = f"{fn}({code}, {arg})"
+        return code
+    if name == "abs":
+        return f"np.abs({args[0]})"
+    if name == "clip":
+        return f"np.minimum(np.maximum({args[0]}, {args[1]}), {args[2]})"
+    if name == "step":
+        return f"(({args[0]} >= {args[1]}) * 1.0)"
+    return f"np.where({args[0]} != 0, {args[1]}, {args[2]})"
+
+
+def bound(node, ranges):
+    # interval arithmetic over the influences' ranges, used for the "possible" range mode
+    kind = node[0]
+    if kind == "num":
+        return node[1], node[1]
+    if kind == "ref":
+        return ranges[node[1]]
+    if kind == "neg":
+        lo, hi = bound(node[1], ranges)
+        return -hi, -lo
+    if kind == "cmp":
+        return 0.0, 1.0
+    if kind == "bin":
+        (alo, ahi), (blo, bhi) = bound(node[2], ranges), bound(node[3], ranges)
+        op = node[1]
+        if op == "+":
+            return alo + blo, ahi + bhi
+        if op == "-":
+            return alo - bhi, ahi - blo
+        if op == "*":
+            products = [alo * blo, alo * bhi, ahi * blo, ahi * bhi]
+            return min(products), max(products)
+        if op == "/":
+            if blo <= 0 <= bhi:
+                return -math.inf, math.inf
+            quotients = [alo / blo, alo / bhi, ahi / blo, ahi / bhi]
+            return min(quotients), max(quotients)
+        return -math.inf, math.inf
+
+    name, args = node[1], [bound(a, ranges) for a in node[2]]
+    if name == "min":
+        return min(a[0] for a in args), min(a[1] for a in args)
+    if name == "max":
+        return max(a[0] for a in args), max(a[1] for a in args)
+    if name == "abs":
+        lo, hi = args[0]
+        if lo >= 0:
+            return lo, hi
+        if hi <= 0:
+            return -hi, -lo
+        return 0.0, max(-lo, hi)
+    if name == "clip":
+        (xlo, xhi), (llo, lhi), (hlo, hhi) = args
+        return min(max(xlo, llo), hlo), min(max(xhi, lhi), hhi)
+    if name == "step":
+        return 0.0, 1.0
+    return min(args[1][0], args[2][0]), max(args[1][1], args[2][1])
+
+
+class Formula:
+    # a compiled formula: call it with the referenced columns stacked on the last axis
+
+    def __init__(self, text):
+        parser = Parser(text)
+        self.tree = parser.parse()
+        self.text = text
+        self.names = parser.names
+        code = f"lambda v: {generate(self.tree)} + np.zeros(v.shape[:-1])"
+        self.kernel = eval(compile(code, "<formula>", "eval"), {"np": np, "div": div, "__builtins__": {}})
+
+    def __call__(self, columns):
+        with np.errstate(invalid="ignore", over="ignore"):
+            return np.nan_to_num(self.kernel(np.asarray(columns, dtype=float)), nan=0.0, posinf=0.0, neginf=0.0)
+
+    def possible(self, ranges):
+        lo, hi = bound(self.tree, ranges)
+        if not (math.isfinite(lo) and math.isfinite(hi)):
+            return None
+        return max(abs(lo), abs(hi))
+
+    def renamed(self, old, new):
+        # swaps one referenced name, leaving the rest of the text as it was written
+        parts = []
+        last = 0
+        for kind, value, start, end in tokenize(self.text):
+            if kind in ("name", "bracketed") and value == old and not (kind == "name" and self.isCall(end)):
+                parts.append(self.text[last:start - (kind == "bracketed")])
+                parts.append(quoted(new))
+                last = end
+        parts.append(self.text[last:])
+        return compileFormula("".join(parts))
+
+    def isCall(self, end):
+        return self.text[end:].lstrip().startswith("(")
+
+
+def quoted(name):
+    # name as a formula refers to it
+    if re.fullmatch(r"[A-Za-z_]\w*", name) and name not in FUNCTIONS:
+        return name
+    return "[" + name.replace("]", "]]") + "]"
+
+
+@functools.lru_cache(maxsize=256)
+def compileFormula(text):
+    return Formula(text)
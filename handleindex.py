@@ -0,0 +1,62 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class HandleIndex:
+
+    def __init__(self):
+        self.entries = []
+        self.keys = {}
+        self.counter = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.keys
+
+    def add(self, name, value):
+        key = (value, self.counter)
+        self.counter += 1
+        self.keys[name] = key
+        insort(self.entries, key + (name,))
+
+    def addMany(self, items):
+        if len(items) == 1:
+            self.add(*items[0])
+            return
+        for name, value in items:
+            key = (value, self.counter)
+            self.counter += 1
+            self.keys[name] = key
+            self.entries.append(key + (name,))
+        self.entries.sort()
+
+    def remove(self, name):
+        del self.entries[self.position(name)]
+        del self.keys[name]
+
+    def move(self, name, value):
+        old = self.keys[name]
+        if old[0] == value:
+            return False
+        del self.entries[self.position(name)]
+        key = (value, old[1])
+        self.keys[name] = key
+        insort(self.entries, key + (name,))
+        return True
+
+    def moveMany(self, items):
+        items = list(items)
+        if len(items) <= len(self.entries) // 4:
+            for name, value in items:
+                self.move(name, value)
+            return
+        for name, value in items:
+            self.keys[name] = (value, self.keys[name][1])
+        self.entries = sorted(key + (name,) for name, key in self.keys.items())
+
+    def position(self, name):
+        return bisect_left(self.entries, self.keys[name])
+
+    def between(self, lo, hi):
+        return self.entries[bisect_left(self.entries, (lo,)):bisect_right(self.entries, (hi, float("inf")))]
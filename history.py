@@ -0,0 +1,398 @@
+import time
+from collections import deque
+
+import numpy as np
+
+
+# what a command reads or writes, for telling whether a change made elsewhere conflicts with it:
+#   ("option", name), ("criterion", name), ("row", slot), ("col", slot), ("order", tray), or EVERYTHING
+EVERYTHING = ("everything",)
+
+
+def shifted(idx, removed, inserted):
+    # the position idx ends up at after an entry left removed and one arrived at inserted
+    if removed is not None and idx > removed:
+        idx -= 1
+    if inserted is not None and idx >= inserted:
+        idx += 1
+    return idx
+
+
+class Command:
+    # value changes gather per row while the command is open, then compact into
+    # sorted row/before/after arrays per model column once it is sealed
+
+    def __init__(self):
+        self.pending = {}
+        self.changes = {}
+
+    def addChanges(self, rows, col, before, after):
+        entries = self.pending.setdefault(col, {})
+        for r, b, a in zip(rows.tolist(), before.tolist(), after.tolist()):
+            entry = entries.get(r)
+            if entry is None:
+                entries[r] = [b, a]
+            else:
+                entry[1] = a
+
+    def compact(self):
+        for col, entries in self.pending.items():
+            rows = np.fromiter(entries, dtype=int, count=len(entries))
+            values = np.array(list(entries.values()), dtype=float).reshape(-1, 2)
+            order = np.argsort(rows)
+            self.changes[col] = (rows[order], values[order, 0], values[order, 1])
+        self.pending = {}
+
+    def size(self):
+        return 128 + sum(sum(a.nbytes for a in arrays) for arrays in self.changes.values())
+
+    def touches(self):
+        keys = set()
+        for col, (rows, before, after) in self.changes.items():
+            keys.add(("col", col))
+            keys.update(("row", r) for r in rows.tolist())
+        return keys
+
+    def moves(self):
+        # (tray, removed, inserted) for each entry this command took out of or put into a tray
+        return []
+
+    def shift(self, tray, removed, inserted):
+        pass
+
+    def undo(self, target):
+        for col, (rows, before, after) in self.changes.items():
+            target.restoreValues(col, rows, before)
+        self.undoStructure(target)
+
+    def redo(self, target):
+        self.redoStructure(target)
+        for col, (rows, before, after) in self.changes.items():
+            target.restoreValues(col, rows, after)
+
+    def undoStructure(self, target):
+        pass
+
+    def redoStructure(self, target):
+        pass
+
+
+class ValueEdit(Command):
+    pass
+
+
+class AddOption(Command):
+
+    def __init__(self, idx, name, row):
+        super().__init__()
+        self.idx, self.name, self.row = idx, name, row
+
+    def touches(self):
+        return super().touches() | {("option", self.name), ("row", self.row)}
+
+    def moves(self):
+        return [("options", None, self.idx)]
+
+    def shift(self, tray, removed, inserted):
+        if tray == "options":
+            self.idx = shifted(self.idx, removed, inserted)
+
+    def undoStructure(self, target):
+        target.options.renameEntry(self.idx, "")
+
+    def redoStructure(self, target):
+        target.restoreOption(self.idx, self.name, self.row, None)
+
+
+class DeleteOption(Command):
+
+    def __init__(self, idx, name, row, values):
+        super().__init__()
+        self.idx, self.name, self.row, self.values = idx, name, row, values
+
+    def size(self):
+        return super().size() + self.values.nbytes
+
+    def touches(self):
+        return super().touches() | {("option", self.name), ("row", self.row)}
+
+    def moves(self):
+        return [("options", self.idx, None)]
+
+    def shift(self, tray, removed, inserted):
+        if tray == "options":
+            self.idx = shifted(self.idx, removed, inserted)
+
+    def undoStructure(self, target):
+        target.restoreOption(self.idx, self.name, self.row, self.values)
+
+    def redoStructure(self, target):
+        target.options.renameEntry(self.idx, "")
+
+
+class RenameEntry(Command):
+
+    def __init__(self, tray, idx, old, new):
+        super().__init__()
+        self.tray, self.idx, self.old, self.new = tray, idx, old, new
+
+    def touches(self):
+        kind = "option" if self.tray == "options" else "criterion"
+        return super().touches() | {(kind, self.old), (kind, self.new)}
+
+    def shift(self, tray, removed, inserted):
+        if tray == self.tray:
+            self.idx = shifted(self.idx, removed, inserted)
+
+    def undoStructure(self, target):
+        getattr(target, self.tray).renameEntry(self.idx, self.old)
+
+    def redoStructure(self, target):
+        getattr(target, self.tray).renameEntry(self.idx, self.new)
+
+
+class MoveEntry(Command):
+
+    def __init__(self, tray, source, dest):
+        super().__init__()
+        self.tray, self.source, self.dest = tray, source, dest
+
+    def touches(self):
+        # positions of every entry in the tray shift, so any other move conflicts with it
+        return super().touches() | {("order", self.tray)}
+
+    def moves(self):
+        return [(self.tray, self.source, self.dest)]
+
+    def shift(self, tray, removed, inserted):
+        if tray == self.tray:
+            self.source = shifted(self.source, removed, inserted)
+            self.dest = shifted(self.dest, removed, inserted)
+
+    def undoStructure(self, target):
+        getattr(target, self.tray).moveTo(self.dest, self.source)
+
+    def redoStructure(self, target):
+        getattr(target, self.tray).moveTo(self.source, self.dest)
+
+
+class AddCriterion(Command):
+
+    def __init__(self, idx, name, col):
+        super().__init__()
+        self.idx, self.name, self.col = idx, name, col
+
+    def touches(self):
+        return super().touches() | {("criterion", self.name), ("col", self.col)}
+
+    def moves(self):
+        return [("criteria", None, self.idx)]
+
+    def shift(self, tray, removed, inserted):
+        if tray == "criteria":
+            self.idx = shifted(self.idx, removed, inserted)
+
+    def undoStructure(self, target):
+        target.criteria.renameEntry(self.idx, "")
+
+    def redoStructure(self, target):
+        target.restoreCriterion(self.idx, self.name, self.col, None, None)
+
+
+class DeleteCriterion(Command):
+
+    def __init__(self, idx, name, col, values, spec):
+        super().__init__()
+        self.idx, self.name, self.col, self.values, self.spec = idx, name, col, values, spec
+
+    def size(self):
+        return super().size() + self.values.nbytes + 256
+
+    def touches(self):
+        cols = [self.col, *self.spec["influences"], *self.spec.get("receives", ())]
+        return super().touches() | {("criterion", self.name)} | {("col", c) for c in cols}
+
+    def moves(self):
+        return [("criteria", self.idx, None)]
+
+    def shift(self, tray, removed, inserted):
+        if tray == "criteria":
+            self.idx = shifted(self.idx, removed, inserted)
+
+    def undoStructure(self, target):
+        target.restoreCriterion(self.idx, self.name, self.col, self.values, self.spec)
+
+    def redoStructure(self, target):
+        target.criteria.renameEntry(self.idx, "")
+
+
+class ConfigureCriterion(Command):
+
+    def __init__(self, col, before):
+        super().__init__()
+        self.col, self.before, self.after = col, before, None
+
+    def touches(self):
+        cols = {self.col, *self.before["influences"], *(self.after or self.before)["influences"]}
+        return super().touches() | {("col", c) for c in cols}
+
+    def undoStructure(self, target):
+        target.configureCriterion(self.col, self.before)
+
+    def redoStructure(self, target):
+        target.configureCriterion(self.col, self.after)
+
+
+class ReplaceDecision(Command):
+    # the whole decision swapped at once, as (header, matrix) snapshots on both sides
+
+    def __init__(self, before):
+        super().__init__()
+        self.before, self.after = before, None
+
+    def size(self):
+        return super().size() + sum(s[1].nbytes for s in (self.before, self.after) if s is not None)
+
+    def touches(self):
+        return {EVERYTHING}
+
+    def undoStructure(self, target):
+        target.restoreDecision(self.before[0], self.before[1].copy())
+
+    def redoStructure(self, target):
+        target.restoreDecision(self.after[0], self.after[1].copy())
+
+
+class History:
+    # linear command log, trimmed from the oldest end to stay within budget bytes
+
+    def __init__(self, model, target, budget=16 * 1024 * 1024, gap=0.5):
+        self.model = model
+        self.target = target
+        self.budget = budget
+        self.gap = gap
+
+        self.undoStack = deque()
+        self.redoStack = []
+        self.used = 0
+        self.open = None
+        self.lastActivity = 0.0
+        self.replaying = False
+
+        model.watch(self)
+
+    def clear(self):
+        self.undoStack.clear()
+        self.redoStack = []
+        self.used = 0
+        self.open = None
+
+    def rebase(self, remote, exempt=()):
+        # remote holds the commands a change made elsewhere applied here. Entries that touch what
+        # it touched are dropped along with every entry that depends on them, the rest have
+        # their positions shifted past it.
+        touched = set().union(*(c.touches() for c in remote))
+        self.seal()
+        self.undoStack = deque(self.unaffected(list(self.undoStack), touched, exempt))
+        self.redoStack = self.unaffected(self.redoStack, touched, exempt)
+        for command in remote:
+            for tray, removed, inserted in command.moves():
+                for c in self.commands():
+                    if c not in exempt:
+                        c.shift(tray, removed, inserted)
+        self.used = sum(c.size() for c in self.commands())
+
+    def unaffected(self, stack, touched, exempt):
+        # the far end of each stack comes first, so everything before a conflict depends on it
+        for i in reversed(range(len(stack))):
+            if stack[i] in exempt:
+                continue
+            keys = stack[i].touches()
+            if EVERYTHING in touched or EVERYTHING in keys or not keys.isdisjoint(touched):
+                return stack[i + 1:]
+        return stack
+
+    def substitute(self, old, new):
+        # old was undone and applied again as new; without new it is gone, with what depends on it
+        self.seal()
+        for stack in (self.undoStack, self.redoStack):
+            items = list(stack)
+            if old in items:
+                i = items.index(old)
+                items = items[i + 1:] if new is None else items[:i] + [new] + items[i + 1:]
+                stack.clear()
+                stack.extend(items)
+        self.used = sum(c.size() for c in self.commands())
+
+    def commands(self):
+        return [*self.undoStack, *self.redoStack]
+
+    def push(self, command):
+        # a pushed command stays open, collecting value changes, until it is sealed
+        self.seal()
+        for c in self.redoStack:
+            self.used -= c.size()
+        self.redoStack = []
+        self.undoStack.append(command)
+        self.open = command
+        self.lastActivity = time.monotonic()
+        return command
+
+    def record(self, command):
+        if self.replaying:
+            return command
+        return self.push(command)
+
+    def seal(self):
+        if self.open is None:
+            return
+        self.open.compact()
+        self.used += self.open.size()
+        self.open = None
+        while self.used > self.budget and len(self.undoStack) > 1:
+            self.used -= self.undoStack.popleft().size()
+
+    def valuesChanged(self, rows, col, delta):
+        if self.replaying:
+            return
+        now = time.monotonic()
+        if self.open is None or (isinstance(self.open, ValueEdit) and now - self.lastActivity > self.gap):
+            self.push(ValueEdit())
+        self.lastActivity = now
+
+        after = self.model.values[rows, col]
+        self.open.addChanges(rows, col, after - delta, after)
+
+    def rowsAdded(self, rows):
+        pass
+
+    def rowRemoved(self, row):
+        pass
+
+    def structureChanged(self):
+        pass
+
+    def undo(self):
+        self.seal()
+        if not self.undoStack:
+            return False
+        command = self.undoStack.pop()
+        self.replay(command.undo)
+        self.redoStack.append(command)
+        return True
+
+    def redo(self):
+        self.seal()
+        if not self.redoStack:
+            return False
+        command = self.redoStack.pop()
+        self.replay(command.redo)
+        self.undoStack.append(command)
+        return True
+
+    def replay(self, step):
+        self.replaying = True
+        try:
+            step(self.target)
+        finally:
+            self.replaying = False
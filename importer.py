@@ -0,0 +1,142 @@
+import csv
+import json
+import math
+import os
+from array import array
+
+import numpy as np
+
+from normalize import CENTER_MODES, RANGE_MODES, INVERT_MODES
+from propagation import orderIndices
+
+
+class ImportBatch:
+
+    def __init__(self):
+        self.options = []
+        self.optionIndex = {}
+        self.criteria = []
+        self.criterionIndex = {}
+        self.influences = {}
+        self.modes = {}
+
+        self.rows = array("q")
+        self.cols = array("q")
+        self.vals = array("d")
+
+    def option(self, name):
+        if name not in self.optionIndex:
+            self.optionIndex[name] = len(self.options)
+            self.options.append(name)
+        return self.optionIndex[name]
+
+    def criterion(self, name):
+        if name not in self.criterionIndex:
+            self.criterionIndex[name] = len(self.criteria)
+            self.criteria.append(name)
+        return self.criterionIndex[name]
+
+    def add(self, record):
+        if not isinstance(record, dict):
+            raise ValueError(f"import record is not an object: {record!r}")
+        if "option" in record:
+            row = self.option(str(record["option"]))
+            scores = record.get("scores", {})
+            if not isinstance(scores, dict):
+                raise ValueError(f"scores of option {record['option']!r} are not an object")
+            for crit, value in scores.items():
+                if value is None or value == "":
+                    continue
+                try:
+                    value = float(value)
+                    if not math.isfinite(value):
+                        raise ValueError
+                except (TypeError, ValueError):
+                    raise ValueError(f"score {value!r} of {record['option']!r} for {crit!r} is not a number")
+                self.rows.append(row)
+                self.cols.append(self.criterion(str(crit)))
+                self.vals.append(value)
+        elif "criterion" in record:
+            name = str(record["criterion"])
+            self.criterion(name)
+            if "influences" in record:
+                if not isinstance(record["influences"], list):
+                    raise ValueError(f"influences of criterion {name!r} are not a list")
+                self.influences[name] = [str(i) for i in record["influences"]]
+                for i in self.influences[name]:
+                    self.criterion(i)
+            if "modes" in record:
+                if not isinstance(record["modes"], list):
+                    raise ValueError(f"modes of criterion {name!r} are not a list")
+                self.modes[name] = list(record["modes"])
+        else:
+            raise ValueError(f"import record has neither an option nor a criterion: {record!r}")
+
+    def matrix(self):
+        matrix = np.full((len(self.options), len(self.criteria)), np.nan)
+        matrix[np.frombuffer(self.rows, dtype=np.int64), np.frombuffer(self.cols, dtype=np.int64)] = np.frombuffer(self.vals)
+        return matrix
+
+
+def csvRecords(lines):
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    criteria = [h.strip() for h in header[1:]]
+    for row in reader:
+        if len(row) == 0 or row[0].strip() == "":
+            continue
+        if len(row) > len(header):
+            raise ValueError(f"line {reader.line_num} has {len(row)} cells, the header has {len(header)}")
+        yield {"option": row[0].strip(), "scores": dict(zip(criteria, (c.strip() for c in row[1:])))}
+
+
+def jsonlRecords(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def readRecords(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        parse = csvRecords
+    elif ext in (".jsonl", ".ndjson"):
+        parse = jsonlRecords
+    else:
+        raise ValueError(f"cannot import {path}: expected a .csv or .jsonl file")
+
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from parse(f)
+
+
+def collect(records):
+    batch = ImportBatch()
+    for record in records:
+        batch.add(record)
+    return batch
+
+
+def loadImport(path):
+    return collect(readRecords(path))
+
+
+def checkBatch(batch, graph=None):
+    # names, modes and the influence graph, merged over graph ({name: influence names}) when given
+    if not all(batch.options) or not all(batch.criteria):
+        raise ValueError("import has an option or criterion without a name")
+    for name, modes in batch.modes.items():
+        if len(modes) != 3 or modes[0] not in CENTER_MODES or modes[1] not in RANGE_MODES or modes[2] not in INVERT_MODES:
+            raise ValueError(f"unknown normalization modes {modes!r} for {name!r}")
+
+    graph = dict(graph or {})
+    for name in batch.criteria:
+        graph.setdefault(name, [])
+    for name, influences in batch.influences.items():
+        if name in influences:
+            raise ValueError(f"{name!r} cannot influence itself")
+        graph[name] = influences
+    index = {name: j for j, name in enumerate(graph)}
+    orderIndices([[index[i] for i in influences] for influences in graph.values()])
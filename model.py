@@ -0,0 +1,219 @@
+import numpy as np
+
+
+class DecisionModel:
+
+    def __init__(self, rows=8, cols=4):
+        self.values = np.zeros((rows, cols))
+
+        self.rowAlive = np.zeros(rows, dtype=bool)
+        self.rowNames = [None] * rows
+        self.rowIndex = {}
+
+        self.colAlive = np.zeros(cols, dtype=bool)
+        self.colNames = [None] * cols
+        self.colIndex = {}
+
+        self._rows = None
+        self._cols = None
+
+        self.watchers = []
+
+    def watch(self, watcher):
+        self.watchers.append(watcher)
+
+    def unwatch(self, watcher):
+        self.watchers.remove(watcher)
+
+    def growRows(self):
+        extra = max(8, len(self.rowAlive))
+        self.values = np.vstack([self.values, np.zeros((extra, self.values.shape[1]))])
+        self.rowAlive = np.concatenate([self.rowAlive, np.zeros(extra, dtype=bool)])
+        self.rowNames.extend([None] * extra)
+
+    def growCols(self):
+        extra = max(4, len(self.colAlive))
+        self.values = np.hstack([self.values, np.zeros((self.values.shape[0], extra))])
+        self.colAlive = np.concatenate([self.colAlive, np.zeros(extra, dtype=bool)])
+        self.colNames.extend([None] * extra)
+
+    def load(self, names, matrix):
+        rows, cols = matrix.shape
+        self.values = matrix
+        self.rowAlive = np.ones(rows, dtype=bool)
+        self.rowNames = list(names)
+        self.rowIndex = {n: r for r, n in enumerate(self.rowNames)}
+        self.colAlive = np.ones(cols, dtype=bool)
+        self.colNames = [""] * cols
+        self.colIndex = {}
+        self._rows = None
+        self._cols = None
+        for w in self.watchers:
+            w.structureChanged()
+        return list(range(cols))
+
+    def addOption(self, name, row=None, values=None):
+        # row and values let undo put an option back into the slot it came from
+        if name in self.rowIndex:
+            raise KeyError(f"option {name!r} already exists")
+        if row is None:
+            free = np.flatnonzero(~self.rowAlive)
+            if len(free) == 0:
+                self.growRows()
+                free = np.flatnonzero(~self.rowAlive)
+            row = int(free[0])
+        elif self.rowAlive[row]:
+            raise KeyError(f"row {row} is in use")
+        self.rowAlive[row] = True
+        self.rowNames[row] = name
+        self.rowIndex[name] = row
+        self.values[row, :] = 0
+        if values is not None:
+            self.values[row, :len(values)] = values
+        self._rows = None
+        for w in self.watchers:
+            w.rowsAdded(np.array([row]))
+        return row
+
+    def addOptions(self, names):
+        for name in names:
+            if name in self.rowIndex:
+                raise KeyError(f"option {name!r} already exists")
+        free = np.flatnonzero(~self.rowAlive)
+        while len(free) < len(names):
+            self.growRows()
+            free = np.flatnonzero(~self.rowAlive)
+        rows = free[:len(names)]
+        self.rowAlive[rows] = True
+        self.values[rows, :] = 0
+        for row, name in zip(rows.tolist(), names):
+            self.rowNames[row] = name
+            self.rowIndex[name] = row
+        self._rows = None
+        for w in self.watchers:
+            w.rowsAdded(rows)
+        return rows
+
+    def removeOption(self, name):
+        row = self.rowIndex.pop(name)
+        self.rowAlive[row] = False
+        self.rowNames[row] = None
+        self._rows = None
+        for w in self.watchers:
+            w.rowRemoved(row)
+        return row
+
+    def renameOption(self, old_name, new_name):
+        if new_name in self.rowIndex:
+            raise KeyError(f"option {new_name!r} already exists")
+        row = self.rowIndex.pop(old_name)
+        self.rowIndex[new_name] = row
+        self.rowNames[row] = new_name
+        return row
+
+    def addCriterion(self, name="", col=None, values=None):
+        if col is None:
+            free = np.flatnonzero(~self.colAlive)
+            if len(free) == 0:
+                self.growCols()
+                free = np.flatnonzero(~self.colAlive)
+            col = int(free[0])
+        elif self.colAlive[col]:
+            raise KeyError(f"column {col} is in use")
+        self.colAlive[col] = True
+        self.colNames[col] = ""
+        self.renameCriterion(col, name)
+        self.values[:, col] = 0
+        if values is not None:
+            self.values[:len(values), col] = values
+        self._cols = None
+        for w in self.watchers:
+            w.structureChanged()
+        return col
+
+    def removeCriterion(self, col):
+        self.renameCriterion(col, "")
+        self.colAlive[col] = False
+        self.colNames[col] = None
+        self._cols = None
+        for w in self.watchers:
+            w.structureChanged()
+
+    def renameCriterion(self, col, name):
+        if self.colIndex.get(self.colNames[col]) == col:
+            del self.colIndex[self.colNames[col]]
+        self.colNames[col] = name
+        # a duplicate name is only transient while the tray appends its marker
+        if name and name not in self.colIndex:
+            self.colIndex[name] = col
+
+    def rows(self):
+        if self._rows is None:
+            self._rows = np.flatnonzero(self.rowAlive)
+        return self._rows
+
+    def cols(self):
+        if self._cols is None:
+            self._cols = np.flatnonzero(self.colAlive)
+        return self._cols
+
+    def hasOption(self, name):
+        return name in self.rowIndex
+
+    def row(self, name):
+        return self.rowIndex[name]
+
+    def value(self, name, col):
+        return self.values[self.rowIndex[name], col]
+
+    def column(self, col):
+        return self.values[self.rows(), col]
+
+    def matrix(self):
+        return self.values[np.ix_(self.rows(), self.cols())]
+
+    def sumColumns(self, cols):
+        cols = list(cols)
+        if len(cols) == 0:
+            return np.zeros(len(self.rows()))
+        return self.values[np.ix_(self.rows(), cols)].sum(axis=1)
+
+    def getValues(self, col):
+        rows = self.rows()
+        return dict(zip((self.rowNames[r] for r in rows), self.values[rows, col].astype(int).tolist()))
+
+    def notifyValues(self, rows, col, old, new):
+        for w in self.watchers:
+            w.valuesChanged(rows, col, new - old)
+
+    def setValueAt(self, row, col, value):
+        old = self.values[row, col]
+        changed = old != value
+        self.values[row, col] = value
+        if changed and self.watchers:
+            self.notifyValues(np.array([row]), col, np.array([old]), np.array([value], dtype=float))
+        return changed
+
+    def setValues(self, col, update):
+        rows = np.fromiter((self.rowIndex[n] for n in update), dtype=int, count=len(update))
+        new = np.fromiter(update.values(), dtype=float, count=len(update))
+        old = self.values[rows, col]
+        changed = old != new
+        self.values[rows, col] = new
+        if changed.any() and self.watchers:
+            self.notifyValues(rows[changed], col, old[changed], new[changed])
+        return {n for n, c in zip(update, changed) if c}
+
+    def setRows(self, rows, col, values):
+        values = np.asarray(values, dtype=float)
+        old = self.values[rows, col]
+        changed = old != values
+        self.values[rows, col] = values
+        if changed.any() and self.watchers:
+            self.notifyValues(rows[changed], col, old[changed], values[changed])
+        return changed
+
+    def setColumn(self, col, column):
+        rows = self.rows()
+        changed = self.setRows(rows, col, column)
+        return {self.rowNames[r] for r in rows[changed]}
@@ -0,0 +1,107 @@
+from bisect import bisect_left, insort
+
+import numpy as np
+
+
+CENTER_MODES = ("manual", "lock", "zero", "mean", "range")
+RANGE_MODES = ("manual", "lock", "one", "stdev", "minmax", "possible")
+INVERT_MODES = ("default", "invert")
+
+
+class RunningStats:
+
+    def __init__(self):
+        self.values = np.zeros(0)
+        self.ordered = []
+        self.total = 0.0
+        self.squares = 0.0
+
+    def rebuild(self, values):
+        self.values = values.copy()
+        self.ordered = sorted(values.tolist())
+        self.total = float(values.sum())
+        self.squares = float((values * values).sum())
+
+    def update(self, values):
+        if len(values) != len(self.values):
+            self.rebuild(values)
+            return
+
+        changed = np.flatnonzero(values != self.values)
+        if len(changed) > len(values) // 4:
+            self.rebuild(values)
+            return
+
+        for i in changed.tolist():
+            old = float(self.values[i])
+            new = float(values[i])
+            del self.ordered[bisect_left(self.ordered, old)]
+            insort(self.ordered, new)
+            self.total += new - old
+            self.squares += new * new - old * old
+            self.values[i] = new
+
+    def mean(self):
+        return self.total / len(self.ordered) if self.ordered else 0.0
+
+    def stdev(self):
+        if not self.ordered:
+            return 0.0
+        mean = self.mean()
+        return max(0.0, self.squares / len(self.ordered) - mean * mean) ** 0.5
+
+    def min(self):
+        return self.ordered[0] if self.ordered else 0.0
+
+    def max(self):
+        return self.ordered[-1] if self.ordered else 0.0
+
+
+class Normalizer:
+
+    def __init__(self, center="zero", range="one", invert="default"):
+        self.center = center
+        self.range = range
+        self.invert = invert
+        self.stats = RunningStats()
+
+    def setModes(self, center, range, invert):
+        if center not in CENTER_MODES or range not in RANGE_MODES or invert not in INVERT_MODES:
+            raise ValueError(f"unknown normalization mode {(center, range, invert)}")
+        self.center = center
+        self.range = range
+        self.invert = invert
+
+    def bounds(self, rmin, rmax, unit, possible):
+        if self.center in ("manual", "lock"):
+            center = (rmin + rmax) / 2
+        elif self.center == "zero":
+            center = 0.0
+        elif self.center == "mean":
+            center = self.stats.mean()
+        else:
+            center = (self.stats.min() + self.stats.max()) / 2
+
+        if self.range in ("manual", "lock"):
+            half = (rmax - rmin) / 2
+        elif self.range == "one":
+            half = unit
+        elif self.range == "stdev":
+            half = self.stats.stdev()
+        elif self.range == "minmax":
+            half = max(self.stats.max() - center, center - self.stats.min())
+        else:
+            half = possible
+
+        if half <= 0:
+            half = unit
+        return center - half, center + half
+
+    def apply(self, sums, rmin, rmax, amin, amax, unit, possible):
+        self.stats.update(sums)
+        lo, hi = self.bounds(rmin, rmax, unit, possible)
+
+        scaled = (sums - lo) / (hi - lo)
+        if self.invert == "invert":
+            scaled = 1 - scaled
+        return scaled * (amax - amin) + amin, lo, hi
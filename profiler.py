@@ -0,0 +1,134 @@
+import functools
+import json
+import os
+import threading
+import time
+
+
+class Profiler:
+
+    def __init__(self):
+        self.enabled = True
+        self.origin = time.perf_counter()
+        self.depth = 0
+        self.maxDepth = 0
+        self.events = []
+        self.stats = {}
+        self.frame = {}
+        self.frameTotal = 0.0
+        self.cascades = []
+        self.patched = []
+
+    def wrap(self, name, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+
+            self.depth += 1
+            self.maxDepth = max(self.maxDepth, self.depth)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                self.depth -= 1
+                self.record(name, start, end)
+                if self.depth == 0:
+                    self.cascades.append((name, self.maxDepth, end - start))
+                    self.frameTotal += end - start
+                    self.maxDepth = 0
+        return timed
+
+    def record(self, name, start, end):
+        dur = end - start
+        stat = self.stats.setdefault(name, [0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += dur
+        stat[2] = max(stat[2], dur)
+        self.frame[name] = self.frame.get(name, 0.0) + dur
+        self.events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.origin) * 1e6,
+            "dur": dur * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"depth": self.depth}
+        })
+
+    def instrument(self, cls, names):
+        # patches the class so connections made afterwards go through the timer
+        for attr in names:
+            if attr in cls.__dict__:
+                fn = cls.__dict__[attr]
+                self.patched.append((cls, attr, fn))
+                setattr(cls, attr, self.wrap(f"{cls.__name__}.{attr}", fn))
+
+    def uninstall(self):
+        for cls, attr, fn in reversed(self.patched):
+            setattr(cls, attr, fn)
+        self.patched = []
+
+    def takeFrame(self):
+        # per-slot times are inclusive, the total only counts outermost calls
+        frame, total = self.frame, self.frameTotal
+        self.frame = {}
+        self.frameTotal = 0.0
+        return frame, total
+
+    def summary(self):
+        return sorted(((name, count, total, worst) for name, (count, total, worst) in self.stats.items()),
+                      key=lambda s: -s[2])
+
+    def cascadeSummary(self):
+        by_root = {}
+        for root, depth, dur in self.cascades:
+            entry = by_root.setdefault(root, [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] = max(entry[1], depth)
+            entry[2] += dur
+        return by_root
+
+    def writeTrace(self, path):
+        trace = {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "slots": {name: {"count": c, "total": t, "max": m} for name, c, t, m in self.summary()},
+                "cascades": {root: {"count": c, "maxDepth": d, "total": t} for root, (c, d, t) in self.cascadeSummary().items()}
+            }
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+
+
+HOT_SLOTS = {
+    "sliders": {
+        "MultiSlider": ["handleMoved", "flushValues", "valuesChanged", "setValues", "setColumn", "applyStructure",
+                        "mouseAt", "bringForward", "updateRange", "checkExpansion", "materialize", "release"],
+        "PaintedMultiSlider": ["valuesChanged", "applyStructure", "bringForward", "updateRange", "paintEvent",
+                               "mouseMoveEvent"]
+    },
+    "window": {
+        "DecisionWindow": ["optionsChanged", "newForward", "applyStructure", "criterionDeleted", "updateVisibleCriteria"],
+        "Criterion": ["valuesUpdated", "valuesEdited", "setValues", "recalc"],
+        "RankingPanel": ["refresh"]
+    },
+    "propagation": {"Propagator": ["propagate"]},
+    "scheduler": {"UpdateScheduler": ["flush"]},
+    "ranking": {"RankingEngine": ["valuesChanged", "rowsAdded", "rowRemoved", "structureChanged"]},
+    "reorderable": {"ReorderTray": ["refillGrid", "insertAt", "removeAt", "moveTo"]}
+}
+
+
+def install(slots=HOT_SLOTS):
+    # must run before any widgets are created, connections keep the method they were given
+    import importlib
+
+    profiler = Profiler()
+    for module, classes in slots.items():
+        mod = importlib.import_module(module)
+        for cls_name, names in classes.items():
+            profiler.instrument(getattr(mod, cls_name), names)
+    return profiler
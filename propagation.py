@@ -0,0 +1,176 @@
+class Reachability:
+    # transitive closure kept as one int bitset per node, in both directions
+
+    def __init__(self):
+        self.nodes = []
+        self.bits = {}
+        self.free = []
+        self.succ = {}
+        self.pred = {}
+        self.down = {}
+        self.up = {}
+
+    def add(self, node):
+        if node in self.bits:
+            return
+        idx = self.free.pop() if self.free else len(self.nodes)
+        if idx == len(self.nodes):
+            self.nodes.append(node)
+        else:
+            self.nodes[idx] = node
+        self.bits[node] = 1 << idx
+        self.succ[node] = set()
+        self.pred[node] = set()
+        self.down[node] = self.bits[node]
+        self.up[node] = self.bits[node]
+
+    def remove(self, node):
+        if node not in self.bits:
+            return
+        self.setInfluences(node, set())
+        for r in list(self.succ[node]):
+            self.setInfluences(r, self.pred[r] - {node})
+
+        idx = self.bits.pop(node).bit_length() - 1
+        self.nodes[idx] = None
+        self.free.append(idx)
+        for table in (self.succ, self.pred, self.down, self.up):
+            del table[node]
+
+    def decode(self, bits):
+        found = []
+        while bits:
+            low = bits & -bits
+            found.append(self.nodes[low.bit_length() - 1])
+            bits ^= low
+        return found
+
+    def reaches(self, source, target):
+        return source in self.down and target in self.bits and self.bits[target] & self.down[source] != 0
+
+    def wouldCycle(self, source, target):
+        return source is target or self.reaches(target, source)
+
+    def downstream(self, node):
+        return set(self.decode(self.down[node])) if node in self.down else {node}
+
+    def setInfluences(self, node, influences):
+        self.add(node)
+        for i in influences:
+            self.add(i)
+
+        added = influences - self.pred[node]
+        removed = self.pred[node] - influences
+        for i in added:
+            # incoming edges never change what node itself reaches, so this check is exact
+            if self.wouldCycle(i, node):
+                raise ValueError("influence graph contains a cycle")
+
+        if removed:
+            ancestors = 0
+            for i in removed:
+                ancestors |= self.up[i]
+            descendants = self.down[node]
+            for i in removed:
+                self.succ[i].discard(node)
+                self.pred[node].discard(i)
+            self.rebuild(self.decode(ancestors), self.down, self.succ, self.pred)
+            self.rebuild(self.decode(descendants), self.up, self.pred, self.succ)
+
+        for i in added:
+            self.succ[i].add(node)
+            self.pred[node].add(i)
+            for a in self.decode(self.up[i]):
+                self.down[a] |= self.down[node]
+            for d in self.decode(self.down[node]):
+                self.up[d] |= self.up[i]
+
+    def rebuild(self, nodes, table, edges, reverse):
+        # recompute closures of nodes whose edges are all settled first
+        affected = set(nodes)
+        waiting = {n: len(edges[n] & affected) for n in affected}
+        ready = [n for n in affected if waiting[n] == 0]
+        while ready:
+            node = ready.pop()
+            bits = self.bits[node]
+            for e in edges[node]:
+                bits |= table[e]
+            table[node] = bits
+            for r in reverse[node]:
+                if r in waiting:
+                    waiting[r] -= 1
+                    if waiting[r] == 0:
+                        ready.append(r)
+
+
+class Propagator:
+
+    def __init__(self):
+        self.running = False
+        self.recalcs = 0
+        self.reach = Reachability()
+
+    def downstream(self, sources):
+        bits = 0
+        for s in sources:
+            if s in self.reach.down:
+                bits |= self.reach.down[s] ^ self.reach.bits[s]
+        return set(self.reach.decode(bits))
+
+    def order(self, nodes):
+        indegree = {n: len(n.influences & nodes) for n in nodes}
+        ready = [n for n in nodes if indegree[n] == 0]
+        ordered = []
+        while ready:
+            node = ready.pop()
+            ordered.append(node)
+            for r in node.receives:
+                if r in indegree:
+                    indegree[r] -= 1
+                    if indegree[r] == 0:
+                        ready.append(r)
+        if len(ordered) != len(nodes):
+            raise ValueError("influence graph contains a cycle")
+        return ordered
+
+    def changed(self, *sources):
+        self.propagate(set(sources), set())
+
+    def recompute(self, node):
+        self.propagate({node}, {node})
+
+    def propagate(self, sources, forced):
+        if self.running:
+            return
+        self.running = True
+        try:
+            dirty = sources - forced
+            nodes = self.downstream(sources) | forced
+            for node in self.order(nodes):
+                if node in forced or node.influences & dirty:
+                    self.recalcs += 1
+                    if node.recalc():
+                        dirty.add(node)
+        finally:
+            self.running = False
+
+
+def orderIndices(influences):
+    receives = [[] for _ in influences]
+    indegree = [len(infl) for infl in influences]
+    for node, infl in enumerate(influences):
+        for i in infl:
+            receives[i].append(node)
+
+    ready = [n for n in range(len(influences)) if indegree[n] == 0]
+    ordered = []
+    while ready:
+        node = ready.pop()
+        ordered.append(node)
+        for r in receives[node]:
+            indegree[r] -= 1
+            if indegree[r] == 0:
+                ready.append(r)
+    if len(ordered) != len(influences):
+        raise ValueError("influence graph contains a cycle")
+    return ordered
@@ -0,0 +1,90 @@
+import numpy as np
+
+from handleindex import HandleIndex
+
+
+class RankingEngine:
+
+    def __init__(self, model):
+        self.model = model
+        self.weights = {}
+        self.excluded = set()
+
+        self.totals = np.zeros(0)
+        self.index = HandleIndex()
+        self.watchers = []
+
+        self.rebuild()
+        model.watch(self)
+
+    def watch(self, watcher):
+        # watchers get rankingChanged() after any change that can reorder the totals
+        self.watchers.append(watcher)
+
+    def notify(self):
+        for w in self.watchers:
+            w.rankingChanged()
+
+    def weight(self, col):
+        if col in self.excluded:
+            return 0.0
+        return self.weights.get(col, 1.0)
+
+    def setWeight(self, col, weight):
+        if weight != self.weights.get(col, 1.0):
+            self.weights[col] = weight
+            self.rebuild()
+
+    def setIncluded(self, col, included):
+        if included == (col in self.excluded):
+            if included:
+                self.excluded.discard(col)
+            else:
+                self.excluded.add(col)
+            self.rebuild()
+
+    def isIncluded(self, col):
+        return col not in self.excluded
+
+    def rebuild(self):
+        rows = self.model.rows()
+        cols = self.model.cols()
+        weights = np.array([self.weight(c) for c in cols.tolist()])
+
+        self.totals = np.zeros(len(self.model.rowAlive))
+        if len(cols) > 0:
+            self.totals[rows] = self.model.values[np.ix_(rows, cols)] @ weights
+
+        self.index = HandleIndex()
+        self.index.addMany(list(zip(rows.tolist(), self.totals[rows].tolist())))
+        self.notify()
+
+    def structureChanged(self):
+        self.weights = {c: w for c, w in self.weights.items() if self.model.colAlive[c]}
+        self.excluded = {c for c in self.excluded if self.model.colAlive[c]}
+        self.rebuild()
+
+    def rowsAdded(self, rows):
+        if len(self.totals) < len(self.model.rowAlive):
+            self.totals = np.concatenate([self.totals, np.zeros(len(self.model.rowAlive) - len(self.totals))])
+        cols = self.model.cols()
+        weights = np.array([self.weight(c) for c in cols.tolist()])
+        self.totals[rows] = self.model.values[np.ix_(rows, cols)] @ weights if len(cols) > 0 else 0
+        self.index.addMany(list(zip(rows.tolist(), self.totals[rows].tolist())))
+        self.notify()
+
+    def rowRemoved(self, row):
+        self.index.remove(row)
+        self.notify()
+
+    def valuesChanged(self, rows, col, delta):
+        weight = self.weight(col)
+        if weight == 0:
+            return
+        self.totals[rows] += weight * delta
+        # a whole-column update re-sorts once instead of moving every row
+        self.index.moveMany(zip(rows.tolist(), self.totals[rows].tolist()))
+        self.notify()
+
+    def top(self, k):
+        return [(self.model.rowNames[row], total) for total, seq, row in reversed(self.index.entries[-k:])] if k > 0 else []
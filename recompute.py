@@ -0,0 +1,111 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+from evaluate import cascade
+from propagation import Propagator
+
+
+class RecomputeJob(QRunnable):
+
+    def __init__(self, owner, version, values, criteria, sources):
+        super().__init__()
+        self.owner = owner
+        self.version = version
+        self.values = values
+        self.criteria = criteria
+        self.sources = sources
+
+    def run(self):
+        try:
+            result = cascade(self.values, self.criteria, self.sources)
+        except Exception as e:
+            result = e
+        # queued back to the GUI thread, the owner lives there
+        self.owner.done.emit(self.version, result)
+
+
+class AsyncPropagator(QObject, Propagator):
+    # value edits recompute off the GUI thread, explicit recomputes stay synchronous.
+    # Any change to the model outdates the job in flight, its result is dropped and redone.
+
+    done = pyqtSignal(int, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, model, inputs, apply):
+        super().__init__()
+
+        self.inputs = inputs
+        self.apply = apply
+        self.version = 0
+        self.pending = set()
+        self.inflight = None
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.done.connect(self.finished)
+        model.watch(self)
+
+    def valuesChanged(self, rows, col, delta):
+        # results being applied are the only change that leaves them current
+        if not self.running:
+            self.version += 1
+
+    def rowsAdded(self, rows):
+        self.version += 1
+
+    def rowRemoved(self, row):
+        self.version += 1
+
+    def structureChanged(self):
+        self.version += 1
+
+    def changed(self, *sources):
+        if self.running:
+            return
+        self.pending.update(sources)
+        self.version += 1
+        if self.inflight is None:
+            self.start()
+
+    def propagate(self, sources, forced):
+        # anything in flight was computed from older inputs
+        self.version += 1
+        super().propagate(sources, forced)
+
+    def start(self):
+        # the job only needs what it recomputes and what feeds those directly
+        dirty = self.downstream(self.pending)
+        nodes, rows, values, criteria = self.inputs(self.pending | dirty | {i for n in dirty for i in n.influences})
+        index = {n: j for j, n in enumerate(nodes)}
+        sources = [index[s] for s in self.pending if s in index]
+        self.inflight = (self.pending, nodes, rows)
+        self.pending = set()
+        self.pool.start(RecomputeJob(self, self.version, values, criteria, sources))
+
+    @pyqtSlot(int, object)
+    def finished(self, version, result):
+        sources, nodes, rows = self.inflight
+        self.inflight = None
+        if isinstance(result, Exception):
+            self.failed.emit(str(result))
+            # recomputed here instead, where an error reaches the handler that caused it
+            self.propagate(sources, set())
+            if self.pending:
+                self.start()
+            return
+
+        applied = False
+        if version == self.version:
+            self.running = True
+            try:
+                applied = self.apply(nodes, rows, result)
+            finally:
+                self.running = False
+            self.recalcs += len(result)
+
+        if not applied:
+            self.pending |= sources
+        if self.pending:
+            self.start()
+
+    def shutdown(self):
+        self.pool.clear()
+        self.pool.waitForDone()
@@ -1,9 +1,12 @@
-from PyQt6.QtWidgets import QGridLayout, QVBoxLayout, QHBoxLayout, QGroupBox, QWidget, QPushButton, QLineEdit, QSpacerItem, QSizePolicy, QLayout
+from collections import Counter
+
+from PyQt6.QtWidgets import QGridLayout, QVBoxLayout, QHBoxLayout, QGroupBox, QWidget, QPushButton, QLineEdit, QSpacerItem, QSizePolicy, QLayout, QScrollBar
 from PyQt6.QtCore import pyqtSignal, pyqtSlot, Qt
 
 class ReorderTray(QGroupBox):
 
-    entryChanged = pyqtSignal(str, str)
+    entryChanged = pyqtSignal(int, str, str)
+    entryMoved = pyqtSignal(int, int)
     insideDeleted = pyqtSignal(QWidget)
 
     def __init__(self, maxcols, horizpanel, generator, title):
@@ -19,7 +22,9 @@ class ReorderTray(QGroupBox):
         self.creator.editingFinished.connect(self.createNew)
 
         self.reorderables = []
+        self.nameCounts = Counter()
         self.source = -1
+        self.stretched = (0, 0)
 
         self.refillGrid()
 
@@ -35,36 +40,81 @@ class ReorderTray(QGroupBox):
     def getItems(self):
         return [self.reorderables[i].inside for i in range(len(self.reorderables))]
         
+    def setNames(self, names):
+        for r in self.reorderables:
+            self.grid.removeWidget(r)
+            r.selected.disconnect(self.buttonSelected)
+            r.nameChanged.disconnect(self.nameChanged)
+            r.deleteLater()
+
+        self.reorderables = []
+        self.nameCounts = Counter(names)
+        for name in names:
+            r = self.blankPanel()
+            r.entryName = name
+            r.nameEdit.setText(name)
+            self.reorderables.append(r)
+        self.source = -1
+        self.refillGrid()
+
+    def appendNames(self, names):
+        # bulk insertEntry at the end for names the caller has checked, without an entryChanged each
+        start = len(self.reorderables)
+        for name in names:
+            r = self.blankPanel()
+            r.entryName = name
+            r.nameEdit.setText(name)
+            self.reorderables.append(r)
+        self.nameCounts.update(names)
+        self.placeRange(start, len(self.reorderables))
+        self.placeCreator()
+
     def insertAt(self, reorderable, idx):
         self.reorderables.insert(idx, reorderable)
-        self.refillGrid()
+        self.placeRange(idx, len(self.reorderables))
+        self.placeCreator()
 
     def removeAt(self, idx):
         r = self.reorderables.pop(idx)
-        self.refillGrid()
+        self.grid.removeWidget(r)
+        self.placeRange(idx, len(self.reorderables))
+        self.placeCreator()
         return r
 
+    def moveTo(self, source, dest):
+        self.reorderables.insert(dest, self.reorderables.pop(source))
+        self.placeRange(min(source, dest), max(source, dest) + 1)
+
     def refillGrid(self):
         while self.grid.takeAt(0):
             pass
 
-        for i, r in enumerate(self.reorderables):
+        self.placeRange(0, len(self.reorderables))
+        self.placeCreator()
+
+    def placeRange(self, start, end):
+        for i in range(start, end):
+            r = self.reorderables[i]
             coords = self.idxToCoords(i)
+            self.grid.removeWidget(r)
             self.grid.addWidget(r, coords[0], coords[1], alignment=Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
             r.idx = i
 
+    def placeCreator(self):
         lastcoord = self.idxToCoords(len(self.reorderables))
+        self.grid.removeWidget(self.creator)
         self.grid.addWidget(self.creator, lastcoord[0], lastcoord[1])
+        self.updateStretch(lastcoord[0] + 1, lastcoord[1] + 1 if lastcoord[0] == 0 else self.maxcols)
 
-        cols = self.grid.columnCount()
-        for i in range(cols):
-            self.grid.setColumnStretch(i, 0)
-        self.grid.setColumnStretch(cols, 1)
-        
-        rows = self.grid.rowCount()
-        for i in range(rows):
-            self.grid.setRowStretch(i, 0)
-        self.grid.setRowStretch(rows, 1)
+    def updateStretch(self, rows, cols):
+        old_rows, old_cols = self.stretched
+        if cols != old_cols:
+            self.grid.setColumnStretch(old_cols, 0)
+            self.grid.setColumnStretch(cols, 1)
+        if rows != old_rows:
+            self.grid.setRowStretch(old_rows, 0)
+            self.grid.setRowStretch(rows, 1)
+        self.stretched = (rows, cols)
         
 
     @pyqtSlot()
@@ -72,18 +122,31 @@ class ReorderTray(QGroupBox):
         if self.creator.text() == "":
             return
         
-        new_blank = self.blankPanel()
-        self.insertAt(new_blank, len(self.reorderables))
-        new_blank.setName(self.creator.text())
+        self.insertEntry(len(self.reorderables), self.creator.text())
         self.creator.setText("")
+
+    def insertEntry(self, idx, name):
+        new_blank = self.blankPanel()
+        self.insertAt(new_blank, idx)
+        new_blank.setName(name)
+
+    def renameEntry(self, idx, name):
+        self.reorderables[idx].setName(name)
         
+    def countRename(self, oldname, newname):
+        if oldname:
+            self.nameCounts[oldname] -= 1
+            if self.nameCounts[oldname] == 0:
+                del self.nameCounts[oldname]
+        if newname:
+            self.nameCounts[newname] += 1
+
     @pyqtSlot(int, str, str)
     def nameChanged(self, idx, oldname, newname):
-        samename = [name for i, name in enumerate(self.getNames()) if i != idx and name == newname]
-
-        if len(samename) > 0:
+        if newname and self.nameCounts[newname] > 0:
             self.reorderables[idx].setName(newname + "*")
             return
+        self.countRename(oldname, newname)
 
         if newname == "":
             r = self.removeAt(idx) 
@@ -93,7 +156,7 @@ class ReorderTray(QGroupBox):
                 self.insideDeleted.emit(r.inside)
             r.deleteLater()
             
-        self.entryChanged.emit(oldname, newname)
+        self.entryChanged.emit(idx, oldname, newname)
             
     
     @pyqtSlot(int)
@@ -101,8 +164,8 @@ class ReorderTray(QGroupBox):
         isDest = self.source >= 0
 
         if isDest:
-            wid = self.removeAt(self.source)
-            self.insertAt(wid, idx if idx <= self.source else idx)
+            self.moveTo(self.source, idx)
+            self.entryMoved.emit(self.source, idx)
             self.source = -1
         else:
             self.source = idx
@@ -173,3 +236,153 @@ class Reorderable(QWidget):
                 self.controlButton.setText("○")
         else:
             self.controlButton.setText("●")
+
+
+class VirtualReorderTray(ReorderTray):
+
+    def __init__(self, maxcols, horizpanel, title):
+        super().__init__(maxcols, horizpanel, None, title)
+
+        self.names = []
+        self.pool = []
+        self.offset = 0
+        self.visibleRows = 0
+        self.wheelRemainder = 0
+
+        self.scrollbar = QScrollBar(Qt.Orientation.Vertical)
+        self.scrollbar.valueChanged.connect(self.scrolled)
+
+        self.grid.removeWidget(self.creator)
+        self.setVisibleRows(1)
+
+    def columns(self):
+        return max(1, self.maxcols)
+
+    def setVisibleRows(self, rows):
+        if rows == self.visibleRows:
+            return
+        self.visibleRows = rows
+
+        while len(self.pool) < rows * self.columns():
+            self.pool.append(self.blankPanel())
+        while len(self.pool) > rows * self.columns():
+            r = self.pool.pop()
+            r.selected.disconnect(self.buttonSelected)
+            r.nameChanged.disconnect(self.nameChanged)
+            r.deleteLater()
+
+        while self.grid.takeAt(0):
+            pass
+        for i, r in enumerate(self.pool):
+            self.grid.addWidget(r, i // self.columns(), i % self.columns(), alignment=Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        self.grid.addWidget(self.scrollbar, 0, self.columns(), rows, 1)
+        self.grid.addWidget(self.creator, rows, 0, 1, self.columns())
+        self.updateStretch(rows + 1, self.columns() + 1)
+
+        self.rebind()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        rowHeight = self.pool[0].sizeHint().height() + self.grid.verticalSpacing()
+        free = self.contentsRect().height() - self.creator.sizeHint().height() - self.grid.verticalSpacing()
+        self.setVisibleRows(max(1, free // rowHeight))
+
+    def wheelEvent(self, event):
+        # touchpads send fractions of a notch, they add up until a whole row is scrolled
+        self.wheelRemainder += event.angleDelta().y()
+        rows = int(self.wheelRemainder / 120)
+        self.wheelRemainder -= rows * 120
+        self.scrollbar.setValue(self.scrollbar.value() - rows)
+
+    @pyqtSlot(int)
+    def scrolled(self, row):
+        self.offset = row
+        self.rebind()
+
+    def rebind(self):
+        totalRows = (len(self.names) + self.columns() - 1) // self.columns()
+        self.scrollbar.setMaximum(max(0, totalRows - self.visibleRows))
+        self.scrollbar.setPageStep(self.visibleRows)
+
+        first = self.offset * self.columns()
+        for i, r in enumerate(self.pool):
+            idx = first + i
+            if idx < len(self.names):
+                r.idx = idx
+                r.entryName = self.names[idx]
+                r.nameEdit.setText(self.names[idx])
+                r.setState(self.source < 0, self.source)
+                r.show()
+            else:
+                r.idx = -1
+                r.hide()
+
+    def getNames(self):
+        return list(self.names)
+
+    def setNames(self, names):
+        self.names = list(names)
+        self.nameCounts = Counter(names)
+        self.source = -1
+        self.scrollbar.setValue(0)
+        self.rebind()
+
+    def getItems(self):
+        return [None] * len(self.names)
+
+    def appendNames(self, names):
+        self.names.extend(names)
+        self.nameCounts.update(names)
+        self.rebind()
+
+    def scrollTo(self, idx):
+        row = idx // self.columns()
+        if row < self.offset:
+            self.scrollbar.setValue(row)
+        elif row >= self.offset + self.visibleRows:
+            self.scrollbar.setValue(row - self.visibleRows + 1)
+
+    @pyqtSlot()
+    def createNew(self):
+        if self.creator.text() == "":
+            return
+
+        self.insertEntry(len(self.names), self.creator.text())
+        self.creator.setText("")
+
+    def insertEntry(self, idx, name):
+        self.names.insert(idx, "")
+        self.nameChanged(idx, "", name)
+        self.scrollTo(idx)
+
+    def renameEntry(self, idx, name):
+        self.nameChanged(idx, self.names[idx], name)
+
+    def moveTo(self, source, dest):
+        self.names.insert(dest, self.names.pop(source))
+        self.rebind()
+
+    @pyqtSlot(int, str, str)
+    def nameChanged(self, idx, oldname, newname):
+        if newname and self.nameCounts[newname] > 0:
+            self.nameChanged(idx, oldname, newname + "*")
+            return
+        self.countRename(oldname, newname)
+
+        if newname == "":
+            self.names.pop(idx)
+        else:
+            self.names[idx] = newname
+        self.rebind()
+
+        self.entryChanged.emit(idx, oldname, newname)
+
+    @pyqtSlot(int)
+    def buttonSelected(self, idx):
+        if self.source >= 0:
+            self.moveTo(self.source, idx)
+            self.entryMoved.emit(self.source, idx)
+            self.source = -1
+        else:
+            self.source = idx
+            self.rebind()
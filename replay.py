@@ -0,0 +1,310 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from PyQt6.QtCore import QObject, QEvent, QPoint, QPointF, QTimer, Qt, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QMouseEvent, QWheelEvent, QKeyEvent, QWindow
+from PyQt6.QtWidgets import QApplication
+
+
+# A trace is JSON lines: a header object, then one array per input event
+#   [ms, "p" | "r" | "d" | "m", window, x, y, button, buttons, modifiers]     mouse press/release/double/move
+#   [ms, "w", window, x, y, buttons, modifiers, dx, dy]                       wheel
+#   [ms, "k" | "u", window, key, modifiers, text, autorepeat]                 key press/release
+#   [ms, "s", window, width, height]                                          resize
+#   [ms, "f", window]                                                         window activated
+#   [ms, "e", 0, command]                                                     structural edit, checked on replay
+# and {"window": id, "class": ..., "title": ...} the first time a top-level window is seen.
+
+MOUSE = {
+    QEvent.Type.MouseButtonPress: "p",
+    QEvent.Type.MouseButtonRelease: "r",
+    QEvent.Type.MouseButtonDblClick: "d",
+    QEvent.Type.MouseMove: "m"
+}
+KEYS = {QEvent.Type.KeyPress: "k", QEvent.Type.KeyRelease: "u"}
+NAMES = {"p": "press", "r": "release", "d": "double", "m": "move", "w": "wheel", "k": "key", "u": "keyup", "s": "resize",
+         "f": "focus"}
+
+
+class Recorder(QObject):
+    # installed on the application, sees input as the platform hands it to each window
+
+    def __init__(self, window, session=None, threaded=False, painted=False, virtual=False):
+        super().__init__()
+        self.header = {"trace": 1, "session": session, "threaded": threaded, "painted": painted, "virtual": virtual,
+                       "size": [window.width(), window.height()]}
+        self.origin = time.perf_counter()
+        self.windows = {}
+        self.entries = []
+        window.edited.connect(self.edited)
+
+    def now(self):
+        return round((time.perf_counter() - self.origin) * 1000, 1)
+
+    def windowId(self, handle):
+        widget = next((w for w in QApplication.topLevelWidgets() if w.windowHandle() is handle), None)
+        if widget is None:
+            return None
+        if widget not in self.windows:
+            self.windows[widget] = len(self.windows) + 1
+            self.entries.append({"window": self.windows[widget], "class": type(widget).__name__,
+                                 "title": widget.windowTitle()})
+        return self.windows[widget]
+
+    def eventFilter(self, source, event):
+        kind = event.type()
+        if isinstance(source, QWindow) and (kind in MOUSE or kind in KEYS or kind in (QEvent.Type.Wheel,
+                                            QEvent.Type.Resize, QEvent.Type.FocusIn)):
+            win = self.windowId(source)
+            if win is not None:
+                self.entries.append(self.encode(win, event))
+        return super().eventFilter(source, event)
+
+    def encode(self, win, event):
+        kind = event.type()
+        if kind in MOUSE:
+            pos = event.position()
+            return [self.now(), MOUSE[kind], win, round(pos.x(), 2), round(pos.y(), 2), event.button().value,
+                    event.buttons().value, event.modifiers().value]
+        if kind == QEvent.Type.Wheel:
+            pos, delta = event.position(), event.angleDelta()
+            return [self.now(), "w", win, round(pos.x(), 2), round(pos.y(), 2), event.buttons().value,
+                    event.modifiers().value, delta.x(), delta.y()]
+        if kind in KEYS:
+            return [self.now(), KEYS[kind], win, event.key(), event.modifiers().value, event.text(),
+                    event.isAutoRepeat()]
+        if kind == QEvent.Type.FocusIn:
+            # which window keys go to, a dialog raised over the main window takes them
+            return [self.now(), "f", win]
+        return [self.now(), "s", win, event.size().width(), event.size().height()]
+
+    @pyqtSlot(object)
+    def edited(self, command):
+        self.entries.append([self.now(), "e", 0, type(command).__name__])
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.header) + "\n")
+            for entry in self.entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def readTrace(path):
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        entries = [json.loads(line) for line in f if line.strip()]
+    windows = {e["window"]: (e["class"], e["title"]) for e in entries if isinstance(e, dict)}
+    return header, windows, [e for e in entries if isinstance(e, list)]
+
+
+class Replayer(QObject):
+    # sends each recorded event to its window and times it until the event queue is drained.
+    # Steps run from zero timers so a modal dialog's own loop keeps the replay going.
+
+    finished = pyqtSignal()
+
+    def __init__(self, window, windows, entries, profiler=None):
+        super().__init__()
+        self.window = window
+        self.windows = windows
+        self.entries = [e for e in entries if e[1] != "e"]
+        self.expected = [e[3] for e in entries if e[1] == "e"]
+        self.profiler = profiler
+        self.position = 0
+        self.sending = []
+        self.modal = set()
+        self.latencies = []
+        self.edits = []
+        self.missing = 0
+        window.edited.connect(lambda command: self.edits.append(type(command).__name__))
+
+    def start(self):
+        QTimer.singleShot(0, self.step)
+
+    def target(self, win):
+        cls, title = self.windows[win]
+        candidates = [w for w in QApplication.topLevelWidgets() if type(w).__name__ == cls and w.isVisible()]
+        for w in candidates:
+            if w.windowTitle() == title:
+                return w
+        # titles of the main window and dialogs can change during a session
+        return candidates[-1] if len(candidates) == 1 else QApplication.activeModalWidget()
+
+    @pyqtSlot()
+    def step(self):
+        if self.position >= len(self.entries):
+            self.finished.emit()
+            return
+        index = self.position
+        self.position += 1
+        entry = self.entries[index]
+        widget = self.target(entry[2])
+        if widget is None or widget.windowHandle() is None:
+            self.missing += 1
+            QTimer.singleShot(0, self.step)
+            return
+
+        if self.profiler is not None:
+            self.profiler.takeFrame()
+        self.sending.append(index)
+        QTimer.singleShot(0, self.nested)
+        start = time.perf_counter()
+        self.deliver(widget, entry)
+        self.sending.pop()
+        if index in self.modal:
+            # the event ran a dialog's loop and the replay continued inside it
+            return
+        QApplication.processEvents()
+        # updates the event coalesced into the next frame are part of its cost
+        self.window.scheduler.flush()
+        elapsed = time.perf_counter() - start
+        frame = self.profiler.takeFrame()[0] if self.profiler is not None else {}
+        self.latencies.append((index, entry[1], elapsed, frame))
+        QTimer.singleShot(0, self.step)
+
+    @pyqtSlot()
+    def nested(self):
+        # only fires while an event is still being sent when that event opened a modal loop
+        if self.sending and self.sending[-1] not in self.modal:
+            self.modal.add(self.sending[-1])
+            self.step()
+
+    def deliver(self, widget, entry):
+        handle = widget.windowHandle()
+        code = entry[1]
+        if code == "s":
+            widget.resize(entry[3], entry[4])
+            return
+        if code == "f":
+            widget.activateWindow()
+            handle.requestActivate()
+            return
+        if code in ("k", "u"):
+            kind = QEvent.Type.KeyPress if code == "k" else QEvent.Type.KeyRelease
+            event = QKeyEvent(kind, entry[3], Qt.KeyboardModifier(entry[4]), entry[5], entry[6])
+            QApplication.sendEvent(handle, event)
+            return
+
+        pos = QPointF(entry[3], entry[4])
+        scene = QPointF(widget.mapToGlobal(pos))
+        if code == "w":
+            event = QWheelEvent(pos, scene, QPoint(), QPoint(entry[7], entry[8]), Qt.MouseButton(entry[5]),
+                                Qt.KeyboardModifier(entry[6]), Qt.ScrollPhase.NoScrollPhase, False)
+        else:
+            kind = {v: k for k, v in MOUSE.items()}[code]
+            event = QMouseEvent(kind, pos, scene, Qt.MouseButton(entry[5]), Qt.MouseButton(entry[6]),
+                                Qt.KeyboardModifier(entry[7]))
+        QApplication.sendEvent(handle, event)
+
+    def divergence(self):
+        for i, (a, b) in enumerate(zip(self.expected, self.edits)):
+            if a != b:
+                return i
+        return None if len(self.expected) == len(self.edits) else min(len(self.expected), len(self.edits))
+
+
+def percentiles(times):
+    p50, p90, p99 = np.percentile(times, [50, 90, 99]) * 1000
+    return {"count": len(times), "p50": p50, "p90": p90, "p99": p99, "max": max(times) * 1000,
+            "total": sum(times) * 1000}
+
+
+def report(replayer, profiler, slowest):
+    by_kind = {}
+    for index, code, elapsed, frame in replayer.latencies:
+        by_kind.setdefault(NAMES[code], []).append(elapsed)
+    worst = sorted(replayer.latencies, key=lambda l: -l[2])[:slowest]
+    result = {
+        "events": len(replayer.entries),
+        "timed": len(replayer.latencies),
+        "modal": len(replayer.modal),
+        "missing": replayer.missing,
+        "edits": {"recorded": len(replayer.expected), "replayed": len(replayer.edits),
+                  "diverged": replayer.divergence()},
+        "latency": dict({kind: percentiles(times) for kind, times in sorted(by_kind.items())},
+                        all=percentiles([l[2] for l in replayer.latencies]) if replayer.latencies else None),
+        "slowest": [{
+            "event": index,
+            "kind": NAMES[code],
+            "ms": elapsed * 1000,
+            "handlers": {name: t * 1000 for name, t in sorted(frame.items(), key=lambda f: -f[1])[:3]}
+        } for index, code, elapsed, frame in worst]
+    }
+    if profiler is not None:
+        result["handlers"] = [{"name": name, "count": count, "total": total * 1000, "max": most * 1000}
+                              for name, count, total, most in profiler.summary()[:slowest]]
+    return result
+
+
+def printReport(result):
+    print(f"{result['timed']} of {result['events']} events timed, {result['modal']} ran a dialog, "
+          f"{result['missing']} had no window", file=sys.stderr)
+    edits = result["edits"]
+    if edits["diverged"] is not None:
+        print(f"replay diverged at edit {edits['diverged']} ({edits['replayed']} of {edits['recorded']} edits)",
+              file=sys.stderr)
+    for kind, stats in result["latency"].items():
+        if stats is not None:
+            print(f"{kind:<8} {stats['count']:7d}x  p50 {stats['p50']:8.3f}  p90 {stats['p90']:8.3f}  "
+                  f"p99 {stats['p99']:8.3f}  max {stats['max']:8.3f} ms", file=sys.stderr)
+    for entry in result.get("handlers", []):
+        print(f"{entry['total']:10.2f} ms {entry['count']:8d}x {entry['max']:8.2f} ms max  {entry['name']}",
+              file=sys.stderr)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="replay.py")
+    parser.add_argument("trace", help="trace written by main.py --record")
+    parser.add_argument("--out", metavar="FILE", help="write the report as JSON to FILE instead of stdout")
+    parser.add_argument("--slowest", type=int, default=10, help="how many of the slowest events and handlers to report")
+    parser.add_argument("--no-profile", dest="profile", action="store_false", help="skip timing individual handlers")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    header, windows, entries = readTrace(args.trace)
+
+    profiler = None
+    if args.profile:
+        from profiler import install
+        profiler = install()
+        profiler.enabled = False
+
+    from window import DecisionWindow
+
+    app = QApplication(sys.argv[:1])
+    # the same widget tree as when recording, traces from before painted/virtual were recorded used neither
+    window = DecisionWindow(painted=header.get("painted", False), virtual=header.get("virtual", False),
+                            threaded=header["threaded"])
+    window.resize(*header["size"])
+    window.show()
+    if header["session"]:
+        window.loadSession(header["session"])
+    window.activateWindow()
+    for _ in range(5):
+        app.processEvents()
+
+    replayer = Replayer(window, windows, entries, profiler)
+    replayer.finished.connect(app.quit)
+    if profiler is not None:
+        profiler.enabled = True
+    replayer.start()
+    app.exec()
+
+    result = report(replayer, profiler, args.slowest)
+    printReport(result)
+    text = json.dumps(result, indent=1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if result["edits"]["diverged"] is not None else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,45 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+
+
+class UpdateScheduler(QObject):
+
+    flushed = pyqtSignal()
+
+    def __init__(self, budget=16):
+        super().__init__()
+
+        self.pending = {}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+        self.setBudget(budget)
+
+    def setBudget(self, budget):
+        # None disables coalescing and runs every callback immediately
+        self.budget = budget
+        if budget is not None:
+            self.timer.setInterval(budget)
+        elif self.pending:
+            self.flush()
+
+    def schedule(self, callback, items):
+        if self.budget is None:
+            callback(set(items))
+            self.flushed.emit()
+            return
+
+        self.pending.setdefault(callback, set()).update(items)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def cancel(self, callback):
+        self.pending.pop(callback, None)
+
+    @pyqtSlot()
+    def flush(self):
+        self.timer.stop()
+        pending = self.pending
+        self.pending = {}
+        for callback, items in pending.items():
+            callback(items)
+        self.flushed.emit()
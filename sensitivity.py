@@ -0,0 +1,98 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from evaluate import propagate, totals, ranks
+
+
+class RankStats:
+
+    def __init__(self, n, k=3):
+        self.k = k
+        self.trials = 0
+        self.rankSum = np.zeros(n)
+        self.rankSquares = np.zeros(n)
+        self.wins = np.zeros(n, dtype=int)
+        self.top = np.zeros(n, dtype=int)
+        self.best = np.full(n, n, dtype=int)
+        self.worst = np.zeros(n, dtype=int)
+
+    def add(self, trial_ranks):
+        self.trials += len(trial_ranks)
+        self.rankSum += trial_ranks.sum(axis=0)
+        self.rankSquares += (trial_ranks.astype(float) ** 2).sum(axis=0)
+        self.wins += (trial_ranks == 0).sum(axis=0)
+        self.top += (trial_ranks < self.k).sum(axis=0)
+        self.best = np.minimum(self.best, trial_ranks.min(axis=0))
+        self.worst = np.maximum(self.worst, trial_ranks.max(axis=0))
+
+    def merge(self, other):
+        self.trials += other.trials
+        self.rankSum += other.rankSum
+        self.rankSquares += other.rankSquares
+        self.wins += other.wins
+        self.top += other.top
+        self.best = np.minimum(self.best, other.best)
+        self.worst = np.maximum(self.worst, other.worst)
+        return self
+
+    def report(self, names):
+        trials = max(1, self.trials)
+        mean = self.rankSum / trials
+        stdev = np.sqrt(np.maximum(0, self.rankSquares / trials - mean * mean))
+        rows = [{
+            "option": name,
+            "meanRank": float(mean[i]) + 1,
+            "rankStdev": float(stdev[i]),
+            "win": float(self.wins[i] / trials),
+            "top": float(self.top[i] / trials),
+            "best": int(self.best[i]) + 1,
+            "worst": int(self.worst[i]) + 1
+        } for i, name in enumerate(names)]
+        return sorted(rows, key=lambda r: r["meanRank"])
+
+
+def runTrials(criteria, matrix, trials, seed, noise=0.1, rangeNoise=0.1, k=3, budget=2_000_000):
+    rng = np.random.default_rng(seed)
+    base = np.asarray(matrix, dtype=float)
+    n, m = base.shape
+    stats = RankStats(n, k)
+    batch = max(1, budget // max(1, n * m))
+
+    done = 0
+    while done < trials:
+        b = min(batch, trials - done)
+        values = np.repeat(base[np.newaxis], b, axis=0)
+        scales = []
+        for j, crit in enumerate(criteria):
+            if len(crit["influences"]) == 0:
+                lo, hi = crit["span"]
+                values[..., j] = np.clip(np.rint(values[..., j] + rng.normal(0, noise * crit["unit"], (b, n))), lo, hi)
+                scales.append(1)
+            else:
+                scales.append(np.maximum(0.05, 1 + rng.normal(0, rangeNoise, (b, 1))))
+
+        values = propagate(values, criteria, scales)
+        stats.add(ranks(totals(values, criteria)))
+        done += b
+    return stats
+
+
+def makeExecutor(workers=None):
+    # spawn keeps workers free of the parent's Qt state
+    return ProcessPoolExecutor(workers, mp_context=get_context("spawn"))
+
+
+def submit(executor, criteria, matrix, trials, chunks, seed=None, **options):
+    matrix = np.ascontiguousarray(matrix, dtype=float)
+    seeds = np.random.SeedSequence(seed).spawn(chunks)
+    sizes = [trials // chunks + (1 if i < trials % chunks else 0) for i in range(chunks)]
+    return [executor.submit(runTrials, criteria, matrix, size, s, **options) for size, s in zip(sizes, seeds) if size > 0]
+
+
+def combine(futures):
+    stats = None
+    for f in futures:
+        stats = f.result() if stats is None else stats.merge(f.result())
+    return stats
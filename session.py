@@ -0,0 +1,82 @@
+import json
+import struct
+
+import numpy as np
+
+from formula import compileFormula
+from normalize import CENTER_MODES, RANGE_MODES, INVERT_MODES
+from propagation import orderIndices
+
+
+MAGIC = b"DSLS"
+VERSION = 1
+ALIGN = 64
+PREFIX = struct.Struct("<4sII")
+
+
+def dataOffset(header_length):
+    end = PREFIX.size + header_length
+    return (end + ALIGN - 1) // ALIGN * ALIGN
+
+
+def writeSession(path, header, matrix):
+    matrix = np.ascontiguousarray(matrix, dtype="<f8")
+    header = dict(header, shape=list(matrix.shape), dtype="<f8")
+    blob = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    offset = dataOffset(len(blob))
+
+    with open(path, "wb") as f:
+        f.write(PREFIX.pack(MAGIC, VERSION, len(blob)))
+        f.write(blob)
+        f.write(b"\0" * (offset - PREFIX.size - len(blob)))
+        matrix.tofile(f)
+
+
+def readHeader(path):
+    with open(path, "rb") as f:
+        magic, version, length = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a decision session file")
+        if version != VERSION:
+            raise ValueError(f"unsupported session version {version} in {path}")
+        header = json.loads(f.read(length).decode("utf-8"))
+    return header, dataOffset(length)
+
+
+def checkHeader(header):
+    # everything a window needs from the header, checked before any of it is applied
+    options, criteria = header["options"], header["criteria"]
+    if len(set(options)) != len(options) or not all(isinstance(n, str) and n for n in options):
+        raise ValueError("session option names must be unique and non-empty")
+    names = [c["name"] for c in criteria]
+    if len(set(names)) != len(names) or not all(isinstance(n, str) and n for n in names):
+        raise ValueError("session criterion names must be unique and non-empty")
+    if header["shape"] != [len(options), len(criteria)]:
+        raise ValueError(f"session matrix is {header['shape']}, expected {[len(options), len(criteria)]}")
+
+    for j, crit in enumerate(criteria):
+        float(crit["rmin"]), float(crit["rmax"])
+        center, range, invert = crit["modes"]
+        if center not in CENTER_MODES or range not in RANGE_MODES or invert not in INVERT_MODES:
+            raise ValueError(f"unknown normalization modes {crit['modes']!r} for {crit['name']!r}")
+        influences = crit["influences"]
+        if not all(isinstance(i, int) and 0 <= i < len(criteria) and i != j for i in influences):
+            raise ValueError(f"bad influences {influences!r} for {crit['name']!r}")
+        if len(crit.get("weights") or influences) != len(influences):
+            raise ValueError(f"weights of {crit['name']!r} do not match its influences")
+        if crit.get("formula") and not set(compileFormula(crit["formula"]).names) <= {names[i] for i in influences}:
+            raise ValueError(f"formula of {crit['name']!r} names a criterion that is not an influence")
+    orderIndices([c["influences"] for c in criteria])
+
+
+def readSession(path):
+    header, offset = readHeader(path)
+    try:
+        checkHeader(header)
+    except TypeError as e:
+        raise ValueError(f"malformed session header in {path}: {e}")
+    shape = tuple(header["shape"])
+    if 0 in shape:
+        return header, np.zeros(shape)
+    # copy-on-write mapping: pages are read on first touch and edits never reach the file
+    return header, np.memmap(path, dtype=header["dtype"], mode="c", offset=offset, shape=shape)
@@ -1,16 +1,31 @@
+import numpy as np
+
 from PyQt6 import QtCore, QtGui
 from PyQt6.QtWidgets import QSlider, QWidget, QStyle, QStyleOptionSlider, QLabel, QGroupBox
 from PyQt6.QtCore import QRect, QEvent, QPoint, Qt, pyqtSignal, pyqtSlot
-from PyQt6.QtGui import QCursor
+from PyQt6.QtGui import QCursor, QPainter, QColor, QPalette
+
+from model import DecisionModel
+from handleindex import HandleIndex
 
 
 class MultiSlider(QWidget):
-    changeForward = pyqtSignal(str)
+    # handles are keyed by model row, names are only looked up when drawn; a released
+    # slider keeps only each handle's label side and works on the model directly
+    changeForward = pyqtSignal(int)
     updateValues = pyqtSignal(dict)
+    valuesEdited = pyqtSignal(dict)
     
     
-    def __init__(self, wid, hei):
+    def __init__(self, wid, hei, model=None, col=None):
         super().__init__()
+
+        self.ownsModel = model is None
+        if self.ownsModel:
+            model = DecisionModel()
+            col = model.addCriterion()
+        self.model = model
+        self.col = col
         self.wid = wid
         self.hei = hei
         self.step = 50
@@ -19,6 +34,8 @@ class MultiSlider(QWidget):
         self.curr_max = 1
 
         self.handles = {}
+        self.index = HandleIndex()
+        self.front = None
         self.MOUSE_PROX = 20
 
         self.setFixedWidth(wid)
@@ -26,13 +43,23 @@ class MultiSlider(QWidget):
 
         self.readOnly = False
         self.expandable = False
+        self.materialized = True
 
         self.zero_mark = None    
 
+        self.scheduler = None
+        self.applying = False
+        self.applied = set()
+        self.edited = set()
+
+    def setScheduler(self, scheduler):
+        self.scheduler = scheduler
+
     def setReadOnly(self, ro):
         self.readOnly = ro
-        for h in self.handles:
-            self.handles[h].setEnabled(not ro)
+        if self.materialized:
+            for h in self.handles:
+                self.handles[h].setEnabled(not ro)
 
     def setExpandable(self, exp):
         self.expandable = exp
@@ -49,8 +76,36 @@ class MultiSlider(QWidget):
 
         self.checkExpansion()
 
+        if self.expandable and self.materialized and len(self.handles) > 0:
+            self.moveZeroMark()
+
+    def materialize(self):
+        if self.materialized:
+            return
+        self.materialized = True
+        rows = np.fromiter(self.handles, dtype=int, count=len(self.handles))
+        self.handles = {}
+        self.createHandles(rows, self.calcRange())
+        if self.front in self.handles:
+            self.handles[self.front].raise_()
         if self.expandable and len(self.handles) > 0:
             self.moveZeroMark()
+        self.placeLabels(self.handles)
+
+    def movesWidgets(self):
+        # whether a value change has a handle widget to move, or only the model to write
+        return self.materialized
+
+    def release(self):
+        if not self.materialized or any(h.isSliderDown() for h in self.handles.values()):
+            return
+        sides = {}
+        for row, handle in self.handles.items():
+            sides[row] = handle.leftSide
+            handle.setParent(None)
+            handle.deleteLater()
+        self.handles = sides
+        self.materialized = False
 
     def calcRange(self):
         hrange = (self.curr_min * self.step - (self.overstep if self.expandable else 0),
@@ -59,64 +114,169 @@ class MultiSlider(QWidget):
         return hrange
     
     def addHandles(self, names):
-        for name in names:
-            self.addHandle(name)
+        self.applyStructure(add=names)
 
     def addHandle(self, name):        
-        init_size = len(self.handles)
-        
-        handle = LabeledSlider(name, QRect(0, 0, self.wid, self.hei), self.calcRange())
-        handle.setParent(self)
-        handle.setMouseTracking(True)
-        handle.installEventFilter(self)
-        handle.setEnabled(not self.readOnly)
-        handle.show()
-        handle.lower()
-        handle.valueChanged.connect(lambda x: self.valuesChanged({handle.name: x}))
-        
-        self.handles[name] = handle
-
-        if self.expandable and init_size == 0:
-            self.moveZeroMark()
+        self.applyStructure(add=[name])
 
     def renameHandle(self, old_name, new_name):
-        self.handles[old_name].setText(new_name)
-        self.handles[new_name] = self.handles[old_name]
-        del self.handles[old_name]
+        self.applyStructure(rename={old_name: new_name})
 
     def deleteHandle(self, name):
-        self.handles[name].setParent(None)
-        self.handles[name].deleteLater()
-        del self.handles[name]
+        self.applyStructure(delete=[name])
+
+    def applyStructure(self, add=(), rename=None, delete=()):
+        rename = rename or {}
+        init_size = len(self.handles)
+
+        for name in delete:
+            row = self.model.row(name)
+            self.removeHandle(row)
+            self.index.remove(row)
+            if self.front == row:
+                self.front = None
+        if self.ownsModel:
+            for name in delete:
+                self.model.removeOption(name)
+
+        for old_name, new_name in rename.items():
+            if self.ownsModel:
+                self.model.renameOption(old_name, new_name)
+            self.relabelHandle(self.model.row(new_name))
+
+        if len(add) == 0:
+            return
+
+        if self.ownsModel:
+            self.model.addOptions(add)
+        rows = np.array([self.model.row(n) for n in add], dtype=int)
+        added = self.createHandles(rows, self.calcRange())
+        self.index.addMany(added)
+
+        if self.expandable and self.materialized and init_size == 0:
+            self.moveZeroMark()
+        self.valuesChanged(dict(added))
+
+    def createHandles(self, rows, hrange):
+        if not self.materialized:
+            return self.createPlaceholders(rows, hrange)
+        added = []
+        for row in rows.tolist():
+            handle = LabeledSlider(self.model.rowNames[row], QRect(0, 0, self.wid, self.hei), hrange)
+            handle.setValue(int(self.model.values[row, self.col]))
+            self.model.setValueAt(row, self.col, handle.value())
+            handle.setParent(self)
+            handle.setMouseTracking(True)
+            handle.installEventFilter(self)
+            handle.setEnabled(not self.readOnly)
+            handle.show()
+            handle.lower()
+            handle.valueChanged.connect(lambda x, row=row: self.handleMoved(row, x))
+
+            self.handles[row] = handle
+            added.append((row, handle.value()))
+        return added
+
+    def createPlaceholders(self, rows, hrange):
+        vals = np.clip(self.model.values[rows, self.col].astype(int), hrange[0], hrange[1])
+        self.model.setRows(rows, self.col, vals)
+        self.handles.update(dict.fromkeys(rows.tolist(), False))
+        return list(zip(rows.tolist(), vals.tolist()))
+
+    def relabelHandle(self, row):
+        if self.materialized:
+            self.handles[row].setText(self.model.rowNames[row])
+
+    def removeHandle(self, row):
+        if self.materialized:
+            self.handles[row].setParent(None)
+            self.handles[row].deleteLater()
+        del self.handles[row]
+
+    def valueWindow(self, y, reach):
+        hrange = self.calcRange()
+        y0 = self.valueToY(hrange[0])
+        per = (y0 - self.valueToY(hrange[1])) / (hrange[1] - hrange[0])
+        return (y0 - y - reach) / per + hrange[0] - 1, (y0 - y + reach) / per + hrange[0] + 1
+
+    def handleAt(self, pos):
+        dx = abs(pos.x() - self.wid // 2)
+        if dx > self.MOUSE_PROX or len(self.index) == 0:
+            return None
+
+        closest = None
+        best = self.MOUSE_PROX + 1
+        for value, seq, row in self.index.between(*self.valueWindow(pos.y(), self.MOUSE_PROX - dx)):
+            dist = dx + abs(self.valueToY(value) - pos.y())
+            if dist < best or (dist == best and row == self.front):
+                closest = row
+                best = dist
+        return closest
 
     def mouseAt(self, pos):
-        curr_poss = {hnd.name: (pos - hnd.currentPosition()).manhattanLength() for hnd in reversed(self.handles.values())}
-        for hnd in self.handles.values():
-            if curr_poss[hnd.name] <= self.MOUSE_PROX:
-                hnd.raise_()
-        closest = min(curr_poss, key=curr_poss.get)
-        if curr_poss[closest] <= self.MOUSE_PROX:
+        self.hoverAt(self.mapFromGlobal(pos))
+
+    def hoverAt(self, pos):
+        closest = self.handleAt(pos)
+        if closest is not None and closest != self.front:
+            self.bringForward(closest)
             self.changeForward.emit(closest)
 
-    def bringForward(self, name):
-        self.handles[name].raise_()
+    def bringForward(self, row):
+        self.front = row
+        if self.materialized:
+            self.handles[row].raise_()
+
+    def handleMoved(self, row, val):
+        self.model.setValueAt(row, self.col, val)
+        self.index.move(row, val)
+        if self.applying:
+            self.applied.add(row)
+            return
+
+        self.edited.add(row)
+        self.scheduleFlush({row})
+
+    def scheduleFlush(self, rows):
+        if self.scheduler:
+            self.scheduler.schedule(self.flushValues, rows)
+        else:
+            self.flushValues(rows)
+
+    def flushValues(self, rows):
+        update = {r: int(self.model.values[r, self.col]) for r in rows if r in self.handles}
+        edited = {r: update[r] for r in self.edited if r in update}
+        self.edited -= rows
+
+        self.valuesChanged(update)
+        if len(edited) > 0:
+            self.valuesEdited.emit(edited)
 
     @pyqtSlot(dict)
     def valuesChanged(self, update):
-        handlesort = sorted(self.handles.items(), key=lambda x: x[1].value())
-        handlesortex = [(n, h, h.leftSide, h.currentPosition().y()) for (n, h) in handlesort]
-        for i, (n, h, f, y) in enumerate(handlesortex):
-            if n not in update:
-                continue
+        if self.materialized:
+            self.placeLabels(update)
+        self.updateValues.emit(update)
+
+    def placeLabels(self, rows):
+        entries = self.index.entries
+        if len(rows) > len(entries) // 4:
+            # most handles changed, one pass in order is cheaper than looking each one up
+            positions = range(len(entries))
+        else:
+            positions = sorted(self.index.position(n) for n in rows if n in self.index)
+        for i in positions:
+            n = entries[i][2]
+            y = self.valueToY(entries[i][0])
             
             prev = self.MOUSE_PROX
             if i > 0:
-                diff = handlesortex[i - 1][3] - y
+                diff = self.valueToY(entries[i - 1][0]) - y
                 prev = diff
 
             post = self.MOUSE_PROX
-            if i < len(handlesortex) - 1:
-                diff = y - handlesortex[i + 1][3]
+            if i < len(entries) - 1:
+                diff = y - self.valueToY(entries[i + 1][0])
                 post = diff
 
             ans = (prev, post)
@@ -124,31 +284,72 @@ class MultiSlider(QWidget):
             best_idx = ans.index(best)
 
             if best <= self.MOUSE_PROX // 2:
-                h.setSide(not handlesortex[i + best_idx * 2 - 1][2])
+                self.setHandleSide(n, not self.handleSide(entries[i + best_idx * 2 - 1][2]))
             else:
-                h.setSide(False)
-                
-        self.updateValues.emit(update)            
-            
+                self.setHandleSide(n, False)
+
+    def handleSide(self, row):
+        return self.handles[row].leftSide
+
+    def setHandleSide(self, row, leftSide):
+        self.handles[row].setSide(leftSide)
+
+    def valueToY(self, val):
+        return next(iter(self.handles.values())).valueToY(val)
+
     def getValues(self):
-        return {n: h.value() for (n, h) in self.handles.items()}
+        return self.model.getValues(self.col)
 
     def setValues(self, update):
-        for h in update:
-            self.handles[h].setValue(update[h])
+        self.setRowValues({self.model.row(n): v for n, v in update.items()})
+
+    def setRowValues(self, update):
+        self.applying = True
+        try:
+            for row in update:
+                self.applyValue(row, int(update[row]))
+        finally:
+            self.applying = False
+
+        if len(self.applied) > 0:
+            rows = self.applied
+            self.applied = set()
+            self.scheduleFlush(rows)
+
+    def applyValue(self, row, val):
+        if self.materialized:
+            self.handles[row].setValue(val)
+            return
+        hrange = self.calcRange()
+        val = min(max(val, hrange[0]), hrange[1])
+        if int(self.model.values[row, self.col]) != val:
+            self.handleMoved(row, val)
+
+    def setColumn(self, column):
+        hrange = self.calcRange()
+        column = np.clip(column, hrange[0], hrange[1])
+        changed = np.flatnonzero(self.model.column(self.col) != column)
+        rows = self.model.rows()
+        if self.movesWidgets():
+            self.setRowValues({int(rows[i]): column[i] for i in changed})
+        elif len(changed) > 0:
+            # placeholders have nothing to move, the whole column lands in one model update
+            rows = rows[changed]
+            self.model.setRows(rows, self.col, column[changed].astype(int))
+            self.index.moveMany(zip(rows.tolist(), column[changed].astype(int).tolist()))
+            self.scheduleFlush(set(rows.tolist()))
+        return len(changed) > 0
             
-    def checkExpansion(self, handles_sorted=None):
+    def checkExpansion(self):
         if not self.expandable:
             return
 
-        if not handles_sorted:
-            handles_sorted = sorted(self.handles.items(), key=lambda x: x[1].value())
-
-        if len(handles_sorted) == 0:
+        column = self.model.column(self.col)
+        if len(column) == 0:
             return
         
-        lowest = handles_sorted[0][1].value()
-        highest = handles_sorted[-1][1].value()
+        lowest = int(column.min())
+        highest = int(column.max())
         new_min = self.curr_min
         new_max = self.curr_max
 
@@ -176,6 +377,11 @@ class MultiSlider(QWidget):
 
         hrange = self.calcRange()
 
+        if not self.materialized:
+            for row in list(self.handles):
+                self.applyValue(row, int(self.model.values[row, self.col]))
+            return
+
         for h in self.handles.values():
             h.setMinimum(hrange[0])
             h.setMaximum(hrange[1])
@@ -185,14 +391,14 @@ class MultiSlider(QWidget):
             self.moveZeroMark()
 
     def moveZeroMark(self):
-        first_h = self.handles[list(self.handles.keys())[0]]
-        self.zero_mark.move(QPoint(self.zero_mark.width(), first_h.valueToY(0) - self.zero_mark.height() // 2))
+        self.zero_mark.move(QPoint(self.zero_mark.width(), self.valueToY(0) - self.zero_mark.height() // 2))
     
     def eventFilter(self, source, event):
         if event.type() == QEvent.Type.MouseMove and event.buttons() == Qt.MouseButton.NoButton:
             self.mouseAt(source.mapToGlobal(event.pos()))
         elif event.type() == QEvent.Type.MouseButtonPress and event.buttons() == Qt.MouseButton.RightButton:
             self.children()[-1].lower()
+            self.front = None
         elif event.type() == QEvent.Type.MouseButtonRelease and self.expandable and \
             not (event.buttons() & Qt.MouseButton.LeftButton):
             if any([self.handles[h].isSliderDown() for h in self.handles]):
@@ -247,8 +453,164 @@ class LabeledSlider(QSlider):
     def changed(self, val):
         self.moveText(val)
 
-    def currentPosition(self):
-        return self.mapToGlobal(QPoint(self.width() // 2, self.valueToY(self.value())))
-
     def valueToY(self, val):
         return int(self.height() - QStyle.sliderPositionFromValue(self.minimum(), self.maximum(), val, self.height() - self.span) - self.span / 2)        
+
+
+class PaintedMultiSlider(MultiSlider):
+
+    def __init__(self, wid, hei, model=None, col=None):
+        super().__init__(wid, hei, model, col)
+
+        self.span = 10
+        self.handleWidth = 20
+        self.labelWidth = wid // 2 - 13
+        self.labelHeight = 20
+
+        self.front = None
+        self.dragging = None
+        self.unplaced = set()
+
+        self.setMouseTracking(True)
+
+    def setReadOnly(self, ro):
+        self.readOnly = ro
+        if ro:
+            self.dragging = None
+        self.update()
+
+    def createHandles(self, rows, hrange):
+        return self.createPlaceholders(rows, hrange)
+
+    def materialize(self):
+        # painted handles are already as light as placeholders
+        pass
+
+    def release(self):
+        pass
+
+    def movesWidgets(self):
+        return False
+
+    def relabelHandle(self, row):
+        # labels are read from the model when painting
+        pass
+
+    def removeHandle(self, row):
+        del self.handles[row]
+        if self.dragging == row:
+            self.dragging = None
+
+    def applyStructure(self, add=(), rename=None, delete=()):
+        super().applyStructure(add, rename, delete)
+        self.update()
+
+    def handleSide(self, row):
+        return self.handles[row]
+
+    def setHandleSide(self, row, leftSide):
+        self.handles[row] = leftSide
+
+    def valuesChanged(self, update):
+        # label sides are worked out when painted, a slider that is not shown never pays for them
+        self.unplaced.update(update)
+        self.updateValues.emit(update)
+        self.update()
+
+    def valueToY(self, val):
+        hrange = self.calcRange()
+        return int(self.hei - (val - hrange[0]) * (self.hei - self.span) / (hrange[1] - hrange[0]) - self.span / 2)
+
+    def yToValue(self, y):
+        hrange = self.calcRange()
+        val = round(hrange[0] + (self.hei - self.span / 2 - y) * (hrange[1] - hrange[0]) / (self.hei - self.span))
+        return min(max(val, hrange[0]), hrange[1])
+
+    def positions(self):
+        rows = self.model.rows()
+        column = self.model.column(self.col)
+        hrange = self.calcRange()
+        ys = (self.hei - (column - hrange[0]) * (self.hei - self.span) / (hrange[1] - hrange[0]) - self.span / 2).astype(int)
+        return rows, column, ys
+
+    def bringForward(self, row):
+        if self.front != row:
+            self.front = row
+            self.update()
+
+    def moveHandle(self, row, val):
+        if int(self.model.values[row, self.col]) != val:
+            self.handleMoved(row, val)
+
+    def applyValue(self, row, val):
+        hrange = self.calcRange()
+        self.moveHandle(row, min(max(val, hrange[0]), hrange[1]))
+
+    def updateRange(self, new_min, new_max):
+        self.curr_min = new_min
+        self.curr_max = new_max
+
+        hrange = self.calcRange()
+        for row in self.model.rows().tolist():
+            self.moveHandle(row, min(max(int(self.model.values[row, self.col]), hrange[0]), hrange[1]))
+
+        if self.expandable and len(self.handles) > 0:
+            self.moveZeroMark()
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.RightButton:
+            self.front = None
+            self.update()
+        elif event.button() == Qt.MouseButton.LeftButton and not self.readOnly:
+            self.dragging = self.handleAt(event.position().toPoint())
+
+    def mouseMoveEvent(self, event):
+        pos = event.position().toPoint()
+        if self.dragging is not None:
+            self.moveHandle(self.dragging, self.yToValue(pos.y()))
+            self.update()
+        elif event.buttons() == Qt.MouseButton.NoButton:
+            self.hoverAt(pos)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.dragging is not None:
+            self.dragging = None
+            self.checkExpansion()
+
+    def paintEvent(self, event):
+        if self.unplaced:
+            self.placeLabels(self.unplaced)
+            self.unplaced = set()
+        painter = QPainter(self)
+        center = self.wid // 2
+        hrange = self.calcRange()
+
+        painter.setPen(QColor("grey"))
+        painter.drawLine(center, self.span // 2, center, self.hei - self.span // 2)
+        for tick in range(hrange[0] - hrange[0] % hrange[2], hrange[1] + 1, hrange[2]):
+            y = self.valueToY(tick)
+            painter.drawLine(center - 12, y, center - 8, y)
+            painter.drawLine(center + 8, y, center + 12, y)
+
+        rows, column, ys = self.positions()
+        order = [i for i, r in enumerate(rows.tolist()) if r != self.front]
+        if self.front in self.handles:
+            order.append(int(np.searchsorted(rows, self.front)))
+
+        handleColor = QColor("lightgrey") if self.readOnly else self.palette().color(QPalette.ColorRole.Highlight)
+        metrics = painter.fontMetrics()
+        for i in order:
+            y = int(ys[i])
+            painter.setPen(QColor("grey"))
+            painter.setBrush(handleColor)
+            painter.drawRect(center - self.handleWidth // 2, y - self.span // 2, self.handleWidth, self.span)
+
+            row = int(rows[i])
+            text = metrics.elidedText(" " + self.model.rowNames[row] + " ", Qt.TextElideMode.ElideRight, self.labelWidth)
+            textWidth = metrics.horizontalAdvance(text)
+            x = center - textWidth - 10 if self.handles.get(row, False) else center + 10
+            label = QRect(x, y - 10, textWidth, self.labelHeight)
+            painter.fillRect(label, QColor("gainsboro"))
+            painter.setPen(QColor("black"))
+            painter.drawText(label, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, text)
@@ -0,0 +1,746 @@
+import json
+from collections import deque
+
+import numpy as np
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+from formula import compileFormula, FormulaError
+from history import (AddOption, DeleteOption, RenameEntry, MoveEntry, AddCriterion, DeleteCriterion,
+                     ConfigureCriterion, ReplaceDecision, EVERYTHING)
+
+
+# Wire format: one compact JSON object per line. Options and criteria are referred to
+# by name, never by model slot, so instances only have to agree on names and order.
+#   {"op": "values", "crit": c, "set": {option: value}}
+#   {"op": "addOption", "idx": i, "name": n}       {"op": "deleteOption", "name": n}
+#   {"op": "addCriterion", "idx": i, "name": n}    {"op": "deleteCriterion", "name": n}
+#   {"op": "rename", "tray": t, "old": a, "new": b}
+#   {"op": "move", "tray": t, "name": n, "dest": i}
+#   {"op": "configure", "name": c, "spec": {...influences by name...}}
+#   {"op": "snapshot", "options": [n, ...], "criteria": [{"name": c, ...spec...}], "values": {c: {option: value}}}
+# Clients tag ops with their own "id"; the hub adds "client" and a global "seq" and
+# echoes every accepted op to everyone, the sender included, in sequence order.
+
+HUB = 0
+
+
+def encode(message):
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def decode(line):
+    return json.loads(line)
+
+
+class SyncState:
+    # the shape of a shared decision, enough to validate ops the same way everywhere
+
+    def __init__(self):
+        self.options = []
+        self.criteria = []
+        self.influences = {}
+        self.specs = {}
+        self.values = {}
+
+    def empty(self):
+        return not self.options and not self.criteria
+
+    def tray(self, name):
+        return self.options if name == "options" else self.criteria
+
+    def reaches(self, source, target):
+        stack = [source]
+        seen = set()
+        while stack:
+            node = stack.pop()
+            if node == target:
+                return True
+            if node not in seen:
+                seen.add(node)
+                stack.extend(self.influences.get(node, ()))
+        return False
+
+    def validate(self, op):
+        # returns the op as it should be applied, or None when it conflicts with this state
+        kind = op.get("op")
+        if kind == "values":
+            crit = op.get("crit")
+            if crit not in self.influences or self.influences[crit]:
+                return None
+            names = set(self.options)
+            return dict(op, set={n: v for n, v in op["set"].items() if n in names})
+        if kind in ("addOption", "addCriterion"):
+            entries = self.options if kind == "addOption" else self.criteria
+            return op if op["name"] and op["name"] not in entries else None
+        if kind == "deleteOption":
+            return op if op["name"] in self.options else None
+        if kind == "deleteCriterion":
+            return op if op["name"] in self.criteria else None
+        if kind == "rename":
+            entries = self.tray(op["tray"])
+            return op if op["old"] in entries and op["new"] and op["new"] not in entries else None
+        if kind == "move":
+            entries = self.tray(op["tray"])
+            return op if op["name"] in entries and 0 <= op["dest"] < len(entries) else None
+        if kind == "configure":
+            name, influences = op["name"], op["spec"]["influences"]
+            if name not in self.influences or any(i not in self.influences or i == name for i in influences):
+                return None
+            if any(self.reaches(i, name) for i in influences):
+                return None
+            if op["spec"].get("formula"):
+                try:
+                    if not set(compileFormula(op["spec"]["formula"]).names) <= set(influences):
+                        return None
+                except FormulaError:
+                    return None
+            return op
+        if kind == "snapshot":
+            return self.validateSnapshot(op)
+        return None
+
+    def validateSnapshot(self, op):
+        # a whole decision replacing this one, as a load or import publishes it
+        options = op.get("options")
+        specs = op.get("criteria")
+        if not isinstance(options, list) or not isinstance(specs, list):
+            return None
+        names = [spec.get("name") for spec in specs]
+        for entries in (options, names):
+            if not all(isinstance(n, str) and n for n in entries) or len(set(entries)) != len(entries):
+                return None
+        state = SyncState()
+        state.influences = {spec["name"]: list(spec.get("influences", ())) for spec in specs}
+        for spec in specs:
+            name, influences = spec["name"], state.influences[spec["name"]]
+            if any(i not in state.influences or i == name for i in influences):
+                return None
+            if spec.get("formula"):
+                try:
+                    if not set(compileFormula(spec["formula"]).names) <= set(influences):
+                        return None
+                except FormulaError:
+                    return None
+        if any(state.reaches(i, spec["name"]) for spec in specs for i in state.influences[spec["name"]]):
+            return None
+        known = set(options)
+        values = {crit: {n: v for n, v in entries.items() if n in known}
+                  for crit, entries in op.get("values", {}).items()
+                  if crit in state.influences and not state.influences[crit]}
+        return dict(op, values=values)
+
+    def apply(self, op):
+        kind = op["op"]
+        if kind == "values":
+            self.values.setdefault(op["crit"], {}).update(op["set"])
+        elif kind == "addOption":
+            self.options.insert(min(op["idx"], len(self.options)), op["name"])
+        elif kind == "deleteOption":
+            self.options.remove(op["name"])
+            for values in self.values.values():
+                values.pop(op["name"], None)
+        elif kind == "addCriterion":
+            self.criteria.insert(min(op["idx"], len(self.criteria)), op["name"])
+            self.influences[op["name"]] = []
+        elif kind == "deleteCriterion":
+            name = op["name"]
+            self.criteria.remove(name)
+            del self.influences[name]
+            self.values.pop(name, None)
+            self.specs.pop(name, None)
+            for influences in self.influences.values():
+                if name in influences:
+                    influences.remove(name)
+            for spec in self.specs.values():
+                spec.get("influenceWeights", {}).pop(name, None)
+                if spec.get("formula") and name in compileFormula(spec["formula"]).names:
+                    spec["formula"] = ""
+        elif kind == "rename":
+            entries = self.tray(op["tray"])
+            old, new = op["old"], op["new"]
+            entries[entries.index(old)] = new
+            if op["tray"] == "options":
+                for values in self.values.values():
+                    if old in values:
+                        values[new] = values.pop(old)
+            else:
+                for table in (self.influences, self.values, self.specs):
+                    if old in table:
+                        table[new] = table.pop(old)
+                for influences in self.influences.values():
+                    if old in influences:
+                        influences[influences.index(old)] = new
+                for spec in self.specs.values():
+                    if old in spec.get("influenceWeights", {}):
+                        spec["influenceWeights"][new] = spec["influenceWeights"].pop(old)
+                    if spec.get("formula") and old in compileFormula(spec["formula"]).names:
+                        spec["formula"] = compileFormula(spec["formula"]).renamed(old, new).text
+        elif kind == "move":
+            entries = self.tray(op["tray"])
+            entries.insert(op["dest"], entries.pop(entries.index(op["name"])))
+        elif kind == "configure":
+            spec = dict(op["spec"])
+            self.influences[op["name"]] = list(spec.pop("influences"))
+            self.specs[op["name"]] = spec
+            if self.influences[op["name"]]:
+                self.values.pop(op["name"], None)
+        elif kind == "snapshot":
+            self.options = list(op["options"])
+            self.criteria = [spec["name"] for spec in op["criteria"]]
+            self.influences = {spec["name"]: list(spec["influences"]) for spec in op["criteria"]}
+            self.specs = {spec["name"]: {k: v for k, v in spec.items() if k not in ("name", "influences")}
+                          for spec in op["criteria"]}
+            self.values = {crit: dict(entries) for crit, entries in op["values"].items()}
+
+    def catchUp(self):
+        # the ops that rebuild this state from nothing, for an instance that joins late
+        for i, name in enumerate(self.options):
+            yield {"op": "addOption", "idx": i, "name": name}
+        for i, name in enumerate(self.criteria):
+            yield {"op": "addCriterion", "idx": i, "name": name}
+        for name in self.criteria:
+            if name in self.specs:
+                yield {"op": "configure", "name": name, "spec": dict(self.specs[name], influences=self.influences[name])}
+        for name in self.criteria:
+            if self.values.get(name):
+                yield {"op": "values", "crit": name, "set": dict(self.values[name])}
+
+
+class SyncHub:
+    # orders ops from every client into one sequence; the first accepted op wins a conflict
+
+    def __init__(self):
+        self.state = SyncState()
+        self.seq = 0
+        self.peers = {}
+        self.nextClient = HUB + 1
+
+    def attach(self, deliver):
+        client = self.nextClient
+        self.nextClient += 1
+        self.peers[client] = deliver
+        return client
+
+    def detach(self, client):
+        self.peers.pop(client, None)
+
+    def receive(self, client, message):
+        if client not in self.peers:
+            return
+        if message.get("op") == "hello":
+            deliver = self.peers[client]
+            deliver({"op": "welcome", "client": client, "seq": self.seq, "empty": self.state.empty()})
+            for op in self.state.catchUp():
+                deliver(dict(op, client=HUB, seq=self.seq))
+            return
+
+        op = self.state.validate(message)
+        if op is None:
+            self.peers[client]({"op": "reject", "id": message.get("id")})
+            return
+        self.state.apply(op)
+        self.seq += 1
+        op = dict(op, client=client, seq=self.seq)
+        for deliver in list(self.peers.values()):
+            deliver(op)
+
+
+class LocalTransport(QObject):
+    # in-process stand-in for a socket to a hub; messages are encoded and queued both ways
+
+    received = pyqtSignal(dict)
+    disconnected = pyqtSignal()
+
+    def __init__(self, hub):
+        super().__init__()
+        self.hub = hub
+        self.queue = deque()
+        self.bytesSent = 0
+        self.bytesReceived = 0
+        self.client = hub.attach(self.deliver)
+
+    def post(self, fn):
+        self.queue.append(fn)
+        if len(self.queue) == 1:
+            QTimer.singleShot(0, self.drain)
+
+    def drain(self):
+        while self.queue:
+            self.queue[0]()
+            self.queue.popleft()
+
+    def send(self, message):
+        data = encode(message)
+        self.bytesSent += len(data)
+        self.post(lambda: self.hub.receive(self.client, decode(data)))
+
+    def deliver(self, message):
+        data = encode(message)
+        self.bytesReceived += len(data)
+        self.post(lambda: self.received.emit(decode(data)))
+
+    def close(self):
+        self.hub.detach(self.client)
+        self.disconnected.emit()
+
+
+class SocketTransport(QObject):
+
+    received = pyqtSignal(dict)
+    disconnected = pyqtSignal()
+
+    def __init__(self, name=None, socket=None):
+        super().__init__()
+        self.socket = socket if socket is not None else QLocalSocket(self)
+        self.buffer = b""
+        self.queued = []
+        self.bytesSent = 0
+        self.bytesReceived = 0
+
+        self.socket.readyRead.connect(self.readMessages)
+        self.socket.connected.connect(self.writeQueued)
+        self.socket.disconnected.connect(self.disconnected)
+        if socket is None:
+            self.socket.connectToServer(name)
+
+    def send(self, message):
+        data = encode(message)
+        self.bytesSent += len(data)
+        if self.socket.state() == QLocalSocket.LocalSocketState.ConnectedState:
+            self.socket.write(data)
+        else:
+            self.queued.append(data)
+
+    @pyqtSlot()
+    def writeQueued(self):
+        for data in self.queued:
+            self.socket.write(data)
+        self.queued = []
+
+    @pyqtSlot()
+    def readMessages(self):
+        data = bytes(self.socket.readAll())
+        self.bytesReceived += len(data)
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        for line in lines:
+            if line:
+                self.received.emit(decode(line))
+
+    def close(self):
+        self.socket.disconnectFromServer()
+
+
+class SyncServer(QObject):
+    # a hub behind a local (Unix domain) socket
+
+    def __init__(self, name, hub=None):
+        super().__init__()
+        self.hub = hub or SyncHub()
+        self.peers = {}
+        self.server = QLocalServer(self)
+        QLocalServer.removeServer(name)
+        if not self.server.listen(name):
+            raise OSError(f"cannot listen on {name!r}: {self.server.errorString()}")
+        self.server.newConnection.connect(self.accept)
+
+    @pyqtSlot()
+    def accept(self):
+        while self.server.hasPendingConnections():
+            peer = SocketTransport(socket=self.server.nextPendingConnection())
+            client = self.hub.attach(peer.send)
+            peer.received.connect(lambda message, client=client: self.hub.receive(client, message))
+            peer.disconnected.connect(lambda client=client: self.drop(client))
+            self.peers[client] = peer
+
+    def drop(self, client):
+        self.hub.detach(client)
+        peer = self.peers.pop(client, None)
+        if peer is not None:
+            peer.socket.deleteLater()
+
+    def close(self):
+        self.server.close()
+
+
+class SyncClient(QObject):
+    # Mirrors one window into a hub. Value edits are last-writer-wins per cell, and a cell
+    # with an unacknowledged local edit ignores remote values until its own echo arrives.
+    # Structural edits apply locally at once; when a remote one is sequenced ahead of them
+    # they are undone, the remote one applied, and they are replayed on top if still valid.
+
+    def __init__(self, window, transport, coalesce=50):
+        super().__init__()
+        self.window = window
+        self.model = window.model
+        self.transport = transport
+
+        self.client = None
+        self.nextId = 0
+        self.applying = False
+        self.captured = []
+        self.pending = []
+        self.published = set()
+        self.outgoing = {}
+        self.pendingValues = {}
+        self.sentValues = {}
+
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(coalesce)
+        self.flushTimer.timeout.connect(self.flush)
+
+        transport.received.connect(self.received)
+        transport.disconnected.connect(self.stop)
+        window.edited.connect(self.localEdit)
+        self.model.watch(self)
+
+    def start(self):
+        self.transport.send({"op": "hello"})
+
+    @pyqtSlot()
+    def stop(self):
+        self.client = None
+        self.flushTimer.stop()
+
+    def takeId(self):
+        self.nextId += 1
+        return self.nextId
+
+    def valuesChanged(self, rows, col, delta):
+        if self.applying or self.client is None:
+            return
+        self.outgoing.setdefault(col, set()).update(rows.tolist())
+        if not self.flushTimer.isActive():
+            self.flushTimer.start()
+
+    def rowsAdded(self, rows):
+        pass
+
+    def rowRemoved(self, row):
+        pass
+
+    def structureChanged(self):
+        pass
+
+    @pyqtSlot()
+    def flush(self):
+        # one message per source criterion carrying only the latest value of each edited cell
+        self.flushTimer.stop()
+        outgoing, self.outgoing = self.outgoing, {}
+        if self.client is None:
+            return
+        for col, rows in outgoing.items():
+            crit = self.window.criterionFor(col)
+            if crit is None or crit.influences or not crit.rname:
+                continue
+            entries = [(r, self.model.rowNames[r]) for r in sorted(rows) if self.model.rowAlive[r]]
+            if not entries:
+                continue
+            id = self.takeId()
+            for r, name in entries:
+                self.pendingValues[(col, r)] = id
+            self.sentValues[id] = (col, entries)
+            self.transport.send({"op": "values", "id": id, "crit": crit.rname,
+                                 "set": {name: int(self.model.values[r, col]) for r, name in entries}})
+
+    def queueValues(self, col, rows):
+        rows = [r for r in rows if self.model.values[r, col] != 0]
+        if rows:
+            self.outgoing.setdefault(col, set()).update(rows)
+            if not self.flushTimer.isActive():
+                self.flushTimer.start()
+
+    def specToWire(self, spec):
+        return {
+            "influences": [self.model.colNames[c] for c in spec["influences"]],
+            "rmin": spec["rmin"],
+            "rmax": spec["rmax"],
+            "modes": list(spec["modes"]),
+            "weight": spec["weight"],
+            "included": spec["included"],
+            "influenceWeights": {self.model.colNames[c]: w for c, w in spec["influenceWeights"].items()},
+            "formula": spec["formula"]
+        }
+
+    def specFromWire(self, spec):
+        return dict(spec, influences=[self.model.colIndex[n] for n in spec["influences"]],
+                    influenceWeights={self.model.colIndex[n]: w for n, w in spec.get("influenceWeights", {}).items()})
+
+    def describe(self, command):
+        if isinstance(command, AddOption):
+            return {"op": "addOption", "idx": command.idx, "name": command.name}
+        if isinstance(command, DeleteOption):
+            return {"op": "deleteOption", "name": command.name}
+        if isinstance(command, AddCriterion):
+            return {"op": "addCriterion", "idx": command.idx, "name": command.name}
+        if isinstance(command, DeleteCriterion):
+            return {"op": "deleteCriterion", "name": command.name}
+        if isinstance(command, RenameEntry):
+            return {"op": "rename", "tray": command.tray, "old": command.old, "new": command.new}
+        if isinstance(command, MoveEntry):
+            name = getattr(self.window, command.tray).getNames()[command.dest]
+            return {"op": "move", "tray": command.tray, "name": name, "dest": command.dest}
+        if isinstance(command, ConfigureCriterion) and command.after is not None:
+            return {"op": "configure", "name": self.model.colNames[command.col], "spec": self.specToWire(command.after)}
+        if isinstance(command, ReplaceDecision) and command.after is not None:
+            return self.snapshotToWire(*command.after)
+        return None
+
+    def snapshotToWire(self, header, matrix):
+        names = [spec["name"] for spec in header["criteria"]]
+        criteria, values = [], {}
+        for j, spec in enumerate(header["criteria"]):
+            influences = [names[i] for i in spec["influences"]]
+            criteria.append({
+                "name": spec["name"],
+                "influences": influences,
+                "rmin": spec["rmin"],
+                "rmax": spec["rmax"],
+                "modes": list(spec["modes"]),
+                "weight": spec["weight"],
+                "included": spec["included"],
+                "influenceWeights": dict(zip(influences, spec["weights"])) if "weights" in spec else {},
+                "formula": spec.get("formula", "")
+            })
+            if not influences:
+                column = matrix[:, j]
+                values[spec["name"]] = {header["options"][i]: int(column[i]) for i in np.flatnonzero(column).tolist()}
+        return {"op": "snapshot", "options": list(header["options"]), "criteria": criteria, "values": values}
+
+    def snapshotFromWire(self, op):
+        names = [spec["name"] for spec in op["criteria"]]
+        index = {n: j for j, n in enumerate(names)}
+        rows = {n: i for i, n in enumerate(op["options"])}
+        criteria = []
+        for spec in op["criteria"]:
+            entry = {k: v for k, v in spec.items() if k not in ("influences", "influenceWeights")}
+            entry["influences"] = [index[n] for n in spec["influences"]]
+            if spec.get("influenceWeights"):
+                entry["weights"] = [spec["influenceWeights"].get(n, 1.0) for n in spec["influences"]]
+            criteria.append(entry)
+        matrix = np.zeros((len(op["options"]), len(names)))
+        for crit, entries in op["values"].items():
+            for name, value in entries.items():
+                matrix[rows[name], index[crit]] = value
+        return {"options": list(op["options"]), "criteria": criteria}, matrix
+
+    @pyqtSlot(object)
+    def localEdit(self, command):
+        if self.applying:
+            self.captured.append(command)
+            return
+        if self.client is None:
+            return
+        op = self.describe(command)
+        if op is None:
+            return
+
+        if isinstance(command, ReplaceDecision):
+            # the snapshot carries every value, anything queued before it is already in there
+            self.flushTimer.stop()
+            self.outgoing = {}
+        else:
+            # values edited before the change must reach the hub before it
+            self.flush()
+        op["id"] = self.takeId()
+        self.pending.append([op["id"], op, [command]])
+        self.transport.send(op)
+
+        # entries brought back by undo carry their old values with them
+        if isinstance(command, AddOption):
+            for crit in self.window.criteria.getItems():
+                if not crit.influences:
+                    self.queueValues(crit.col, [command.row])
+        elif isinstance(command, AddCriterion):
+            self.queueValues(command.col, self.model.rows().tolist())
+
+    @pyqtSlot(dict)
+    def received(self, message):
+        kind = message.get("op")
+        if kind == "welcome":
+            self.client = message["client"]
+            if message["empty"]:
+                self.publish()
+            else:
+                self.clearLocal()
+        elif kind == "reject":
+            self.rejected(message["id"])
+        elif kind == "values":
+            if message["client"] == self.client:
+                self.valuesAcknowledged(message)
+            else:
+                self.applyValues(message)
+        elif message.get("client") == self.client and message.get("id") in self.published:
+            self.published.discard(message["id"])
+        elif message.get("client") == self.client and self.pending and self.pending[0][0] == message.get("id"):
+            self.pending.pop(0)
+        else:
+            self.remoteEdit(message)
+
+    def valuesAcknowledged(self, message):
+        col, entries = self.sentValues.pop(message["id"], (None, ()))
+        accepted = message["set"]
+        for r, name in entries:
+            if self.pendingValues.get((col, r)) == message["id"]:
+                del self.pendingValues[(col, r)]
+                if name not in accepted:
+                    self.queueValues(col, [r])
+
+    def rejected(self, id):
+        if id in self.sentValues:
+            col, entries = self.sentValues.pop(id)
+            for r, name in entries:
+                if self.pendingValues.get((col, r)) == id:
+                    del self.pendingValues[(col, r)]
+                    if self.model.rowAlive[r] and self.model.colAlive[col]:
+                        self.queueValues(col, [r])
+        elif any(entry[0] == id for entry in self.pending):
+            self.rebase(drop=id)
+        self.published.discard(id)
+
+    def applyValues(self, message):
+        col = self.model.colIndex.get(message["crit"])
+        crit = self.window.criterionFor(col) if col is not None else None
+        if crit is None or crit.influences:
+            return
+        update = {}
+        for name, value in message["set"].items():
+            row = self.model.rowIndex.get(name)
+            if row is not None and (col, row) not in self.pendingValues:
+                update[name] = value
+        if update:
+            self.applying = True
+            try:
+                self.window.history.replay(lambda target: crit.setValues(update))
+            finally:
+                self.applying = False
+
+    def remoteEdit(self, op):
+        if self.pending or op.get("client") == self.client:
+            self.rebase(remote=op)
+            return
+        applied = []
+        self.applying = True
+        try:
+            self.window.history.replay(lambda target: applied.extend(self.applyOp(op)))
+        finally:
+            self.applying = False
+        # local undo entries the remote change invalidated go, the others move past it
+        self.window.history.rebase(applied)
+
+    def view(self):
+        state = SyncState()
+        state.options = self.window.options.getNames()
+        crits = self.window.criteria.getItems()
+        state.criteria = [c.rname for c in crits]
+        state.influences = {c.rname: [i.rname for i in c.influences] for c in crits}
+        return state
+
+    def rebase(self, remote=None, drop=None):
+        pending, self.pending = self.pending, []
+        undone, applied, replaced = [], [], []
+
+        def step(target):
+            for entry in reversed(pending):
+                for command in reversed(entry[2]):
+                    command.undoStructure(target)
+                    undone.append(command)
+            state = self.view()
+            if remote is not None and state.validate(remote) is not None:
+                applied.extend(self.applyOp(remote))
+                state.apply(remote)
+            for id, op, commands in pending:
+                if id == drop or state.validate(op) is None:
+                    replaced.append((commands[0], None))
+                    continue
+                redone = self.applyOp(op)
+                self.pending.append([id, op, redone])
+                replaced.append((commands[0], next((c for c in redone if type(c) is type(commands[0])), None)))
+                state.apply(op)
+
+        self.applying = True
+        try:
+            self.window.history.replay(step)
+        finally:
+            self.applying = False
+
+        # the undo log keeps the commands the pending ops were applied again as, which already sit past the remote op
+        history = self.window.history
+        for old, new in replaced:
+            history.substitute(old, new)
+        history.rebase(applied, exempt={new for old, new in replaced})
+        self.propagateTouched(undone + applied + [c for entry in self.pending for c in entry[2]])
+
+    def propagateTouched(self, commands):
+        # only criteria whose configuration went back and forth, and what they feed, need recomputing
+        crits = self.window.criteria.getItems()
+        touched = set().union(*(c.touches() for c in commands))
+        if EVERYTHING not in touched:
+            crits = [c for c in crits if ("col", c.col) in touched]
+        self.window.propagator.propagate(set(crits), {c for c in crits if c.influences})
+
+    def applyOp(self, op):
+        # applies a validated op to the window and returns the commands that undo it
+        self.captured = []
+        kind = op["op"]
+        if kind == "addOption":
+            self.window.options.insertEntry(min(op["idx"], len(self.window.options.getNames())), op["name"])
+        elif kind == "deleteOption":
+            self.window.options.renameEntry(self.window.options.getNames().index(op["name"]), "")
+        elif kind == "addCriterion":
+            self.window.criteria.insertEntry(min(op["idx"], len(self.window.criteria.getNames())), op["name"])
+        elif kind == "deleteCriterion":
+            self.window.criteria.renameEntry(self.window.criteria.getNames().index(op["name"]), "")
+        elif kind == "rename":
+            tray = getattr(self.window, op["tray"])
+            tray.renameEntry(tray.getNames().index(op["old"]), op["new"])
+        elif kind == "move":
+            tray = getattr(self.window, op["tray"])
+            source = tray.getNames().index(op["name"])
+            tray.moveTo(source, op["dest"])
+            self.captured.append(MoveEntry(op["tray"], source, op["dest"]))
+            if op["tray"] == "criteria":
+                self.window.scheduleVisibility()
+        elif kind == "configure":
+            col = self.model.colIndex[op["name"]]
+            self.window.configureCriterion(col, self.specFromWire(op["spec"]))
+            self.window.criterionFor(col).recompute()
+        elif kind == "snapshot":
+            self.window.restoreDecision(*self.snapshotFromWire(op))
+            crits = self.window.criteria.getItems()
+            self.window.propagator.propagate(set(crits), {c for c in crits if c.influences})
+        captured, self.captured = self.captured, []
+        return captured
+
+    def clearLocal(self):
+        # joining a shared decision replaces whatever this window held
+        def step(target):
+            for i in reversed(range(len(target.criteria.getNames()))):
+                target.criteria.renameEntry(i, "")
+            for i in reversed(range(len(target.options.getNames()))):
+                target.options.renameEntry(i, "")
+
+        self.applying = True
+        try:
+            self.window.history.replay(step)
+        finally:
+            self.applying = False
+        self.outgoing = {}
+        self.window.history.clear()
+
+    def publish(self):
+        # seeds an empty hub with this window's decision
+        ops = [{"op": "addOption", "idx": i, "name": n} for i, n in enumerate(self.window.options.getNames())]
+        crits = self.window.criteria.getItems()
+        ops += [{"op": "addCriterion", "idx": i, "name": c.rname} for i, c in enumerate(crits)]
+        ops += [{"op": "configure", "name": c.rname, "spec": self.specToWire(c.configSpec())} for c in crits]
+        for op in ops:
+            op["id"] = self.takeId()
+            self.published.add(op["id"])
+            self.transport.send(op)
+        for c in crits:
+            if not c.influences:
+                self.queueValues(c.col, self.model.rows().tolist())
+        self.flush()
@@ -0,0 +1,135 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from cli import evaluateFile, formatResult, outputNames, parseArgs, runHeadless
+from evaluate import cascade, propagate, ranks, totals
+from session import writeSession
+
+
+def criterion(name, influences=(), **spec):
+    return dict({"name": name, "rmin": -50, "rmax": 50, "modes": ["zero", "one", "default"],
+                 "influences": list(influences), "span": [-50, 50], "unit": 50}, **spec)
+
+
+def test_propagate_sums_weights_and_formulas():
+    criteria = [criterion("p"), criterion("q"), criterion("s", [0, 1]),
+                criterion("w", [0, 1], weights=[2.0, -1.0]), criterion("f", [0, 1], formula="max(p, q)")]
+    values = np.zeros((2, 5))
+    values[:, :2] = [[10, -20], [30, 40]]
+    scores = propagate(values, criteria)
+    assert scores.tolist() == [[10, -20, -10, 40, 10], [30, 40, 50, 20, 40]]
+
+
+def test_propagate_follows_chains():
+    criteria = [criterion("c", [1]), criterion("b", [2]), criterion("a")]
+    scores = propagate(np.array([[0.0, 0.0, 25.0]]), criteria)
+    assert scores.tolist() == [[25, 25, 25]]
+
+
+def test_cascade_only_recomputes_downstream():
+    criteria = [criterion("p"), criterion("q"), criterion("s", [0]), criterion("t", [1])]
+    values = np.array([[10.0, 20.0, 0.0, 0.0]])
+    results = cascade(values, criteria, [0])
+    assert list(results) == [2]
+    column, rmin, rmax = results[2]
+    assert column.tolist() == [10] and (rmin, rmax) == (-50, 50)
+    assert cascade(np.zeros((0, 4)), criteria, [0]) == {}
+
+
+def test_totals_and_ranks():
+    criteria = [criterion("p", weight=2.0), criterion("q", included=False), criterion("r")]
+    values = np.array([[1.0, 100.0, 0.0], [0.0, 0.0, 3.0], [1.0, 0.0, 1.0]])
+    assert totals(values, criteria).tolist() == [2.0, 3.0, 3.0]
+    # ties keep option order
+    assert ranks(totals(values, criteria)).tolist() == [2, 0, 1]
+    assert totals(np.zeros((2, 0)), []).tolist() == [0.0, 0.0]
+
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / "plain.csv").write_text("option,p,q\na,10,-20\nb,30,5\n", encoding="utf-8")
+    lines = [{"criterion": "r", "influences": ["p", "q"]},
+             {"option": "a", "scores": {"p": 10, "q": -20}},
+             {"option": "b", "scores": {"p": 30, "q": 5}}]
+    (tmp_path / "derived.jsonl").write_text("\n".join(json.dumps(l) for l in lines), encoding="utf-8")
+    header = {"options": ["a", "b"], "criteria": [criterion("p"), criterion("q", weight=0.5)]}
+    writeSession(tmp_path / "saved.dsess", header, np.array([[10.0, -20.0], [30.0, 5.0]]))
+    return tmp_path
+
+
+def ranking(result):
+    return [(row["option"], row["total"], row["scores"]) for row in result["ranking"]]
+
+
+def test_evaluate_each_format(files):
+    assert ranking(evaluateFile(str(files / "plain.csv"))) == [("b", 35.0, [30, 5]), ("a", -10.0, [10, -20])]
+    assert ranking(evaluateFile(str(files / "derived.jsonl"))) == [("b", 70.0, [35, 30, 5]), ("a", -20.0, [-10, 10, -20])]
+    assert ranking(evaluateFile(str(files / "saved.dsess"), top=1)) == [("b", 32.5, [30, 5])]
+
+
+def test_evaluate_rejects_unknown_modes(tmp_path):
+    path = tmp_path / "bad.jsonl"
+    path.write_text('{"criterion": "z", "modes": ["bogus", "one", "default"]}\n{"option": "a", "scores": {"z": 1}}\n')
+    with pytest.raises(ValueError, match="normalization modes"):
+        evaluateFile(str(path))
+
+
+def test_format_csv_quotes_fields():
+    result = {"criteria": ["p", "q,r"], "ranking": [{"rank": 1, "option": 'say "hi"', "total": 2.5, "scores": [1, 2]}]}
+    assert formatResult(result, "csv") == 'rank,option,total,p,"q,r"\n1,"say ""hi""",2.5,1,2'
+
+
+def test_output_names(tmp_path):
+    assert outputNames(["d/x.csv", "d/x.jsonl"], "json") == {"d/x.csv": "x.csv.json", "d/x.jsonl": "x.jsonl.json"}
+    with pytest.raises(ValueError, match="both"):
+        outputNames(["d/x.csv", "e/x.csv"], "csv")
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_run_headless_into_directory(files, tmp_path, workers):
+    out = tmp_path / "out"
+    args = parseArgs(["--eval", str(files), "--out", str(out), "--format", "csv", "--workers", workers])
+    assert runHeadless(args) == 0
+    assert sorted(os.listdir(out)) == ["derived.jsonl.csv", "plain.csv.csv", "saved.dsess.csv"]
+    assert (out / "plain.csv.csv").read_text().splitlines()[1] == "1,b,35,30,5"
+
+
+def test_run_headless_reports_failures(files, capsys):
+    (files / "broken.csv").write_text("option,p\na,high\n")
+    args = parseArgs(["--eval", str(files / "broken.csv"), str(files / "plain.csv"), "--workers", "1"])
+    assert runHeadless(args) == 1
+    out, err = capsys.readouterr()
+    assert "broken.csv" in err and "not a number" in err
+    assert json.loads(out)["ranking"][0]["option"] == "b"
+
+
+def test_run_headless_refuses_colliding_outputs(files, tmp_path, capsys):
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "plain.csv").write_text("option,p\na,1\n")
+    args = parseArgs(["--eval", str(files / "plain.csv"), str(other / "plain.csv"), "--out", str(tmp_path / "out")])
+    assert runHeadless(args) == 1
+    assert "would both be written" in capsys.readouterr().err
+    assert not (tmp_path / "out").exists()
+
+
+@pytest.mark.parametrize("value", ["0", "-2", "many"])
+def test_workers_must_be_positive(value, capsys):
+    with pytest.raises(SystemExit) as exit:
+        parseArgs(["--eval", "x.csv", "--workers", value])
+    assert exit.value.code == 2
+    assert "--workers" in capsys.readouterr().err
+
+
+def test_eval_does_not_import_qt(files):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ("import sys, runpy; sys.argv = ['main.py', '--eval', sys.argv[1]]\n"
+            "try:\n    runpy.run_path('main.py', run_name='__main__')\n"
+            "except SystemExit as e:\n    sys.exit(e.code or 'PyQt6' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code, str(files / "plain.csv")], cwd=root, capture_output=True)
+    assert result.returncode == 0, result.stderr
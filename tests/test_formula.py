@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from formula import FormulaError, Parser, bound, compileFormula, tokenize
+
+
+def test_tokenize():
+    assert [(kind, value) for kind, value, start, end in tokenize("2.5 * [cost (€)] + time")] == [
+        ("num", "2.5"), ("op", "*"), ("bracketed", "cost (€)"), ("op", "+"), ("name", "time")]
+    assert [value for kind, value, start, end in tokenize("a<=.5e1")] == ["a", "<=", ".5e1"]
+
+
+def test_tokenize_doubled_bracket():
+    assert tokenize("[a]]b] + 1")[0][:2] == ("bracketed", "a]b")
+    with pytest.raises(FormulaError):
+        tokenize("[a]]")
+
+
+def test_tokenize_rejects_unknown_characters():
+    with pytest.raises(FormulaError, match=r"unexpected .\$ b"):
+        tokenize("a $ b")
+
+
+def test_parser_precedence():
+    tree = Parser("-a + b * c ^ 2").parse()
+    assert tree == ("bin", "+", ("neg", ("ref", 0)), ("bin", "*", ("ref", 1), ("bin", "^", ("ref", 2), ("num", 2.0))))
+
+
+def test_parser_collects_names_once():
+    parser = Parser("max(a, [b c], a) > 0")
+    parser.parse()
+    assert parser.names == ["a", "b c"]
+
+
+@pytest.mark.parametrize("text", ["a +", "(a", "a b", "nope(a)", "clip(a, b)", "abs(a, b)", "min()"])
+def test_parser_errors(text):
+    with pytest.raises(FormulaError):
+        Parser(text).parse()
+
+
+def test_kernel():
+    f = compileFormula("if(a > 0, a / b, -b)")
+    columns = np.array([[2.0, 4.0], [1.0, 0.0], [-1.0, 3.0]])
+    assert f(columns).tolist() == [0.5, 0.0, -3.0]
+
+
+@pytest.mark.parametrize("text, ranges, expected", [
+    ("a + b", [(-1, 2), (3, 4)], (2, 6)),
+    ("a - b", [(-1, 2), (3, 4)], (-5, -1)),
+    ("a * b", [(-1, 2), (-3, 4)], (-6, 8)),
+    ("-a", [(-1, 2)], (-2, 1)),
+    ("abs(a)", [(-3, 2)], (0, 3)),
+    ("min(a, b)", [(-1, 2), (0, 5)], (-1, 2)),
+    ("max(a, b)", [(-1, 2), (0, 5)], (0, 5)),
+    ("clip(a, b, c)", [(-10, 10), (-5, -5), (3, 3)], (-5, 3)),
+    ("clip(a, b, c)", [(-10, 10), (-5, -5), (-8, -8)], (-8, -8)),
+    ("a > b", [(0, 1), (0, 1)], (0, 1)),
+    ("step(a, 1)", [(0, 9)], (0, 1)),
+    ("if(a, b, c)", [(0, 1), (2, 3), (-4, 5)], (-4, 5)),
+])
+def test_bound(text, ranges, expected):
+    assert bound(Parser(text).parse(), ranges) == expected
+
+
+def test_bound_unbounded_division():
+    lo, hi = bound(Parser("a / b").parse(), [(1, 2), (-1, 1)])
+    assert math.isinf(lo) and math.isinf(hi)
+    assert compileFormula("a / b").possible([(1, 2), (-1, 1)]) is None
+
+
+def test_renamed_keeps_text():
+    f = compileFormula("2*cost +  max(cost, [time taken])")
+    assert f.renamed("cost", "price").text == "2*price +  max(price, [time taken])"
+    assert f.renamed("time taken", "t").text == "2*cost +  max(cost, t)"
+
+
+def test_renamed_brackets_when_needed():
+    f = compileFormula("a + b")
+    assert f.renamed("a", "a b").text == "[a b] + b"
+    assert f.renamed("a", "max").text == "[max] + b"
+    g = f.renamed("a", "x]y")
+    assert g.text == "[x]]y] + b"
+    assert g.names == ["x]y", "b"]
+
+
+def test_renamed_leaves_functions():
+    f = compileFormula("max(max, 1) + [max]")
+    assert f.renamed("max", "top").text == "max(top, 1) + top"
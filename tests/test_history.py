@@ -0,0 +1,230 @@
+import numpy as np
+import pytest
+
+from history import AddOption, DeleteOption, History, MoveEntry, RenameEntry, ReplaceDecision, ValueEdit, shifted
+from model import DecisionModel
+
+
+class Tray:
+
+    def __init__(self, target):
+        self.target = target
+        self.names = []
+
+    def renameEntry(self, idx, name):
+        old = self.names[idx]
+        if name:
+            self.names[idx] = name
+            self.target.model.renameOption(old, name)
+        else:
+            del self.names[idx]
+            self.target.model.removeOption(old)
+
+    def moveTo(self, source, dest):
+        self.names.insert(dest, self.names.pop(source))
+
+
+class Target:
+    # the parts of DecisionWindow that commands replay through, for options only
+
+    def __init__(self):
+        self.model = DecisionModel()
+        self.options = Tray(self)
+        self.history = History(self.model, self)
+        self.col = self.model.addCriterion("p")
+
+    def add(self, name, idx=None):
+        idx = len(self.options.names) if idx is None else idx
+        self.options.names.insert(idx, name)
+        row = self.model.addOption(name)
+        self.history.record(AddOption(idx, name, row))
+        return row
+
+    def delete(self, idx):
+        name = self.options.names[idx]
+        row = self.model.row(name)
+        command = DeleteOption(idx, name, row, self.model.values[row].copy())
+        self.history.record(command)
+        self.options.renameEntry(idx, "")
+        self.history.seal()
+        return command
+
+    def rename(self, idx, name):
+        command = self.history.record(RenameEntry("options", idx, self.options.names[idx], name))
+        self.options.renameEntry(idx, name)
+        self.history.seal()
+        return command
+
+    def set(self, name, value):
+        self.model.setValueAt(self.model.row(name), self.col, value)
+        # later values start a new edit instead of joining this one
+        self.history.lastActivity -= 10
+
+    def restoreValues(self, col, rows, values):
+        self.model.setRows(rows, col, values)
+
+    def restoreOption(self, idx, name, row, values):
+        self.options.names.insert(idx, name)
+        self.model.addOption(name, row, values)
+
+    def values(self):
+        return {n: self.model.values[self.model.row(n), self.col] for n in self.options.names}
+
+
+@pytest.fixture
+def target():
+    target = Target()
+    for name in "abc":
+        target.add(name)
+    target.history.seal()
+    return target
+
+
+def test_shifted():
+    assert shifted(3, 1, None) == 2
+    assert shifted(3, None, 3) == 4
+    assert shifted(3, 5, 0) == 4
+    assert shifted(1, 1, None) == 1
+
+
+def test_value_edits_undo_and_redo(target):
+    history = target.history
+    target.set("a", 5)
+    target.set("b", 7)
+    assert target.values() == {"a": 5, "b": 7, "c": 0}
+
+    assert history.undo()
+    assert target.values() == {"a": 5, "b": 0, "c": 0}
+    assert history.undo()
+    assert target.values() == {"a": 0, "b": 0, "c": 0}
+    assert history.redo() and history.redo()
+    assert target.values() == {"a": 5, "b": 7, "c": 0}
+    assert not history.redo()
+
+
+def test_close_edits_join_one_command(target):
+    history = target.history
+    row = target.model.row("a")
+    for value in (1, 2, 3):
+        target.model.setValueAt(row, target.col, value)
+    history.undo()
+    assert target.values()["a"] == 0
+    history.redo()
+    assert target.values()["a"] == 3
+
+
+def test_new_edit_clears_redo(target):
+    history = target.history
+    target.set("a", 5)
+    history.undo()
+    target.set("b", 1)
+    assert not history.redo()
+    assert target.values() == {"a": 0, "b": 1, "c": 0}
+
+
+def test_replaying_records_nothing(target):
+    history = target.history
+    target.set("a", 5)
+    count = len(history.undoStack)
+    history.undo()
+    history.redo()
+    assert len(history.undoStack) == count and history.redoStack == []
+
+
+def test_structure_undo_and_redo(target):
+    history = target.history
+    target.set("b", 9)
+    target.delete(1)
+    assert target.options.names == ["a", "c"] and not target.model.hasOption("b")
+    history.undo()
+    assert target.options.names == ["a", "b", "c"] and target.values()["b"] == 9
+    history.undo()
+    history.undo()
+    history.undo()
+    assert target.options.names == ["a"]
+    while history.redo():
+        pass
+    assert target.options.names == ["a", "c"]
+    assert target.values() == {"a": 0, "c": 0}
+
+
+def test_undo_on_empty_history():
+    target = Target()
+    assert not target.history.undo() and not target.history.redo()
+
+
+def test_budget_drops_oldest_but_keeps_one(target):
+    history = target.history
+    history.budget = 0
+    target.set("a", 1)
+    target.set("b", 2)
+    history.seal()
+    assert len(history.undoStack) == 1
+    history.undo()
+    assert target.values() == {"a": 1, "b": 0, "c": 0}
+    assert not history.undo()
+
+
+def test_rebase_drops_conflicts_and_what_they_depend_on(target):
+    history = target.history
+    target.rename(0, "aa")
+    target.set("c", 6)
+    remote = RenameEntry("options", 1, "b", "bb")
+    target.options.renameEntry(1, "bb")
+    history.rebase([remote])
+    # adding b conflicts, undoing it first needs adding a undone, so both go
+    assert [type(c).__name__ for c in history.undoStack] == ["AddOption", "RenameEntry", "ValueEdit"]
+    while history.undo():
+        pass
+    assert target.options.names == ["a", "bb"]
+
+
+def test_rebase_of_values_in_the_same_column(target):
+    history = target.history
+    target.set("a", 4)
+    remote = ValueEdit()
+    remote.addChanges(np.array([target.model.row("b")]), target.col, np.array([0.0]), np.array([5.0]))
+    remote.compact()
+    history.rebase([remote])
+    assert list(history.undoStack) == []
+
+
+def test_rebase_shifts_positions_past_remote_inserts(target):
+    history = target.history
+    command = target.rename(2, "cc")
+    remote = AddOption(0, "first", target.model.addOption("first"))
+    target.options.names.insert(0, "first")
+    history.rebase([remote])
+    assert command.idx == 3
+    history.undo()
+    assert target.options.names == ["first", "a", "b", "c"]
+
+
+def test_rebase_of_moves(target):
+    history = target.history
+    target.options.moveTo(0, 2)
+    move = history.record(MoveEntry("options", 0, 2))
+    history.rebase([RenameEntry("options", 0, "b", "bb")])
+    assert history.undoStack[-1] is move
+    history.rebase([MoveEntry("options", 1, 0)])
+    assert move not in history.commands()
+
+
+def test_rebase_on_replace_clears_everything_but_exempt(target):
+    history = target.history
+    target.set("a", 1)
+    target.set("b", 2)
+    mine = history.undoStack[-1]
+    history.rebase([ReplaceDecision(None)], exempt={mine})
+    assert list(history.undoStack) == [mine]
+
+
+def test_substitute(target):
+    history = target.history
+    first = target.rename(0, "x")
+    second = target.rename(1, "y")
+    again = RenameEntry("options", 0, "a", "x")
+    history.substitute(first, again)
+    assert list(history.undoStack)[-2:] == [again, second]
+    history.substitute(again, None)
+    assert list(history.undoStack) == [second]
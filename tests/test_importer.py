@@ -0,0 +1,100 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from importer import ImportBatch, checkBatch, collect, csvRecords, jsonlRecords, loadImport, readRecords
+
+
+def nan_list(matrix):
+    return [[None if math.isnan(v) else v for v in row] for row in matrix.tolist()]
+
+
+def test_csv(tmp_path):
+    path = tmp_path / "d.csv"
+    path.write_text("option, p ,q\nx,1,2\n\ny, ,3.5\n ,9,9\n", encoding="utf-8")
+    batch = loadImport(str(path))
+    assert batch.options == ["x", "y"]
+    assert batch.criteria == ["p", "q"]
+    assert nan_list(batch.matrix()) == [[1.0, 2.0], [None, 3.5]]
+
+
+def test_csv_short_and_long_rows():
+    records = list(csvRecords(["option,p,q", "x,1"]))
+    assert records == [{"option": "x", "scores": {"p": "1"}}]
+    with pytest.raises(ValueError, match="line 2"):
+        list(csvRecords(["option,p", "x,1,2"]))
+    assert list(csvRecords([])) == []
+
+
+def test_jsonl(tmp_path):
+    path = tmp_path / "d.jsonl"
+    lines = [
+        {"criterion": "r", "influences": ["p", "q"], "modes": ["mean", "stdev", "invert"]},
+        {"option": "x", "scores": {"p": 1, "q": None}},
+        {"option": "y", "scores": {"q": "2"}},
+        {"option": "x", "scores": {"q": 4}},
+    ]
+    path.write_text("\n".join(json.dumps(l) for l in lines) + "\n\n", encoding="utf-8")
+    batch = loadImport(str(path))
+    assert batch.options == ["x", "y"]
+    assert batch.criteria == ["r", "p", "q"]
+    assert batch.influences == {"r": ["p", "q"]}
+    assert batch.modes == {"r": ["mean", "stdev", "invert"]}
+    assert nan_list(batch.matrix()) == [[None, 1.0, 4.0], [None, None, 2.0]]
+
+
+def test_unknown_extension(tmp_path):
+    with pytest.raises(ValueError, match="expected a .csv or .jsonl"):
+        list(readRecords(str(tmp_path / "d.txt")))
+
+
+@pytest.mark.parametrize("record, message", [
+    ([1, 2], "not an object"),
+    ({"name": "x"}, "neither an option nor a criterion"),
+    ({"option": "x", "scores": [1]}, "not an object"),
+    ({"option": "x", "scores": {"p": "high"}}, "not a number"),
+    ({"option": "x", "scores": {"p": float("inf")}}, "not a number"),
+    ({"criterion": "p", "influences": "q"}, "not a list"),
+    ({"criterion": "p", "modes": "zero"}, "not a list"),
+])
+def test_bad_records(record, message):
+    with pytest.raises(ValueError, match=message):
+        ImportBatch().add(record)
+
+
+def test_jsonl_records_skip_blank_lines():
+    assert list(jsonlRecords(['{"option": "x"}', "  ", ""])) == [{"option": "x"}]
+
+
+def test_check_batch_accepts():
+    batch = collect([{"criterion": "r", "influences": ["p"], "modes": ["range", "minmax", "default"]},
+                     {"option": "x", "scores": {"p": 1}}])
+    checkBatch(batch)
+    checkBatch(batch, {"p": ["s"], "s": []})
+
+
+@pytest.mark.parametrize("records, message", [
+    ([{"option": "", "scores": {}}], "without a name"),
+    ([{"criterion": ""}], "without a name"),
+    ([{"criterion": "z", "modes": ["bogus", "one", "default"]}], "normalization modes"),
+    ([{"criterion": "z", "modes": ["zero", "one"]}], "normalization modes"),
+    ([{"criterion": "z", "influences": ["z"]}], "itself"),
+    ([{"criterion": "z", "influences": ["y"]}, {"criterion": "y", "influences": ["z"]}], "cycle"),
+])
+def test_check_batch_rejects(records, message):
+    with pytest.raises(ValueError, match=message):
+        checkBatch(collect(records))
+
+
+def test_check_batch_sees_existing_influences():
+    batch = collect([{"criterion": "p", "influences": ["r"]}])
+    checkBatch(batch)
+    with pytest.raises(ValueError, match="cycle"):
+        checkBatch(batch, {"r": ["q"], "q": ["p"], "p": []})
+
+
+def test_matrix_of_empty_batch():
+    assert ImportBatch().matrix().shape == (0, 0)
+    assert np.isnan(collect([{"option": "x"}, {"criterion": "p"}]).matrix()).all()
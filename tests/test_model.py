@@ -0,0 +1,194 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from model import DecisionModel
+
+
+class Watcher:
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = []
+        model.watch(self)
+
+    def valuesChanged(self, rows, col, delta):
+        self.calls.append(("values", rows.tolist(), col, delta.tolist()))
+
+    def rowsAdded(self, rows):
+        self.calls.append(("added", np.asarray(rows).tolist()))
+
+    def rowRemoved(self, row):
+        self.calls.append(("removed", row))
+
+    def structureChanged(self):
+        self.calls.append(("structure",))
+
+
+def decision(options=("a", "b", "c"), criteria=("p", "q")):
+    model = DecisionModel()
+    for name in options:
+        model.addOption(name)
+    cols = [model.addCriterion(name) for name in criteria]
+    return model, cols
+
+
+def test_model_does_not_import_qt():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, model, ranking, history, formula, evaluate; sys.exit('PyQt6' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 0
+
+
+def test_add_options():
+    model, (p, q) = decision()
+    assert [model.rowNames[r] for r in model.rows()] == ["a", "b", "c"]
+    assert model.hasOption("b") and not model.hasOption("d")
+    assert model.getValues(p) == {"a": 0, "b": 0, "c": 0}
+    with pytest.raises(KeyError):
+        model.addOption("a")
+
+
+def test_options_grow_past_capacity():
+    model, (p, q) = decision(options=())
+    for i in range(20):
+        model.addOption(f"o{i}")
+        model.setValueAt(model.row(f"o{i}"), q, i)
+    assert len(model.rows()) == 20
+    assert model.getValues(q) == {f"o{i}": i for i in range(20)}
+
+
+def test_removed_slot_is_stable_and_reused():
+    model, (p, q) = decision()
+    a, b, c = model.row("a"), model.row("b"), model.row("c")
+    model.setValueAt(c, p, 7)
+    assert model.removeOption("b") == b
+    assert not model.hasOption("b")
+    assert (model.row("a"), model.row("c")) == (a, c)
+    assert model.values[c, p] == 7
+    assert model.rows().tolist() == [a, c]
+    assert model.addOption("d") == b
+
+
+def test_option_restored_into_its_slot():
+    model, (p, q) = decision()
+    row = model.row("b")
+    model.setValueAt(row, q, 5)
+    saved = model.values[row].copy()
+    model.removeOption("b")
+    assert model.addOption("b", row, saved) == row
+    assert model.values[row, q] == 5
+    with pytest.raises(KeyError):
+        model.addOption("e", row)
+
+
+def test_add_options_in_bulk():
+    model, (p, q) = decision()
+    rows = model.addOptions([f"n{i}" for i in range(10)])
+    assert [model.rowNames[r] for r in rows.tolist()] == [f"n{i}" for i in range(10)]
+    assert len(model.rows()) == 13
+    with pytest.raises(KeyError):
+        model.addOptions(["x", "a"])
+    assert not model.hasOption("x")
+
+
+def test_rename_option():
+    model, (p, q) = decision()
+    row = model.row("a")
+    assert model.renameOption("a", "z") == row
+    assert model.row("z") == row and model.rowNames[row] == "z"
+    assert not model.hasOption("a")
+    with pytest.raises(KeyError):
+        model.renameOption("z", "b")
+
+
+def test_criteria_add_remove_rename():
+    model, (p, q) = decision()
+    assert model.colIndex == {"p": p, "q": q}
+    model.setValueAt(model.row("a"), q, 3)
+    model.removeCriterion(p)
+    assert model.cols().tolist() == [q]
+    assert "p" not in model.colIndex
+    assert model.getValues(q)["a"] == 3
+
+    r = model.addCriterion("r")
+    assert r == p
+    assert model.getValues(r) == {"a": 0, "b": 0, "c": 0}
+    model.renameCriterion(r, "s")
+    assert model.colIndex == {"q": q, "s": r}
+
+
+def test_criteria_grow_and_restore():
+    model, cols = decision(criteria=[f"c{j}" for j in range(6)])
+    assert len(model.cols()) == 6
+    col = cols[2]
+    saved = model.values[:, col].copy()
+    saved[model.row("a")] = 9
+    model.removeCriterion(col)
+    assert model.addCriterion("back", col, saved) == col
+    assert model.getValues(col)["a"] == 9
+    with pytest.raises(KeyError):
+        model.addCriterion("dup", col)
+
+
+def test_duplicate_criterion_name_is_transient():
+    model, (p, q) = decision()
+    model.renameCriterion(q, "p")
+    assert model.colIndex["p"] == p
+    model.renameCriterion(p, "")
+    model.renameCriterion(q, "p")
+    assert model.colIndex == {"p": q}
+
+
+def test_set_values():
+    model, (p, q) = decision()
+    assert model.setValues(p, {"a": 1, "b": 0}) == {"a"}
+    assert model.setRows(np.array([model.row("b"), model.row("c")]), p, [2, 3]).tolist() == [True, True]
+    assert model.setColumn(q, np.array([4, 4, 0])) == {"a", "b"}
+    assert model.getValues(p) == {"a": 1, "b": 2, "c": 3}
+    assert model.column(q).tolist() == [4, 4, 0]
+    assert model.matrix().tolist() == [[1, 4], [2, 4], [3, 0]]
+    assert model.sumColumns([p, q]).tolist() == [5, 6, 3]
+    assert model.sumColumns([]).tolist() == [0, 0, 0]
+
+
+def test_load():
+    model, (p, q) = decision()
+    watcher = Watcher(model)
+    cols = model.load(["x", "y"], np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]))
+    assert cols == [0, 1, 2]
+    assert [model.rowNames[r] for r in model.rows()] == ["x", "y"]
+    assert model.cols().tolist() == [0, 1, 2]
+    assert model.getValues(1) == {"x": 2, "y": 5}
+    assert watcher.calls == [("structure",)]
+    assert model.addOption("z") == 2
+
+
+def test_watchers():
+    model, (p, q) = decision()
+    watcher = Watcher(model)
+    a = model.row("a")
+
+    model.setValueAt(a, p, 5)
+    model.setValueAt(a, p, 5)
+    model.setValues(p, {"a": 2, "b": 0, "c": 4})
+    row = model.addOption("d")
+    model.removeOption("d")
+    rows = model.addOptions(["e", "f"])
+    col = model.addCriterion("r")
+    model.removeCriterion(col)
+    assert watcher.calls == [
+        ("values", [a], p, [5.0]),
+        ("values", [a, model.row("c")], p, [-3.0, 4.0]),
+        ("added", [row]),
+        ("removed", row),
+        ("added", rows.tolist()),
+        ("structure",),
+        ("structure",)
+    ]
+
+    model.unwatch(watcher)
+    model.setValueAt(a, q, 1)
+    assert len(watcher.calls) == 7
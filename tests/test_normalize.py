@@ -0,0 +1,71 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from evaluate import normalizeBatch
+from normalize import CENTER_MODES, RANGE_MODES, INVERT_MODES, Normalizer, RunningStats
+
+
+def check(stats, values):
+    assert stats.ordered == sorted(values.tolist())
+    assert stats.mean() == pytest.approx(values.mean())
+    assert stats.stdev() == pytest.approx(values.std())
+    assert (stats.min(), stats.max()) == (values.min(), values.max())
+
+
+def test_running_stats_empty():
+    stats = RunningStats()
+    assert (stats.mean(), stats.stdev(), stats.min(), stats.max()) == (0.0, 0.0, 0.0, 0.0)
+
+
+def test_running_stats_follow_small_updates():
+    values = np.array([3.0, -1.0, 4.0, 1.0, -5.0, 9.0, 2.0, 6.0])
+    stats = RunningStats()
+    stats.update(values)
+    check(stats, values)
+
+    values = values.copy()
+    values[[1, 5]] = [7.0, -2.0]
+    stats.update(values)
+    check(stats, values)
+
+    # the stats keep their own copy, editing the caller's array changes nothing
+    values[0] = 100.0
+    assert stats.max() == 7.0
+
+
+def test_running_stats_rebuild_on_large_or_resized_updates():
+    rng = np.random.default_rng(0)
+    stats = RunningStats()
+    for size in (10, 10, 12, 3):
+        values = rng.integers(-50, 51, size).astype(float)
+        stats.update(values)
+        check(stats, values)
+
+
+def test_normalizer_rejects_unknown_modes():
+    normalizer = Normalizer()
+    with pytest.raises(ValueError):
+        normalizer.setModes("bogus", "one", "default")
+    assert (normalizer.center, normalizer.range, normalizer.invert) == ("zero", "one", "default")
+
+
+def test_normalizer_bounds():
+    normalizer = Normalizer("mean", "minmax", "default")
+    normalizer.stats.update(np.array([0.0, 2.0, 10.0]))
+    assert normalizer.bounds(-50, 50, 50, 100) == (-2.0, 10.0)
+    normalizer.setModes("manual", "stdev", "default")
+    lo, hi = normalizer.bounds(-10, 30, 50, 100)
+    assert (lo + hi) / 2 == 10.0 and hi - lo == pytest.approx(2 * np.std([0.0, 2.0, 10.0]))
+    normalizer.setModes("range", "possible", "invert")
+    assert normalizer.bounds(-50, 50, 50, 0) == (-45.0, 55.0)
+
+
+@pytest.mark.parametrize("center, range, invert", list(itertools.product(CENTER_MODES, RANGE_MODES, INVERT_MODES)))
+def test_normalizer_matches_headless_evaluation(center, range, invert):
+    sums = np.array([-30.0, 5.0, 12.0, 40.0, 41.0])
+    crit = {"modes": [center, range, invert], "rmin": -20, "rmax": 60, "unit": 50, "span": [-50, 50]}
+    scaled, lo, hi = Normalizer(center, range, invert).apply(sums, -20, 60, -50, 50, 50, 80)
+    expected = normalizeBatch(sums, crit, 80)
+    assert np.clip(np.trunc(scaled), -50, 50).tolist() == expected.tolist()
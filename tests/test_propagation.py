@@ -0,0 +1,129 @@
+import pytest
+
+from propagation import Propagator, Reachability, orderIndices
+
+
+class Node:
+
+    def __init__(self, name, log, changes=True):
+        self.name = name
+        self.log = log
+        self.changes = changes
+        self.influences = set()
+        self.receives = set()
+
+    def recalc(self):
+        self.log.append(self.name)
+        return self.changes
+
+    def __repr__(self):
+        return self.name
+
+
+def graph(edges, unchanged=()):
+    # edges maps each node name to the names it is influenced by
+    log = []
+    nodes = {}
+    for name in edges:
+        nodes[name] = Node(name, log, name not in unchanged)
+    propagator = Propagator()
+    for name, influences in edges.items():
+        connect(propagator, nodes[name], {nodes[i] for i in influences})
+    return propagator, nodes, log
+
+
+def connect(propagator, node, influences):
+    propagator.reach.setInfluences(node, influences)
+    for i in node.influences - influences:
+        i.receives.discard(node)
+    for i in influences:
+        i.receives.add(node)
+    node.influences = influences
+
+
+def test_diamond_recomputes_each_node_once():
+    propagator, n, log = graph({"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"]})
+    propagator.changed(n["a"])
+    assert sorted(log) == ["b", "c", "d"]
+    assert log[-1] == "d"
+    assert propagator.recalcs == 3
+
+
+def test_unchanged_inputs_stop_propagation():
+    propagator, n, log = graph({"a": [], "b": ["a"], "c": ["b"], "d": ["a", "c"]}, unchanged={"b"})
+    propagator.changed(n["a"])
+    assert log == ["b", "d"]
+
+
+def test_forced_node_recomputes_without_changed_inputs():
+    propagator, n, log = graph({"a": [], "b": ["a"], "c": ["b"]}, unchanged={"b"})
+    propagator.recompute(n["b"])
+    assert log == ["b"]
+    n["b"].changes = True
+    propagator.recompute(n["b"])
+    assert log == ["b", "b", "c"]
+
+
+def test_propagation_does_not_reenter():
+    propagator, n, log = graph({"a": [], "b": ["a"]})
+    n["b"].recalc = lambda: log.append("b") or propagator.changed(n["a"]) or True
+    propagator.changed(n["a"])
+    assert log == ["b"]
+    assert not propagator.running
+
+
+def test_cycles_are_rejected():
+    propagator, n, log = graph({"a": [], "b": ["a"], "c": ["b"]})
+    with pytest.raises(ValueError):
+        connect(propagator, n["a"], {n["c"]})
+    with pytest.raises(ValueError):
+        connect(propagator, n["a"], {n["a"]})
+    assert propagator.reach.downstream(n["c"]) == {n["c"]}
+    assert propagator.reach.wouldCycle(n["c"], n["a"])
+
+
+def test_closure_follows_removed_edges():
+    propagator, n, log = graph({"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"], "e": ["d"]})
+    reach = propagator.reach
+    assert reach.downstream(n["a"]) == {n[x] for x in "abcde"}
+
+    connect(propagator, n["d"], {n["c"]})
+    assert reach.downstream(n["b"]) == {n["b"]}
+    assert reach.downstream(n["a"]) == {n[x] for x in "abcde"}
+    assert not reach.reaches(n["b"], n["e"])
+
+    connect(propagator, n["d"], set())
+    assert reach.downstream(n["a"]) == {n["a"], n["b"], n["c"]}
+    assert reach.downstream(n["d"]) == {n["d"], n["e"]}
+
+    # the edge that would have closed a cycle through d is fine once d is cut loose
+    connect(propagator, n["a"], {n["e"]})
+    assert reach.reaches(n["d"], n["c"])
+
+
+def test_removed_nodes_free_their_bit():
+    reach = Reachability()
+    a, b, c = object(), object(), object()
+    reach.setInfluences(b, {a})
+    bit = reach.bits[b]
+    reach.remove(b)
+    assert b not in reach.bits and reach.downstream(a) == {a}
+
+    reach.setInfluences(c, {a})
+    assert reach.bits[c] == bit
+    assert reach.downstream(a) == {a, c}
+    assert reach.downstream(b) == {b}
+
+
+def test_removing_a_middle_node_splits_the_closure():
+    propagator, n, log = graph({"a": [], "b": ["a"], "c": ["b"]})
+    propagator.reach.remove(n["b"])
+    assert propagator.reach.downstream(n["a"]) == {n["a"]}
+    assert propagator.reach.downstream(n["c"]) == {n["c"]}
+
+
+def test_order_indices():
+    order = orderIndices([[1, 2], [], [1]])
+    assert order.index(1) < order.index(2) < order.index(0)
+    with pytest.raises(ValueError):
+        orderIndices([[1], [0]])
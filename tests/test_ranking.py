@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from model import DecisionModel
+from ranking import RankingEngine
+
+
+class Panel:
+
+    def __init__(self):
+        self.changes = 0
+
+    def rankingChanged(self):
+        self.changes += 1
+
+
+def decision(options=("a", "b", "c", "d"), criteria=("p", "q", "r")):
+    model = DecisionModel()
+    for name in options:
+        model.addOption(name)
+    cols = [model.addCriterion(name) for name in criteria]
+    engine = RankingEngine(model)
+    panel = Panel()
+    engine.watch(panel)
+    return model, cols, engine, panel
+
+
+def expected(model, engine):
+    rows = model.rows()
+    weights = np.array([engine.weight(c) for c in model.cols().tolist()])
+    totals = model.values[np.ix_(rows, model.cols())] @ weights
+    return {model.rowNames[r]: t for r, t in zip(rows.tolist(), totals.tolist())}
+
+
+def check(model, engine):
+    totals = expected(model, engine)
+    top = engine.top(len(totals))
+    assert dict(top) == pytest.approx(totals)
+    assert [t for n, t in top] == sorted(totals.values(), reverse=True)
+
+
+def test_totals_follow_value_changes():
+    model, (p, q, r), engine, panel = decision()
+    model.setValues(p, {"a": 10, "b": -5, "c": 3})
+    model.setValues(q, {"b": 20, "d": 1})
+    check(model, engine)
+    assert engine.top(2) == [("b", 15.0), ("a", 10.0)]
+    assert panel.changes == 2
+
+
+def test_whole_column_update():
+    model, (p, q, r), engine, panel = decision()
+    model.setColumn(r, np.array([4, 3, 2, 1]))
+    check(model, engine)
+    model.setColumn(r, np.array([1, 2, 3, 4]))
+    assert [n for n, t in engine.top(4)] == ["d", "c", "b", "a"]
+    assert panel.changes == 2
+
+
+def test_weights_and_exclusion():
+    model, (p, q, r), engine, panel = decision()
+    model.setValues(p, {"a": 10, "b": 1})
+    model.setValues(q, {"a": -10, "b": 1})
+    engine.setWeight(q, 2.0)
+    check(model, engine)
+    assert engine.top(1) == [("b", 3.0)]
+
+    engine.setIncluded(q, False)
+    assert not engine.isIncluded(q) and engine.weight(q) == 0.0
+    assert engine.top(1) == [("a", 10.0)]
+    # excluded criteria do not move the totals
+    changes = panel.changes
+    model.setValues(q, {"c": 50})
+    assert panel.changes == changes
+    check(model, engine)
+
+    engine.setIncluded(q, True)
+    check(model, engine)
+    assert engine.top(1) == [("c", 100.0)]
+
+
+def test_unchanged_weight_does_not_rebuild():
+    model, (p, q, r), engine, panel = decision()
+    engine.setWeight(p, 1.0)
+    engine.setIncluded(p, True)
+    assert panel.changes == 0
+
+
+def test_rows_added_and_removed():
+    model, (p, q, r), engine, panel = decision()
+    model.setValues(p, {"a": 5})
+    rows = model.addOptions([f"n{i}" for i in range(20)])
+    model.setRows(rows, q, np.arange(20))
+    check(model, engine)
+    assert engine.top(1) == [("n19", 19.0)]
+
+    model.removeOption("n19")
+    check(model, engine)
+    assert engine.top(1) == [("n18", 18.0)]
+    assert model.addOption("back") == rows[-1]
+    check(model, engine)
+
+
+def test_removed_criterion_forgets_its_weight():
+    model, (p, q, r), engine, panel = decision()
+    model.setValues(r, {"d": 7})
+    engine.setWeight(r, 3.0)
+    engine.setIncluded(q, False)
+    model.removeCriterion(r)
+    model.removeCriterion(q)
+    assert engine.weights == {} and engine.excluded == set()
+    check(model, engine)
+
+    col = model.addCriterion("s")
+    assert col in (q, r) and engine.weight(col) == 1.0
+
+
+def test_top_of_nothing():
+    model, cols, engine, panel = decision(options=(), criteria=())
+    assert engine.top(3) == []
+    model, cols, engine, panel = decision()
+    assert engine.top(0) == []
+    assert len(engine.top(10)) == 4
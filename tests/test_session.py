@@ -0,0 +1,111 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from session import ALIGN, PREFIX, checkHeader, readHeader, readSession, writeSession
+
+
+def criterion(name, influences=(), **spec):
+    return dict({"name": name, "rmin": -50, "rmax": 50, "modes": ["zero", "one", "default"],
+                 "influences": list(influences)}, **spec)
+
+
+def header(options=("a", "b", "c"), criteria=None):
+    criteria = criteria if criteria is not None else [
+        criterion("p"), criterion("q"), criterion("r", [0, 1], weights=[2.0, 0.5], formula="p * q")]
+    return {"options": list(options), "criteria": criteria}
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "d.dsess"
+    matrix = np.arange(9, dtype=float).reshape(3, 3)
+    writeSession(path, header(), matrix)
+
+    loaded, values = readSession(path)
+    assert loaded["options"] == ["a", "b", "c"]
+    assert loaded["criteria"][2]["formula"] == "p * q"
+    assert loaded["shape"] == [3, 3]
+    assert values.tolist() == matrix.tolist()
+
+    # the mapping is copy on write, edits never reach the file
+    values[0, 0] = 99
+    assert readSession(path)[1][0, 0] == 0
+
+
+def test_matrix_is_aligned(tmp_path):
+    path = tmp_path / "d.dsess"
+    writeSession(path, header(), np.zeros((3, 3)))
+    loaded, offset = readHeader(path)
+    assert offset % ALIGN == 0
+    assert path.stat().st_size == offset + 9 * 8
+
+
+def test_empty_decision(tmp_path):
+    path = tmp_path / "d.dsess"
+    writeSession(path, header(options=(), criteria=[]), np.zeros((0, 0)))
+    loaded, values = readSession(path)
+    assert loaded["options"] == [] and values.shape == (0, 0)
+
+
+def test_not_a_session(tmp_path):
+    path = tmp_path / "d.dsess"
+    path.write_bytes(PREFIX.pack(b"NOPE", 1, 0))
+    with pytest.raises(ValueError, match="not a decision session"):
+        readSession(path)
+    path.write_bytes(PREFIX.pack(b"DSLS", 7, 0))
+    with pytest.raises(ValueError, match="version 7"):
+        readSession(path)
+    path.write_bytes(b"DSLS")
+    with pytest.raises(struct.error):
+        readSession(path)
+
+
+def test_truncated_matrix(tmp_path):
+    path = tmp_path / "d.dsess"
+    writeSession(path, header(), np.zeros((3, 3)))
+    path.write_bytes(path.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        readSession(path)
+
+
+def test_malformed_header_fields(tmp_path):
+    path = tmp_path / "d.dsess"
+    blob = json.dumps({"options": ["a"], "criteria": [{"name": "p", "rmin": None, "rmax": 1,
+                                                       "modes": ["zero", "one", "default"], "influences": []}],
+                       "shape": [1, 1], "dtype": "<f8"}).encode()
+    path.write_bytes(PREFIX.pack(b"DSLS", 1, len(blob)) + blob + bytes(ALIGN))
+    with pytest.raises(ValueError, match="malformed"):
+        readSession(path)
+
+
+def checked(h):
+    checkHeader(dict(h, shape=[len(h["options"]), len(h["criteria"])]))
+
+
+@pytest.mark.parametrize("options, criteria, message", [
+    (["a", "a"], [], "option names"),
+    (["a", ""], [], "option names"),
+    (["a"], [criterion("p"), criterion("p")], "criterion names"),
+    (["a"], [criterion("p", modes=["zero", "one", "upside"])], "normalization modes"),
+    (["a"], [criterion("p", [0])], "bad influences"),
+    (["a"], [criterion("p", [3])], "bad influences"),
+    (["a"], [criterion("p"), criterion("q", [0], weights=[1, 2])], "weights"),
+    (["a"], [criterion("p"), criterion("q"), criterion("r", [0], formula="p + q")], "formula"),
+    (["a"], [criterion("p", [1]), criterion("q", [0])], "cycle"),
+])
+def test_check_header_rejects(options, criteria, message):
+    with pytest.raises(ValueError, match=message):
+        checked(header(options, criteria))
+
+
+def test_check_header_rejects_wrong_shape():
+    with pytest.raises(ValueError, match="matrix"):
+        checkHeader(dict(header(), shape=[3, 2]))
+
+
+def test_check_header_missing_fields():
+    h = header(criteria=[{"name": "p", "influences": []}])
+    with pytest.raises(KeyError):
+        checked(h)
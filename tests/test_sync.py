@@ -0,0 +1,150 @@
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+QApplication = pytest.importorskip("PyQt6.QtWidgets").QApplication
+
+from sync import SyncHub, LocalTransport, SyncClient
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def settle(app, seconds=0.1):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        app.processEvents()
+
+
+def state(window):
+    crits = window.criteria.getItems()
+    return (window.options.getNames(), [c.rname for c in crits],
+            {c.rname: sorted(i.rname for i in c.influences) for c in crits},
+            {c.rname: c.getValues() for c in crits})
+
+
+def decision(options=(), criteria=()):
+    from window import DecisionWindow
+
+    window = DecisionWindow()
+    for name in options:
+        window.options.creator.setText(name)
+        window.options.createNew()
+    for name in criteria:
+        window.criteria.creator.setText(name)
+        window.criteria.createNew()
+    return window
+
+
+def join(app, hub, window):
+    client = SyncClient(window, LocalTransport(hub))
+    client.start()
+    settle(app)
+    return client
+
+
+@pytest.fixture
+def pair(app):
+    hub = SyncHub()
+    a = decision("xyz", "pq")
+    a.criteria.getItems()[0].setValues({"x": 20, "y": -10})
+    clients = [join(app, hub, a)]
+    b = decision(["junk"])
+    clients.append(join(app, hub, b))
+    return hub, a, b, clients
+
+
+def test_join_catches_up(app, pair):
+    hub, a, b, clients = pair
+    assert state(b) == state(a)
+    assert b.options.getNames() == ["x", "y", "z"]
+
+    a.criteria.creator.setText("r")
+    a.criteria.createNew()
+    settle(app)
+    p, q, r = a.criteria.getItems()
+    spec = r.configSpec()
+    spec["influences"], spec["formula"] = [p.col, q.col], "max(p, q) * 2"
+    a.configureCriterion(r.col, spec)
+    r.recompute()
+    settle(app)
+
+    late = decision()
+    join(app, hub, late)
+    assert state(late) == state(a) == state(b)
+    assert late.criteria.getItems()[2].formula.text == "max(p, q) * 2"
+
+
+def test_values_reach_peer(app, pair):
+    hub, a, b, clients = pair
+    b.criteria.getItems()[1].setValues({"z": 30})
+    settle(app)
+    assert a.criteria.getItems()[1].getValues()["z"] == 30
+    assert state(a) == state(b)
+
+
+def test_conflicting_renames_first_wins(app, pair):
+    hub, a, b, clients = pair
+    a.options.renameEntry(0, "xa")
+    b.options.renameEntry(0, "xb")
+    settle(app)
+    assert a.options.getNames() == b.options.getNames() == ["xa", "y", "z"]
+    assert state(a) == state(b)
+
+
+def test_conflicting_delete_and_rename(app, pair):
+    hub, a, b, clients = pair
+    a.options.renameEntry(2, "")
+    b.options.renameEntry(2, "zz")
+    settle(app)
+    assert a.options.getNames() == b.options.getNames() == ["x", "y"]
+    # b's rename lost, undo must not bring it back
+    b.undo()
+    settle(app)
+    assert "zz" not in b.options.getNames()
+
+
+def test_remote_edit_keeps_unrelated_history(app, pair):
+    hub, a, b, clients = pair
+    a.options.creator.setText("w")
+    a.options.createNew()
+    settle(app)
+    b.options.renameEntry(1, "yy")
+    settle(app)
+    assert a.options.getNames() == ["x", "yy", "z", "w"]
+
+    a.undo()
+    settle(app)
+    assert a.options.getNames() == b.options.getNames() == ["x", "yy", "z"]
+
+
+def test_remote_insert_shifts_local_history(app, pair):
+    hub, a, b, clients = pair
+    a.options.renameEntry(2, "za")
+    settle(app)
+    b.options.insertEntry(0, "first")
+    settle(app)
+    a.undo()
+    settle(app)
+    assert a.options.getNames() == b.options.getNames() == ["first", "x", "y", "z"]
+
+
+def test_import_reaches_peer(app, pair, tmp_path):
+    hub, a, b, clients = pair
+    path = tmp_path / "more.csv"
+    path.write_text("option,p,s\nx,5,7\nnew,1,2\n")
+    a.importFile(str(path))
+    settle(app)
+    assert "new" in b.options.getNames()
+    assert [c.rname for c in b.criteria.getItems()] == ["p", "q", "s"]
+    assert state(a) == state(b)
+
+    a.undo()
+    settle(app)
+    assert state(a) == state(b)
+    assert "new" not in b.options.getNames()
@@ -0,0 +1,1041 @@
+import csv
+import os
+import struct
+
+import numpy as np
+
+from PyQt6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QSizePolicy, QVBoxLayout, QPushButton, QDialog, QLabel, QCheckBox, QButtonGroup, QRadioButton, QGroupBox, QGridLayout, QFileDialog, QDoubleSpinBox, QTableWidget, QTableWidgetItem, QMessageBox, QListView, QLineEdit, QScrollArea
+from PyQt6.QtCore import pyqtSignal, pyqtSlot, Qt, QObject, QTimer, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QEvent
+from PyQt6.QtGui import QShortcut, QKeySequence, QFont
+
+from model import DecisionModel
+from propagation import Propagator
+from recompute import AsyncPropagator
+from normalize import Normalizer
+from formula import compileFormula, FormulaError
+from scheduler import UpdateScheduler
+from session import readSession, writeSession
+from importer import loadImport, checkBatch
+from ranking import RankingEngine
+from history import History, AddOption, DeleteOption, RenameEntry, MoveEntry, AddCriterion, DeleteCriterion, ConfigureCriterion, ReplaceDecision
+from sliders import MultiSlider, PaintedMultiSlider
+from reorderable import ReorderTray, VirtualReorderTray
+
+# above this many options a widget per option and handle takes minutes to lay out,
+# the window switches to the virtual tray and painted sliders
+LARGE_DECISION = 1000
+
+
+class DecisionWindow(QMainWindow):
+
+    # every structural change made to the decision, as the command that would undo it
+    edited = pyqtSignal(object)
+
+    def __init__(self, painted=False, virtual=False, profiler=None, threaded=False):
+        super().__init__()
+
+        self.sliderClass = PaintedMultiSlider if painted else MultiSlider
+
+        self.setWindowTitle("◌ 	◍ 	◎")
+
+        self.model = DecisionModel()
+        self.reservedColumns = []
+        if threaded:
+            self.propagator = AsyncPropagator(self.model, self.recomputeInputs, self.applyRecompute)
+            self.propagator.failed.connect(lambda message: self.statusBar().showMessage(f"≈ {message}", 5000))
+        else:
+            self.propagator = Propagator()
+        self.criteriaList = CriterionList()
+        self.scheduler = UpdateScheduler()
+        self.ranking = RankingEngine(self.model)
+        self.history = History(self.model, self)
+        self.restoring = {}
+
+        central = QWidget()
+        self.setCentralWidget(central)
+        layout = QHBoxLayout()
+        central.setLayout(layout)
+
+        self.options = self.optionsTray(virtual)
+        layout.addWidget(self.options)
+
+        self.criteria = ReorderTray(-1, False, self.blankCriterion, "▥")
+        self.criteria.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Maximum)
+        self.criteria.insideDeleted.connect(self.criterionDeleted)
+        self.criteria.entryChanged.connect(self.criteriaChanged)
+        self.criteria.entryMoved.connect(self.criteriaMoved)
+
+        # only criteria near the visible part of the tray build their handle widgets
+        self.criteriaScroll = QScrollArea()
+        self.criteriaScroll.setWidget(self.criteria)
+        self.criteriaScroll.setWidgetResizable(True)
+        layout.addWidget(self.criteriaScroll)
+
+        self.visibilityTimer = QTimer(self)
+        self.visibilityTimer.setSingleShot(True)
+        self.visibilityTimer.timeout.connect(self.updateVisibleCriteria)
+        scrollBar = self.criteriaScroll.horizontalScrollBar()
+        scrollBar.valueChanged.connect(self.scheduleVisibility)
+        scrollBar.rangeChanged.connect(self.scheduleVisibility)
+        self.criteria.installEventFilter(self)
+
+        self.rankingPanel = RankingPanel(self.ranking, 10)
+        self.rankingPanel.setFixedWidth(160)
+        self.rankingPanel.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Maximum)
+        self.ranking.watch(self.rankingPanel)
+        layout.addWidget(self.rankingPanel, alignment=Qt.AlignmentFlag.AlignTop)
+
+        QShortcut(QKeySequence.StandardKey.Save, self).activated.connect(self.promptSave)
+        QShortcut(QKeySequence.StandardKey.Open, self).activated.connect(self.promptLoad)
+        QShortcut(QKeySequence("Ctrl+I"), self).activated.connect(self.promptImport)
+        QShortcut(QKeySequence("Ctrl+M"), self).activated.connect(self.runSensitivity)
+        QShortcut(QKeySequence.StandardKey.Undo, self).activated.connect(self.undo)
+        QShortcut(QKeySequence.StandardKey.Redo, self).activated.connect(self.redo)
+
+        if profiler is not None:
+            self.overlay = ProfileOverlay(profiler, self)
+            self.scheduler.flushed.connect(self.overlay.refresh)
+            QShortcut(QKeySequence("Ctrl+P"), self).activated.connect(self.overlay.toggle)
+
+        self.sensitivity = SensitivityRunner()
+        self.sensitivity.finished.connect(self.sensitivityFinished)
+        self.sensitivity.failed.connect(lambda message: QMessageBox.warning(self, "◌ ◍ ◎ ≈", message))
+
+    def optionsTray(self, virtual):
+        if virtual:
+            tray = VirtualReorderTray(2, True, "▰")
+        else:
+            tray = ReorderTray(2, True, None, "▰")
+        tray.entryChanged.connect(self.optionsChanged)
+        tray.entryMoved.connect(self.optionsMoved)
+        tray.setFixedWidth(220)
+        tray.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Expanding)
+        return tray
+
+    def isLight(self):
+        return isinstance(self.options, VirtualReorderTray) and self.sliderClass is PaintedMultiSlider
+
+    def lighten(self):
+        # one way, a decision that grew this large once is likely to again; sliders built
+        # before this keep their class, callers rebuild them through replaceDecision
+        self.sliderClass = PaintedMultiSlider
+        if isinstance(self.options, VirtualReorderTray):
+            return
+        tray = self.optionsTray(True)
+        tray.setNames(self.options.getNames())
+        self.centralWidget().layout().replaceWidget(self.options, tray)
+        self.options.deleteLater()
+        self.options = tray
+
+    def multisliders(self):
+        return [crit.mslider for crit in self.criteria.getItems()]
+
+    @pyqtSlot()
+    def blankCriterion(self, reorderable):
+        col = self.reservedColumns.pop(0) if self.reservedColumns else self.model.addCriterion()
+        mslider = self.sliderClass(150, 500, self.model, col)
+        mslider.release()
+        mslider.addHandles(self.options.getNames())
+        mslider.setScheduler(self.scheduler)
+        mslider.changeForward.connect(self.newForward)
+
+        criterion = Criterion(mslider, self.criteriaList, reorderable, self.propagator, self.ranking, self.history)
+        criterion.configured.connect(self.edited)
+        self.criteriaList.append(criterion)
+        self.scheduleVisibility()
+        return criterion
+
+    @pyqtSlot()
+    def scheduleVisibility(self):
+        self.visibilityTimer.start(0)
+
+    def eventFilter(self, source, event):
+        if source is self.criteria and event.type() == QEvent.Type.Resize:
+            self.scheduleVisibility()
+        return super().eventFilter(source, event)
+
+    @pyqtSlot()
+    def updateVisibleCriteria(self):
+        self.criteria.layout().activate()
+        if self.criteria.width() < self.criteria.minimumSizeHint().width():
+            # the scroll area has not grown the tray yet, its resize runs this again
+            return
+        width = self.criteriaScroll.viewport().width()
+        left = -self.criteria.x() - width
+        right = -self.criteria.x() + 2 * width
+        for r in self.criteria.reorderables:
+            geometry = r.geometry()
+            if geometry.right() >= left and geometry.left() <= right:
+                r.inside.mslider.materialize()
+            else:
+                r.inside.mslider.release()
+
+    @pyqtSlot()
+    def promptSave(self):
+        path, _ = QFileDialog.getSaveFileName(self, "", "", "◌◍◎ (*.dsess)")
+        if path:
+            self.saveSession(path)
+
+    @pyqtSlot()
+    def promptLoad(self):
+        path, _ = QFileDialog.getOpenFileName(self, "", "", "◌◍◎ (*.dsess)")
+        if path:
+            self.openSession(path)
+
+    def openSession(self, path):
+        try:
+            self.loadSession(path)
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            QMessageBox.warning(self, "◌ ◍ ◎", f"{os.path.basename(path)}: {e}")
+
+    @pyqtSlot()
+    def promptImport(self):
+        path, _ = QFileDialog.getOpenFileName(self, "", "", "◌◍◎ (*.csv *.jsonl)")
+        if path:
+            try:
+                self.importFile(path)
+            except (OSError, ValueError, csv.Error) as e:
+                QMessageBox.warning(self, "◌ ◍ ◎", f"{os.path.basename(path)}: {e}")
+
+    def importFile(self, path):
+        batch = loadImport(path)
+        self.checkImport(batch)
+        self.replaceWith(lambda: self.applyImport(batch))
+
+    def checkImport(self, batch):
+        # everything that could fail halfway through applyImport, checked while nothing has changed
+        checkBatch(batch, {c.rname: [i.rname for i in c.influences] for c in self.criteria.getItems()})
+
+    def applyImport(self, batch):
+        new_options = [n for n in batch.options if not self.model.hasOption(n)]
+        if len(self.model.rows()) + len(new_options) > LARGE_DECISION and not self.isLight():
+            self.lighten()
+            self.replaceDecision(*self.snapshot())
+        if new_options:
+            self.options.appendNames(new_options)
+            self.model.addOptions(new_options)
+            self.applyStructure(add=new_options)
+
+        crits = {}
+        for name in batch.criteria:
+            if name in self.model.colIndex:
+                crits[name] = self.criterionFor(self.model.colIndex[name])
+            else:
+                self.criteria.creator.setText(name)
+                self.criteria.createNew()
+                crits[name] = self.criteria.getItems()[-1]
+
+        matrix = batch.matrix()
+        positions = np.searchsorted(self.model.rows(), [self.model.row(n) for n in batch.options])
+        sources = set()
+        for j, name in enumerate(batch.criteria):
+            given = ~np.isnan(matrix[:, j])
+            if not given.any():
+                continue
+            crit = crits[name]
+            column = self.model.column(crit.col).copy()
+            column[positions[given]] = matrix[given, j]
+            if crit.mslider.setColumn(column):
+                sources.add(crit)
+
+        for name, modes in batch.modes.items():
+            crits[name].updateNormalization(*modes, recalc=False)
+        derived = set()
+        for name, influences in batch.influences.items():
+            crits[name].updateInfluences({crits[i] for i in influences}, recalc=False)
+            if influences:
+                derived.add(crits[name])
+
+        self.propagator.propagate(sources | derived, derived)
+
+    def closeEvent(self, event):
+        self.sensitivity.shutdown()
+        if isinstance(self.propagator, AsyncPropagator):
+            self.propagator.shutdown()
+        super().closeEvent(event)
+
+    @pyqtSlot()
+    def runSensitivity(self, trials=2000):
+        if self.sensitivity.running():
+            return
+        header, matrix = self.snapshot()
+        self.sensitivityNames = header["options"]
+        self.sensitivity.start(header["criteria"], matrix, trials)
+
+    @pyqtSlot(object)
+    def sensitivityFinished(self, stats):
+        SensitivityReport(stats.report(self.sensitivityNames)).exec()
+
+    def saveSession(self, path):
+        writeSession(path, *self.snapshot())
+
+    def snapshot(self):
+        names = self.options.getNames()
+        crits = self.criteria.getItems()
+        rows = [self.model.row(n) for n in names]
+        cols = [c.col for c in crits]
+        header = {
+            "options": names,
+            "criteria": self.criterionSpecs(crits)
+        }
+        return header, self.model.values[np.ix_(rows, cols)]
+
+    def criterionSpecs(self, crits):
+        index = {c: j for j, c in enumerate(crits)}
+        return [dict({
+            "name": c.rname,
+            "rmin": c.rmin,
+            "rmax": c.rmax,
+            "modes": [c.normalizer.center, c.normalizer.range, c.normalizer.invert],
+            "weight": self.ranking.weights.get(c.col, 1.0),
+            "included": self.ranking.isIncluded(c.col),
+            "span": [c.mslider.curr_min * c.mslider.step, c.mslider.curr_max * c.mslider.step],
+            "unit": c.mslider.step
+        }, **self.combinationSpec(c, index)) for c in crits]
+
+    def combinationSpec(self, crit, index):
+        # influences outside index are left out, recompute jobs only carry the criteria they read
+        influences = sorted((i for i in crit.influences if i in index), key=index.get)
+        spec = {"influences": [index[i] for i in influences]}
+        if crit.influenceWeights:
+            spec["weights"] = [crit.influenceWeights.get(i, 1.0) for i in influences]
+        if crit.formula is not None:
+            spec["formula"] = crit.formula.text
+        return spec
+
+    def recomputeInputs(self, needed):
+        crits = [c for c in self.criteria.getItems() if c in needed]
+        rows = self.model.rows()
+        cols = [c.col for c in crits]
+        return crits, rows, self.model.values[np.ix_(rows, cols)], self.criterionSpecs(crits)
+
+    def applyRecompute(self, crits, rows, results):
+        # the structure may have changed while the worker ran, the caller retries then
+        if not np.array_equal(rows, self.model.rows()) or not set(crits) <= set(self.criteria.getItems()):
+            return False
+        for j, (column, rmin, rmax) in results.items():
+            crits[j].rmin, crits[j].rmax = rmin, rmax
+            crits[j].mslider.setColumn(column)
+        return True
+
+    def loadSession(self, path):
+        # readSession validates the whole header, nothing is touched until it has
+        header, matrix = readSession(path)
+        self.replaceWith(lambda: self.replaceDecision(header, matrix))
+
+    def replaceWith(self, change):
+        # change rewrites the decision in bulk, it is recorded and reported as one edit
+        command = self.history.record(ReplaceDecision(self.snapshot()))
+        self.history.replay(lambda target: target.quietly(change))
+        command.after = self.snapshot()
+        self.history.seal()
+        self.edited.emit(command)
+
+    def quietly(self, change):
+        # the adds and deletes change makes along the way are not edits of their own
+        blocked = self.blockSignals(True)
+        try:
+            change()
+        finally:
+            self.blockSignals(blocked)
+
+    def restoreDecision(self, header, matrix):
+        # undo and remote snapshots come through here, peers and the log see it as a fresh replace
+        command = self.history.record(ReplaceDecision(self.snapshot()))
+        self.quietly(lambda: self.replaceDecision(header, matrix))
+        command.after = self.snapshot()
+        self.edited.emit(command)
+
+    def replaceDecision(self, header, matrix):
+        for r in reversed(self.criteria.reorderables):
+            r.setName("")
+        if len(header["options"]) > LARGE_DECISION:
+            self.lighten()
+        self.options.setNames(header["options"])
+        self.reservedColumns = self.model.load(header["options"], matrix)
+
+        for spec in header["criteria"]:
+            self.criteria.creator.setText(spec["name"])
+            self.criteria.createNew()
+
+        crits = self.criteria.getItems()
+        for c, spec in zip(crits, header["criteria"]):
+            c.updateRange(spec["rmin"], spec["rmax"], recalc=False)
+            c.updateNormalization(*spec["modes"], recalc=False)
+            c.updateWeight(spec.get("weight", 1.0), spec.get("included", True))
+            c.updateInfluences({crits[i] for i in spec["influences"]}, recalc=False)
+        for c, spec in zip(crits, header["criteria"]):
+            weights = dict(zip((crits[i] for i in spec["influences"]), spec.get("weights") or ()))
+            c.updateCombination(weights, spec.get("formula", ""), recalc=False)
+
+    @pyqtSlot(int)
+    def newForward(self, row):
+        for mslider in self.multisliders():
+            mslider.bringForward(row)
+
+    @pyqtSlot(int, str, str)
+    def optionsChanged(self, idx, oldname, newname):
+        if oldname == "":
+            row = self.model.addOption(newname, *self.restoring.pop(newname, ()))
+            command = self.history.record(AddOption(idx, newname, row))
+            self.applyStructure(add=[newname])
+        elif newname == "":
+            row = self.model.row(oldname)
+            command = self.history.record(DeleteOption(idx, oldname, row, self.model.values[row].copy()))
+            self.applyStructure(delete=[oldname])
+            self.model.removeOption(oldname)
+        else:
+            command = self.history.record(RenameEntry("options", idx, oldname, newname))
+            self.model.renameOption(oldname, newname)
+            self.applyStructure(rename={oldname: newname})
+        self.history.seal()
+        self.edited.emit(command)
+
+    @pyqtSlot(int, int)
+    def optionsMoved(self, source, dest):
+        self.edited.emit(self.history.record(MoveEntry("options", source, dest)))
+        self.history.seal()
+
+    @pyqtSlot(int, str, str)
+    def criteriaChanged(self, idx, oldname, newname):
+        # deletions are recorded by criterionDeleted, which still sees the whole criterion
+        if oldname == "":
+            self.edited.emit(self.history.record(AddCriterion(idx, newname, self.criteria.getItems()[idx].col)))
+        elif newname != "":
+            self.edited.emit(self.history.record(RenameEntry("criteria", idx, oldname, newname)))
+        self.history.seal()
+
+    @pyqtSlot(int, int)
+    def criteriaMoved(self, source, dest):
+        self.edited.emit(self.history.record(MoveEntry("criteria", source, dest)))
+        self.history.seal()
+        self.scheduleVisibility()
+
+    @pyqtSlot()
+    def undo(self):
+        self.history.undo()
+
+    @pyqtSlot()
+    def redo(self):
+        self.history.redo()
+
+    def criterionFor(self, col):
+        for crit in self.criteriaList.items:
+            if crit.col == col:
+                return crit
+        return None
+
+    def restoreValues(self, col, rows, values):
+        crit = self.criterionFor(col)
+        if crit is not None:
+            crit.mslider.setRowValues(dict(zip(rows.tolist(), values.tolist())))
+
+    def restoreOption(self, idx, name, row, values):
+        self.restoring[name] = (row, values)
+        self.options.insertEntry(idx, name)
+
+    def restoreCriterion(self, idx, name, col, values, spec):
+        self.model.addCriterion(col=col, values=values)
+        self.reservedColumns.insert(0, col)
+        self.criteria.insertEntry(idx, name)
+        if spec is None:
+            return
+
+        crit = self.criterionFor(col)
+        self.configureCriterion(col, spec)
+        for r in spec["receives"]:
+            receiver = self.criterionFor(r)
+            command = ConfigureCriterion(r, receiver.configSpec())
+            receiver.updateInfluences(receiver.influences | {crit}, recalc=False)
+            weights, formula = spec.get("combinations", {}).get(r, ({}, ""))
+            receiver.updateCombination({self.criterionFor(c): w for c, w in weights.items()}, formula, recalc=False)
+            command.after = receiver.configSpec()
+            self.edited.emit(command)
+
+    def configureCriterion(self, col, spec):
+        crit = self.criterionFor(col)
+        command = ConfigureCriterion(col, crit.configSpec())
+        crit.updateInfluences({self.criterionFor(c) for c in spec["influences"]}, recalc=False)
+        crit.updateNormalization(*spec["modes"], recalc=False)
+        crit.updateRange(spec["rmin"], spec["rmax"], recalc=False)
+        crit.updateWeight(spec["weight"], spec["included"])
+        crit.updateCombination({self.criterionFor(c): w for c, w in spec.get("influenceWeights", {}).items()},
+                               spec.get("formula", ""), recalc=False)
+        command.after = crit.configSpec()
+        self.edited.emit(command)
+
+    def applyStructure(self, add=(), rename=None, delete=()):
+        for mslider in self.multisliders():
+            mslider.applyStructure(add, rename, delete)
+
+    @pyqtSlot(QWidget)
+    def criterionDeleted(self, crit):
+        spec = crit.configSpec()
+        spec["receives"] = [c.col for c in crit.receives]
+        # receivers lose their weight for crit and any formula naming it, undo puts them back
+        spec["combinations"] = {c.col: (c.configSpec()["influenceWeights"], c.configSpec()["formula"]) for c in crit.receives}
+        command = self.history.record(DeleteCriterion(crit.reorderable.idx, crit.reorderable.entryName, crit.col,
+                                                      self.model.values[:, crit.col].copy(), spec))
+        for c in crit.influences:
+            c.receives.discard(crit)
+        for c in list(crit.receives):
+            c.updateInfluences(c.influences - {crit})
+        self.propagator.reach.remove(crit)
+        self.criteriaList.remove(crit)
+        if crit.config is not None:
+            crit.config.deleteLater()
+        self.scheduler.cancel(crit.mslider.flushValues)
+        # until deleteLater runs it can still be painted, and a painted slider reads its column
+        crit.hide()
+        self.model.removeCriterion(crit.col)
+        self.edited.emit(command)
+
+
+class Criterion(QWidget):
+
+    updateValues = pyqtSignal(dict)
+    configured = pyqtSignal(object)
+    
+    def __init__(self, mslider, criteriaList, reorderable, propagator, ranking, history):
+        super().__init__()
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.mslider = mslider
+        self.mslider.updateValues.connect(self.valuesUpdated)
+        self.mslider.valuesEdited.connect(self.valuesEdited)
+        self.model = mslider.model
+        self.col = mslider.col
+        layout.addWidget(self.mslider)
+
+        self.criteriaList = criteriaList
+        self.propagator = propagator
+        self.ranking = ranking
+        self.history = history
+
+        self.rname = ""
+        self.reorderable = reorderable
+        reorderable.nameChanged.connect(self.setName)
+        
+        self.configButton = QPushButton("◊◊◊")
+        layout.addWidget(self.configButton)
+
+        self.influences = set()
+        self.receives = set()
+        self.rmin = self.mslider.curr_min * self.mslider.step
+        self.rmax = self.mslider.curr_max * self.mslider.step
+        self.normalizer = Normalizer()
+        self.influenceWeights = {}
+        self.formula = None
+        self.config = None
+
+        self.configButton.pressed.connect(self.openConfig)
+
+    def setName(self, idx, oldname, newname):
+        if oldname and newname:
+            for r in self.receives:
+                if r.formula is not None and oldname in r.formula.names:
+                    r.formula = r.formula.renamed(oldname, newname)
+        self.rname = newname
+        self.model.renameCriterion(self.col, newname)
+        self.criteriaList.renamed(self)
+        if self.config is not None:
+            self.config.setWindowTitle(f"◊ {newname} ◊")
+        
+    def openConfig(self):
+        if self.config is None:
+            self.config = CriterionConfig(self)
+        self.config.reset()
+        self.config.exec()
+
+    def getValues(self):
+        return self.mslider.getValues()
+
+    def setValues(self, update):
+        self.mslider.setValues(update)
+        self.propagator.changed(self)
+
+    @pyqtSlot(dict)
+    def valuesUpdated(self, update):
+        self.updateValues.emit(update)
+
+    @pyqtSlot(dict)
+    def valuesEdited(self, update):
+        self.propagator.changed(self)
+
+    def combine(self):
+        rows = self.model.rows()
+        if self.formula is not None:
+            cols = {i.rname: i.col for i in self.influences}
+            return self.formula(self.model.values[np.ix_(rows, [cols[n] for n in self.formula.names])])
+        if not self.influenceWeights:
+            return self.model.sumColumns(i.col for i in self.influences)
+        influences = list(self.influences)
+        weights = np.array([self.influenceWeights.get(i, 1.0) for i in influences])
+        return self.model.values[np.ix_(rows, [i.col for i in influences])] @ weights
+
+    def recalc(self):
+        amin = self.mslider.curr_min * self.mslider.step
+        amax = self.mslider.curr_max * self.mslider.step
+        sums = self.combine()
+        scaled, self.rmin, self.rmax = self.normalizer.apply(sums, self.rmin, self.rmax, amin, amax,
+                                                             self.mslider.step, self.possibleRange())
+        return self.mslider.setColumn(np.trunc(scaled))
+
+    def configSpec(self):
+        return {
+            "influences": [i.col for i in self.influences],
+            "rmin": self.rmin,
+            "rmax": self.rmax,
+            "modes": [self.normalizer.center, self.normalizer.range, self.normalizer.invert],
+            "weight": self.ranking.weights.get(self.col, 1.0),
+            "included": self.ranking.isIncluded(self.col),
+            "influenceWeights": {i.col: w for i, w in self.influenceWeights.items()},
+            "formula": self.formula.text if self.formula is not None else ""
+        }
+
+    def possibleRange(self):
+        if self.formula is not None:
+            spans = {i.rname: (i.mslider.curr_min * i.mslider.step, i.mslider.curr_max * i.mslider.step)
+                     for i in self.influences}
+            possible = self.formula.possible([spans[n] for n in self.formula.names])
+            if possible is not None:
+                return possible
+        return sum(abs(self.influenceWeights.get(i, 1.0)) * max(-i.mslider.curr_min, i.mslider.curr_max) * i.mslider.step
+                   for i in self.influences)
+
+    def updateInfluences(self, new_influences, recalc=True):
+        self.propagator.reach.setInfluences(self, new_influences)
+        self.mslider.setReadOnly(len(new_influences) > 0)
+        
+        for to_connect in new_influences - self.influences:
+            to_connect.receives.add(self)
+        for to_disconnect in self.influences - new_influences:
+            to_disconnect.receives.remove(self)
+            self.influenceWeights.pop(to_disconnect, None)
+        self.influences = new_influences
+        if self.formula is not None and not set(self.formula.names) <= {i.rname for i in new_influences}:
+            self.formula = None
+
+        if recalc:
+            self.recompute()
+
+    def updateRange(self, new_min, new_max, recalc=True):
+
+        self.rmin = new_min
+        self.rmax = new_max
+        
+        if recalc:
+            self.recompute()
+
+    def updateCombination(self, weights, formula, recalc=True):
+        # formula names must already be influences, weights only apply without a formula
+        self.influenceWeights = {i: w for i, w in weights.items() if i in self.influences and w != 1.0}
+        self.formula = compileFormula(formula) if formula else None
+        if self.formula is not None and not set(self.formula.names) <= {i.rname for i in self.influences}:
+            self.formula = None
+
+        if recalc:
+            self.recompute()
+
+    def updateWeight(self, weight, included):
+        self.ranking.setWeight(self.col, weight)
+        self.ranking.setIncluded(self.col, included)
+
+    def updateNormalization(self, center, range, invert, recalc=True):
+        self.normalizer.setModes(center, range, invert)
+
+        if recalc:
+            self.recompute()
+
+    def recompute(self):
+        if len(self.influences) > 0:
+            self.propagator.recompute(self)
+
+class CriterionConfig(QDialog):
+    def __init__(self, criterion):
+        super().__init__()
+
+        self.MIN = "◡"
+        self.MAX = "◠"
+
+        self.criterion = criterion
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        sublayout = QHBoxLayout()
+        layout.addLayout(sublayout)
+        
+        influenceLayout = QVBoxLayout()
+        sublayout.addLayout(influenceLayout)
+        self.influenceFilter = QLineEdit()
+        self.influenceFilter.setPlaceholderText("⌕")
+        influenceLayout.addWidget(self.influenceFilter)
+        self.influences = InfluenceProxy(self.criterion)
+        self.influenceFilter.textChanged.connect(self.influences.setFilterFixedString)
+        self.influenceList = QListView()
+        self.influenceList.setUniformItemSizes(True)
+        self.influenceList.setModel(self.influences)
+        influenceLayout.addWidget(self.influenceList)
+        self.formulaEdit = QLineEdit()
+        self.formulaEdit.setPlaceholderText("ƒ")
+        influenceLayout.addWidget(self.formulaEdit)
+
+        #self.previewSlider = MultiSlider(150, 250)
+        #self.previewSlider.setReadOnly(True)
+        #sublayout.addWidget(self.previewSlider)
+
+        self.rangeSlider = MultiSlider(150, 250)
+        self.rangeSlider.setExpandable(True)
+        self.rangeSlider.addHandles([self.MIN, self.MAX])
+        sublayout.addWidget(self.rangeSlider)
+
+        weightLayout = QHBoxLayout()
+        self.includedCheck = QCheckBox("Σ")
+        weightLayout.addWidget(self.includedCheck)
+        self.weightSpin = QDoubleSpinBox()
+        self.weightSpin.setRange(0, 100)
+        self.weightSpin.setSingleStep(0.1)
+        weightLayout.addWidget(self.weightSpin)
+        layout.addLayout(weightLayout)
+
+        self.confirmButton = QPushButton("🞠🞠🞠")
+        self.confirmButton.pressed.connect(self.confirmChanges)
+        layout.addWidget(self.confirmButton)
+        
+        self.setWindowTitle(f"◊ {self.criterion.rname} ◊") 
+
+        rangeGroupLabels = {
+            "◬": "center",
+            "◿◺": "range",
+            "◮": "invert"
+        }
+        rangeOptionLabels = {
+            "center": {
+                "\n".join("▴-▾"): "manual",
+                "\n".join(" - "): "lock",
+                "\n".join("|-|"): "zero",
+                "\n".join("▪-▪"): "mean",
+                "\n".join("▫-▫"): "range"
+            },
+            "range": {
+                "\n".join("▴◠◡▾"): "manual",
+                "\n".join(" ◠◡ "): "lock",
+                "\n".join("◠||◡"): "one",
+                "\n".join("▪◠◡▪"): "stdev",
+                "\n".join("◠▪▪◡"): "minmax",
+                "\n".join("◠▫▫◡"): "possible"
+            },
+            "invert": {
+                "\n".join("◠◡"): "default",
+                "\n".join("◡◠"): "invert" 
+            }
+        }
+        self.rangeOptionLabels = rangeOptionLabels
+        self.rangeGroups = {}
+        self.rangeOptions = {}
+
+        optionsLayout = QVBoxLayout()
+        
+        for optionSet in rangeGroupLabels:
+            key = rangeGroupLabels[optionSet]
+            group, box, options = self.makeButtonGroup(optionSet, rangeOptionLabels[key])
+            self.rangeGroups[key] = group
+            self.rangeOptions[key] = options
+            optionsLayout.addWidget(box)
+        sublayout.addLayout(optionsLayout)
+
+    def reset(self):
+        # the dialog is cached, pull the criterion's current state on every open
+        self.influences.setChecked(self.criterion.influences)
+        self.influenceFilter.clear()
+        self.formulaEdit.setText(self.criterion.formula.text if self.criterion.formula is not None else "")
+        self.rangeSlider.setValues({self.MIN: self.criterion.rmin, self.MAX: self.criterion.rmax})
+        self.includedCheck.setChecked(self.criterion.ranking.isIncluded(self.criterion.col))
+        self.weightSpin.setValue(self.criterion.ranking.weights.get(self.criterion.col, 1.0))
+
+        normalizer = self.criterion.normalizer
+        current = {"center": normalizer.center, "range": normalizer.range, "invert": normalizer.invert}
+        for key, options in self.rangeOptions.items():
+            for radio, label in options.items():
+                if self.rangeOptionLabels[key][label] == current[key]:
+                    radio.setChecked(True)
+        
+    def makeButtonGroup(self, groupLabel, optionLabels):
+        group = QButtonGroup()
+        box = QGroupBox(groupLabel)
+        layout = QGridLayout()
+        options = {}
+        for i, opt in enumerate(optionLabels):
+            radio = QRadioButton()
+            group.addButton(radio)
+            layout.addWidget(radio, 0, i, 1, 1)
+            layout.addWidget(QLabel(opt), 1, i, 1, 1)
+            options[radio] = opt
+        box.setLayout(layout)
+        return group, box, options
+
+    def formulaInfluences(self, text):
+        # criteria a formula names become influences, so they follow the same rules as the checklist
+        crits = {c.rname: c for c in self.criterion.criteriaList.items}
+        names = compileFormula(text).names if text else []
+        for name in names:
+            if name not in crits:
+                raise FormulaError(f"no criterion named {name!r}")
+            if self.criterion.propagator.reach.wouldCycle(crits[name], self.criterion):
+                raise FormulaError(f"{name!r} depends on {self.criterion.rname!r}")
+        return {crits[n] for n in names}
+
+    def confirmChanges(self):
+        text = self.formulaEdit.text().strip()
+        try:
+            referenced = self.formulaInfluences(text)
+        except FormulaError as e:
+            QMessageBox.warning(self, "ƒ", str(e))
+            return
+        command = self.criterion.history.record(ConfigureCriterion(self.criterion.col, self.criterion.configSpec()))
+        new_influences = set(self.influences.checked) | referenced
+        self.criterion.updateInfluences(new_influences, recalc=False)
+        self.criterion.updateCombination(self.criterion.influenceWeights, text, recalc=False)
+        modes = {key: self.rangeOptionLabels[key][self.rangeOptions[key][self.rangeGroups[key].checkedButton()]]
+                 for key in self.rangeGroups}
+        self.criterion.updateNormalization(modes["center"], modes["range"], modes["invert"], recalc=False)
+
+        rangevals = self.rangeSlider.getValues()
+        center = (rangevals[self.MIN] + rangevals[self.MAX]) / 2
+        half = (rangevals[self.MAX] - rangevals[self.MIN]) / 2
+        if modes["center"] == "lock":
+            center = (self.criterion.rmin + self.criterion.rmax) / 2
+        if modes["range"] == "lock":
+            half = (self.criterion.rmax - self.criterion.rmin) / 2
+        self.criterion.updateRange(center - half, center + half, recalc=False)
+        self.criterion.updateWeight(self.weightSpin.value(), self.includedCheck.isChecked())
+        self.criterion.recompute()
+        command.after = self.criterion.configSpec()
+        self.criterion.history.seal()
+        self.criterion.configured.emit(command)
+        self.done(QDialog.DialogCode.Accepted)
+
+
+class CriterionList(QAbstractListModel):
+    # one shared list behind every cached config dialog, patched as criteria come and go
+
+    def __init__(self):
+        super().__init__()
+        self.items = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.items[index.row()].rname
+        return None
+
+    def item(self, row):
+        return self.items[row]
+
+    def append(self, crit):
+        self.beginInsertRows(QModelIndex(), len(self.items), len(self.items))
+        self.items.append(crit)
+        self.endInsertRows()
+
+    def remove(self, crit):
+        row = self.items.index(crit)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.items[row]
+        self.endRemoveRows()
+
+    def renamed(self, crit):
+        idx = self.index(self.items.index(crit))
+        self.dataChanged.emit(idx, idx, [Qt.ItemDataRole.DisplayRole])
+
+
+class InfluenceProxy(QSortFilterProxyModel):
+    def __init__(self, criterion):
+        super().__init__()
+
+        self.criterion = criterion
+        self.checked = set()
+        self.setSourceModel(criterion.criteriaList)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.sort(0)
+
+    def crit(self, index):
+        return self.sourceModel().item(self.mapToSource(index).row())
+
+    def setChecked(self, crits):
+        self.checked = set(crits)
+        if self.rowCount() > 0:
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, 0), [Qt.ItemDataRole.CheckStateRole])
+
+    def flags(self, index):
+        crit = self.crit(index)
+        # downstream criteria, including this one, would close a cycle
+        if self.criterion.propagator.reach.wouldCycle(crit, self.criterion):
+            return Qt.ItemFlag.ItemIsUserCheckable
+        return Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if self.crit(index) in self.checked else Qt.CheckState.Unchecked
+        return super().data(index, role)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.CheckStateRole or not self.flags(index) & Qt.ItemFlag.ItemIsEnabled:
+            return False
+        crit = self.crit(index)
+        if Qt.CheckState(value) == Qt.CheckState.Checked:
+            self.checked.add(crit)
+        else:
+            self.checked.discard(crit)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        return True
+
+
+class SensitivityRunner(QObject):
+
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    chunkDone = pyqtSignal()
+
+    def __init__(self, workers=None):
+        super().__init__()
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.futures = []
+        self.remaining = 0
+        self.chunkDone.connect(self.collect)
+
+    def running(self):
+        return self.remaining > 0
+
+    def start(self, criteria, matrix, trials, **options):
+        from sensitivity import makeExecutor, submit
+
+        if self.executor is None:
+            self.executor = makeExecutor(self.workers)
+        self.futures = submit(self.executor, criteria, matrix, trials, self.workers * 2, **options)
+        self.remaining = len(self.futures)
+        for f in self.futures:
+            # runs on the executor's thread, the signal queues back to the GUI thread
+            f.add_done_callback(lambda f: self.chunkDone.emit())
+
+    @pyqtSlot()
+    def collect(self):
+        self.remaining -= 1
+        if self.remaining > 0:
+            return
+        from sensitivity import combine
+
+        try:
+            stats = combine(self.futures)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(stats)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+class SensitivityReport(QDialog):
+    def __init__(self, report, rows=20):
+        super().__init__()
+
+        self.setWindowTitle("◌ ◍ ◎ ≈")
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        columns = ["option", "win", "top", "meanRank", "rankStdev", "best", "worst"]
+        table = QTableWidget(min(rows, len(report)), len(columns))
+        table.setHorizontalHeaderLabels(["", "▲", "▲▲▲", "μ", "σ", "◠", "◡"])
+        for i, row in enumerate(report[:rows]):
+            for j, key in enumerate(columns):
+                value = row[key]
+                text = f"{value:.0%}" if key in ("win", "top") else f"{value:.2f}" if isinstance(value, float) else str(value)
+                table.setItem(i, j, QTableWidgetItem(text))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+
+
+class RankingPanel(QGroupBox):
+    def __init__(self, ranking, k):
+        super().__init__("▲")
+
+        self.ranking = ranking
+        self.shown = []
+        self.pending = False
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        self.labels = []
+        for i in range(k):
+            label = QLabel()
+            label.setStyleSheet("QLabel { background-color : gainsboro; color : black; }")
+            label.hide()
+            layout.addWidget(label)
+            self.labels.append(label)
+
+    def rankingChanged(self):
+        # a burst of changes in one handler is shown once it has returned
+        if not self.pending:
+            self.pending = True
+            QTimer.singleShot(0, self.refresh)
+
+    @pyqtSlot()
+    def refresh(self):
+        self.pending = False
+        top = self.ranking.top(len(self.labels))
+        if top == self.shown:
+            return
+        self.shown = top
+
+        for i, label in enumerate(self.labels):
+            if i < len(top):
+                label.setText(f" {top[i][0]}  {top[i][1]:+.0f} ")
+                label.show()
+            else:
+                label.hide()
+
+
+
+class ProfileOverlay(QLabel):
+    def __init__(self, profiler, parent, rows=8):
+        super().__init__(parent)
+
+        self.profiler = profiler
+        self.rows = rows
+        self.setFont(QFont("monospace", 8))
+        self.setStyleSheet("QLabel { background-color : rgba(0, 0, 0, 160); color : white; padding : 4px; }")
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.pending = False
+        self.show()
+
+    @pyqtSlot()
+    def toggle(self):
+        self.setVisible(not self.isVisible())
+
+    @pyqtSlot()
+    def refresh(self):
+        # flushed fires inside the outermost handler, render once it has returned
+        if not self.pending:
+            self.pending = True
+            QTimer.singleShot(0, self.showFrame)
+
+    def showFrame(self):
+        # one scheduler flush is one frame of coalesced updates
+        self.pending = False
+        frame, total = self.profiler.takeFrame()
+        if not self.isVisible() or not frame:
+            return
+
+        worst = sorted(frame.items(), key=lambda item: -item[1])[:self.rows]
+        lines = [f"frame {total * 1000:7.2f} ms"]
+        lines += [f"{cost * 1000:7.2f}  {name}" for name, cost in worst]
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(self.parentWidget().width() - self.width() - 8, 8)
+        self.raise_()